@@ -0,0 +1,238 @@
+"""
+Aggregate reports over the slim appendix data, served from a cached cube.
+
+The appendix tables are all counts over a few columns of the slim data: producer
+type x TRL x Level 3 taxonomy, relevance distributions, taxonomy rollups. Instead of
+one groupby over the full slim_data.json per table, this module:
+
+- reads the data once, batch by batch, and counts rows per combination of the
+  CUBE_DIMENSIONS (build_cube). The result, the cube, has one row per combination
+  that occurs, so it is tiny next to the data;
+- caches the cube with inventory_cache, keyed by the input file and validated
+  against its fingerprint (mtime, size and SHA-256), so later runs skip the read
+  until the input changes (load_cube);
+- answers every declared report in REPORTS from the cube alone (report): counts are
+  sums of cube counts, mean TRL and relevance are count-weighted, and the TX level 1
+  and 2 dimensions are derived from 'Level 3 Taxonomy' through the TaxonomyTree;
+- writes the tables as CSV files or as the sheets of one Excel workbook (export_reports).
+
+Standardized data is accepted too; it is run through build_slim_dataframe first.
+
+Usage:
+    python appendix_report.py --input ./data/slim_data.json --output ./data/appendix_reports [--save-type excel]
+    python appendix_report.py --reports relevance taxonomy_level_1 --no-cache
+"""
+from argparse import ArgumentParser
+from typing import Iterable, NamedTuple, Optional
+import os
+import numpy as np
+import pandas as pd
+
+from inventory_cache import load_cached_frame, store_cached_frame
+from output_writers import BATCH_SIZE, iter_frame_batches
+from profiling import profiled_stage, stage, add_profiling_arguments, start_from_args, finish_from_args
+from scrape_standard_for_appendix import SLIM_PATH, build_slim_dataframe
+from taxonomy import APPENDIX_COLUMN, UNKNOWN_LABEL, TaxonomyTree
+
+
+CUBE_DIMENSIONS = ('Producer Type', 'TRL', APPENDIX_COLUMN, 'Relevance (1-5)')
+NUMERIC_DIMENSIONS = ('TRL', 'Relevance (1-5)')  # 0 is the fill value for a missing value
+DERIVED_DIMENSIONS = {'TX Level 1': 1, 'TX Level 2': 2}  # Taxonomy depth, derived from APPENDIX_COLUMN
+CUBE_VERSION = 1  # Bump when the cube layout changes
+CUBE_KEY = f"appendix-report-cube:v{CUBE_VERSION}:{'|'.join(CUBE_DIMENSIONS)}"
+REPORT_PATH = './data/appendix_reports'
+REPORT_FORMATS = ('csv', 'excel')
+
+
+class ReportSpec(NamedTuple):
+    """
+    One report table: a count per combination of `dimensions`. With `columns`, that
+    dimension's values are spread into columns (plus a 'Total'); `means` adds the
+    count-weighted mean of numeric dimensions, leaving out their 0 fill values.
+    """
+    dimensions: tuple[str, ...]
+    columns: Optional[str] = None
+    means: tuple[str, ...] = ()
+
+
+REPORTS = {
+    'producer_trl_taxonomy': ReportSpec(('Producer Type', 'TRL', APPENDIX_COLUMN)),
+    'producer_type': ReportSpec(('Producer Type',), means=NUMERIC_DIMENSIONS),
+    'relevance': ReportSpec(('Relevance (1-5)',)),
+    'relevance_by_producer_type': ReportSpec(('Producer Type',), columns='Relevance (1-5)'),
+    'trl_by_producer_type': ReportSpec(('Producer Type',), columns='TRL'),
+    'taxonomy_level_1': ReportSpec(('TX Level 1',), means=NUMERIC_DIMENSIONS),
+    'taxonomy_level_3': ReportSpec((APPENDIX_COLUMN,), means=NUMERIC_DIMENSIONS),
+    'relevance_by_taxonomy_level_1': ReportSpec(('TX Level 1',), columns='Relevance (1-5)'),
+}
+
+
+def _cube_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """Row count per combination of the CUBE_DIMENSIONS in one batch of slim (or standardized) data."""
+    if not df.empty and any(dim not in df.columns for dim in CUBE_DIMENSIONS):
+        df = build_slim_dataframe(df)
+    keys = {}
+    for dim in CUBE_DIMENSIONS:
+        column = df[dim] if dim in df.columns else pd.Series(index=df.index, dtype=object)
+        if dim in NUMERIC_DIMENSIONS:
+            keys[dim] = pd.to_numeric(column, errors='coerce').fillna(0).astype(int)
+        else:
+            keys[dim] = column.astype(object).where(column.notna(), UNKNOWN_LABEL).astype(str)
+    counts = pd.DataFrame(keys).groupby(list(CUBE_DIMENSIONS), sort=False).size()
+    return counts.rename('Count').reset_index()
+
+
+@profiled_stage()
+def build_cube(frames: pd.DataFrame | Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Count rows per combination of the CUBE_DIMENSIONS, in one pass over the data.
+    Args:
+        frames (pd.DataFrame | Iterable[pd.DataFrame]): Slim or standardized data, whole or in batches.
+    Returns:
+        pd.DataFrame: The CUBE_DIMENSIONS and 'Count', one row per combination that occurs, sorted.
+    """
+    frames = [frames] if isinstance(frames, pd.DataFrame) else frames
+    partial = [_cube_counts(frame) for frame in frames]
+    if not partial:
+        partial = [_cube_counts(pd.DataFrame())]
+    cube = pd.concat(partial, ignore_index=True).groupby(list(CUBE_DIMENSIONS), sort=True)['Count'].sum()
+    return cube.reset_index()
+
+
+def load_cube(input_path: str, cache_dir: Optional[str] = None, use_cache: bool = True,
+              batch_size: int = BATCH_SIZE) -> pd.DataFrame:
+    """
+    The cube of an input file: from the cache while the file is unchanged, built and cached otherwise.
+    Args:
+        input_path (str): Slim or standardized data written by write_frame (.json, .ndjson[.gz|.zst], .parquet or .xlsx).
+        cache_dir (Optional[str]): Directory holding the cache; defaults to '.cache' in the input's directory.
+        use_cache (bool): Whether to read and write the cache.
+        batch_size (int): Rows read at a time when building the cube.
+    Returns:
+        pd.DataFrame: See build_cube.
+    """
+    if use_cache:
+        cube = load_cached_frame(input_path, cache_dir, CUBE_KEY)
+        if cube is not None:
+            return cube
+    cube = build_cube(iter_frame_batches(input_path, batch_size))
+    if use_cache:
+        store_cached_frame(input_path, cube, cache_dir, CUBE_KEY)
+    return cube
+
+
+def _with_derived_dimensions(cube: pd.DataFrame, dimensions: list[str]) -> pd.DataFrame:
+    """Add the requested DERIVED_DIMENSIONS: the TX ancestor label of each cube row's taxonomy."""
+    wanted = [dim for dim in dimensions if dim in DERIVED_DIMENSIONS]
+    if not wanted:
+        return cube
+    cube = cube.copy()
+    tree = TaxonomyTree.from_labels(cube[APPENDIX_COLUMN])
+    nodes = tree.node_ids(cube[APPENDIX_COLUMN])
+    for dim in wanted:
+        ancestors = tree.ancestor(nodes, DERIVED_DIMENSIONS[dim])
+        labels = np.array([tree.label(node) for node in range(len(tree))] + [UNKNOWN_LABEL], dtype=object)
+        cube[dim] = labels[np.where(ancestors >= 0, ancestors, len(tree))]
+    return cube
+
+
+def report(cube: pd.DataFrame, spec: ReportSpec | str) -> pd.DataFrame:
+    """
+    One report table, computed from the cube alone.
+    Args:
+        cube (pd.DataFrame): Output of build_cube or load_cube.
+        spec (ReportSpec | str): The report, or the name of one of REPORTS.
+    Returns:
+        pd.DataFrame: The dimensions, then 'Count' and 'Mean <dimension>' columns, or with
+            `columns` one '<dimension> <value>' column per value and a 'Total'.
+    """
+    if isinstance(spec, str):
+        if spec not in REPORTS:
+            raise ValueError(f"Unknown report '{spec}'; expected one of {', '.join(REPORTS)}.")
+        spec = REPORTS[spec]
+    keys = list(spec.dimensions) + ([spec.columns] if spec.columns else [])
+    unknown = [dim for dim in keys + list(spec.means)
+               if dim not in CUBE_DIMENSIONS and dim not in DERIVED_DIMENSIONS]
+    if unknown or any(dim not in NUMERIC_DIMENSIONS for dim in spec.means):
+        raise ValueError(f"Reports can group by {', '.join(CUBE_DIMENSIONS + tuple(DERIVED_DIMENSIONS))} "
+                         f"and average {', '.join(NUMERIC_DIMENSIONS)}; got {spec}.")
+    if spec.columns and spec.means:
+        raise ValueError("A report cannot both spread a dimension into columns and add means.")
+    cube = _with_derived_dimensions(cube, keys)
+    grouped = cube.groupby(keys, sort=True)
+
+    if spec.columns:
+        table = grouped['Count'].sum().unstack(spec.columns, fill_value=0)
+        table.columns = [f"{spec.columns} {value}" for value in table.columns]
+        table['Total'] = table.sum(axis=1)
+        return table.reset_index()
+
+    table = grouped['Count'].sum().reset_index()
+    for dim in spec.means:
+        present = cube['Count'].where(cube[dim] > 0, 0)
+        sums = (present * cube[dim]).groupby([cube[key] for key in keys], sort=True).sum().to_numpy()
+        totals = present.groupby([cube[key] for key in keys], sort=True).sum().to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table[f'Mean {dim}'] = np.where(totals > 0, sums / np.maximum(totals, 1), np.nan)
+    return table
+
+
+def build_reports(cube: pd.DataFrame, names: Optional[list[str]] = None) -> dict[str, pd.DataFrame]:
+    """Report tables by name, for the given REPORTS (all by default)."""
+    return {name: report(cube, name) for name in (list(REPORTS) if names is None else names)}
+
+
+def export_reports(tables: dict[str, pd.DataFrame], output: str, output_type: str = 'csv') -> list[str]:
+    """
+    Write report tables to disk.
+    Args:
+        tables (dict[str, pd.DataFrame]): Report name -> table (see build_reports).
+        output (str): With 'csv', a directory receiving one '<name>.csv' per report; with
+            'excel', the workbook path ('.xlsx' is appended if missing), one sheet per report.
+        output_type (str): One of REPORT_FORMATS.
+    Returns:
+        list[str]: Paths written.
+    """
+    if output_type not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report format '{output_type}'; expected one of {', '.join(REPORT_FORMATS)}.")
+    if output_type == 'csv':
+        os.makedirs(output, exist_ok=True)
+        paths = []
+        for name, table in tables.items():
+            paths.append(os.path.join(output, f"{name}.csv"))
+            table.to_csv(paths[-1], index=False)
+        return paths
+    path = output if output.lower().endswith('.xlsx') else output + '.xlsx'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with pd.ExcelWriter(path) as writer:
+        for name, table in tables.items():
+            table.to_excel(writer, sheet_name=name[:31], index=False)  # Excel's sheet name limit
+    return [path]
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Build the appendix report tables from the slim data.")
+    parser.add_argument('--input', type=str, default=SLIM_PATH + '.json',
+                        help='Slim or standardized data (.json, .ndjson[.gz|.zst], .parquet or .xlsx).')
+    parser.add_argument('--reports', type=str, nargs='+', choices=list(REPORTS), default=None,
+                        help='Reports to build (default: all).')
+    parser.add_argument('--output', type=str, default=REPORT_PATH,
+                        help='Directory for the CSV files, or path of the Excel workbook.')
+    parser.add_argument('--save-type', type=str, choices=REPORT_FORMATS, default='csv', help='Report format.')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help="Directory for the cached cube (default: .cache in the input's directory).")
+    parser.add_argument('--no-cache', action='store_true', help='Always rebuild the cube from the input.')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows read at a time when building the cube.')
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    if not os.path.exists(args.input):
+        raise FileNotFoundError(f"The input file {args.input} does not exist.")
+
+    start_from_args(args)
+    with stage('load_cube'):
+        cube = load_cube(args.input, args.cache_dir, not args.no_cache, args.batch_size)
+    with stage('build_reports', rows_in=len(cube)):
+        tables = build_reports(cube, args.reports)
+    paths = export_reports(tables, args.output, args.save_type)
+    print(f"{len(tables)} report(s) from a {len(cube)}-row cube saved to {', '.join(paths)}.")
+    finish_from_args(args)
@@ -0,0 +1,262 @@
+"""
+Batch mode: standardize many FILTERED workbooks against one loaded master inventory.
+
+Each team curates its own filtered workbook; running inventory_processor.py once
+per file parses INVENTORY.xlsx again every time. run_batch loads the master (and
+its row-number index) once, then processes the filtered workbooks:
+
+- serially with `workers=1`;
+- otherwise across a process pool. Where the 'fork' start method exists (Linux),
+  the master is put in a module global before the pool starts, so every worker
+  inherits it copy-on-write instead of receiving a pickled copy. Elsewhere each
+  worker loads the master from the snapshot cache, whose string columns stay
+  memory-mapped (see inventory_cache), so the workers share the operating system's
+  page cache for them.
+
+One standardized output is written per input, named after the workbook's path
+relative to the deepest directory holding every input (source_names), so
+teamA/FILTERED.xlsx and teamB/FILTERED.xlsx write teamA/FILTERED_standardized.json and
+teamB/FILTERED_standardized.json under the output directory. Inputs that would still
+write the same output are rejected before anything runs. With `merged_name` all rows
+are also written to one output with a 'source workbook' provenance column holding
+that relative path. A workbook that fails is reported and the others still run.
+
+Usage:
+    python batch.py "./teams/*.xlsx" --data-dir ./data --output-dir ./data/batch --workers 4 --merged merged_standardized
+"""
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+import glob
+import multiprocessing
+import os
+import pandas as pd
+
+from inventory_index import InventoryIndex, capture_master_with_index
+from inventory_processor import (
+    DATA_DIR, INVENTORY_PATH, DUPLICATE_POLICIES, DUPLICATE_POLICY, WORKERS,
+    capture_rows_and_metadata, standardize_data, rename_output_columns
+)
+from output_writers import OUTPUT_FORMATS, BATCH_SIZE, output_path, write_frame
+from profiling import profiled_stage, add_profiling_arguments, start_from_args, finish_from_args
+
+
+PROVENANCE_COLUMN = 'source workbook'  # Column naming the input workbook in the merged output
+
+# Set in the parent before a fork, or by _init_worker in spawned workers
+_MASTER: Optional[pd.DataFrame] = None
+_INDEX: Optional[InventoryIndex] = None
+
+
+@dataclass
+class BatchOptions:
+    """Settings shared by every workbook of a batch."""
+    output_dir: str
+    output_type: str = 'json'
+    duplicate_policy: str = DUPLICATE_POLICY
+    batch_size: int = BATCH_SIZE
+
+
+@dataclass
+class BatchResult:
+    """Outcome for one filtered workbook."""
+    filtered_file: str
+    name: str = ''  # Path relative to the inputs' common directory (see source_names)
+    output_file: Optional[str] = None
+    rows: int = 0
+    error: Optional[str] = None
+    frame: Optional[pd.DataFrame] = None
+
+
+def find_filtered_workbooks(patterns: list[str], exclude: tuple[str, ...] = ()) -> list[str]:
+    """
+    Expand directories and glob patterns into a sorted list of .xlsx workbooks.
+    Args:
+        patterns (list[str]): Directories (all .xlsx files inside) or glob patterns.
+        exclude (tuple[str, ...]): Paths to leave out, e.g. the master inventory.
+    Returns:
+        list[str]: Workbook paths, without Excel's `~$` lock files.
+    """
+    excluded = {os.path.abspath(path) for path in exclude}
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*.xlsx')
+        for path in glob.glob(pattern):
+            if os.path.basename(path).startswith('~$') or os.path.abspath(path) in excluded:
+                continue
+            found.add(path)
+    return sorted(found)
+
+
+def source_names(filtered_files: list[str]) -> list[str]:
+    """
+    Name each workbook by its path relative to the deepest directory holding every input.
+    Args:
+        filtered_files (list[str]): Filtered workbook paths.
+    Returns:
+        list[str]: '/'-separated relative paths, in input order; the bare file names when
+            every input is in the same directory.
+    """
+    if not filtered_files:
+        return []
+    paths = [os.path.abspath(path) for path in filtered_files]
+    root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    return [os.path.relpath(path, root).replace(os.sep, '/') for path in paths]
+
+
+def _init_worker(inventory_path: str, data_dir: str, cache_dir: str, use_cache: bool) -> None:
+    """Pool initializer for spawned workers: load the master from the snapshot cache."""
+    global _MASTER, _INDEX
+    _MASTER, _INDEX = capture_master_with_index(inventory_path, data_dir, cache_dir=cache_dir, use_cache=use_cache)
+
+
+def _output_stem(name: str, options: BatchOptions) -> str:
+    stem = os.path.splitext(name)[0] + '_standardized'
+    return os.path.join(options.output_dir, *stem.split('/'))
+
+
+def _check_distinct_outputs(filtered_files: list[str], names: list[str], options: BatchOptions) -> None:
+    """Raise if two workbooks would write the same output file."""
+    seen: dict[str, str] = {}
+    for path, name in zip(filtered_files, names):
+        key = os.path.normcase(os.path.abspath(_output_stem(name, options)))
+        if key in seen:
+            raise ValueError(f"'{seen[key]}' and '{path}' would both be written to "
+                             f"'{output_path(_output_stem(name, options), options.output_type)}'.")
+        seen[key] = path
+
+
+def process_workbook(filtered_file: str, options: BatchOptions, keep_frame: bool = False,
+                     name: Optional[str] = None) -> BatchResult:
+    """
+    Standardize one filtered workbook against the loaded master and write its output.
+    Args:
+        filtered_file (str): Path to the filtered workbook.
+        options (BatchOptions): Output location, format and duplicate policy.
+        keep_frame (bool): Return the standardized frame too (for the merged output).
+        name (Optional[str]): The workbook's name in the batch (see source_names); its file name by default.
+    Returns:
+        BatchResult: Output path and row count, or the error message.
+    """
+    result = BatchResult(filtered_file, name or os.path.basename(filtered_file))
+    try:
+        metadata, rows_to_use = capture_rows_and_metadata(
+            os.path.dirname(filtered_file), os.path.basename(filtered_file),
+            as_frame=True, duplicate_policy=options.duplicate_policy
+        )
+        standardized = rename_output_columns(standardize_data(_MASTER, metadata, rows_to_use, index=_INDEX))
+        result.output_file = output_path(_output_stem(result.name, options), options.output_type)
+        write_frame(standardized, result.output_file, options.output_type, options.batch_size)
+        result.rows = len(standardized)
+        if keep_frame:
+            result.frame = standardized
+    except Exception as error:  # Reported per workbook; the rest of the batch still runs
+        result.error = f"{type(error).__name__}: {error}"
+    return result
+
+
+@profiled_stage()
+def run_batch(
+    filtered_files: list[str],
+    options: BatchOptions,
+    inventory_path: str = INVENTORY_PATH,
+    data_dir: str = DATA_DIR,
+    cache_dir: Optional[str] = None,
+    use_cache: bool = True,
+    workers: int = WORKERS,
+    merged_name: Optional[str] = None
+) -> list[BatchResult]:
+    """
+    Standardize every filtered workbook against one load of the master inventory.
+    Raises ValueError before loading anything if two workbooks would write the same output.
+    Args:
+        filtered_files (list[str]): Filtered workbook paths (see find_filtered_workbooks).
+        options (BatchOptions): Output location, format and duplicate policy.
+        inventory_path (str): Path to the master inventory file, relative to data_dir.
+        data_dir (str): Directory holding the master inventory.
+        cache_dir (Optional[str]): Directory for the master's snapshot cache and index; defaults to <data_dir>/.cache.
+        use_cache (bool): Whether the master may be loaded from (and saved to) the cache.
+        workers (int): Processes used to process the workbooks.
+        merged_name (Optional[str]): If set, also write all rows to this output (name without
+            extension, inside output_dir) with a 'source workbook' column (see source_names).
+    Returns:
+        list[BatchResult]: One result per workbook, in input order.
+    """
+    global _MASTER, _INDEX
+    names = source_names(filtered_files)
+    _check_distinct_outputs(filtered_files, names, options)
+    os.makedirs(options.output_dir, exist_ok=True)
+    _MASTER, _INDEX = capture_master_with_index(inventory_path, data_dir, cache_dir=cache_dir, use_cache=use_cache)
+    keep_frames = merged_name is not None
+    try:
+        if workers <= 1 or len(filtered_files) <= 1:
+            results = [process_workbook(path, options, keep_frames, name) for path, name in zip(filtered_files, names)]
+        elif 'fork' in multiprocessing.get_all_start_methods():
+            # Forked workers inherit _MASTER and _INDEX copy-on-write
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+                results = list(pool.map(process_workbook, filtered_files, [options] * len(filtered_files),
+                                        [keep_frames] * len(filtered_files), names))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(inventory_path, data_dir, cache_dir, use_cache)) as pool:
+                results = list(pool.map(process_workbook, filtered_files, [options] * len(filtered_files),
+                                        [keep_frames] * len(filtered_files), names))
+    finally:
+        _MASTER, _INDEX = None, None
+
+    if merged_name is not None:
+        frames = [
+            result.frame.assign(**{PROVENANCE_COLUMN: result.name})
+            for result in results if result.frame is not None and not result.frame.empty
+        ]
+        merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        write_frame(merged, output_path(os.path.join(options.output_dir, merged_name), options.output_type),
+                    options.output_type, options.batch_size)
+        for result in results:
+            result.frame = None
+    return results
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Standardize many filtered workbooks against one load of the master inventory.")
+    parser.add_argument('inputs', type=str, nargs='+', help='Filtered workbooks: directories or glob patterns.')
+    parser.add_argument('--data-dir', type=str, default=DATA_DIR, help='Directory holding the master inventory.')
+    parser.add_argument('--inventory-name', type=str, default=INVENTORY_PATH, help='Name of the master inventory file.')
+    parser.add_argument('--output-dir', type=str, default=None,
+                        help='Directory for the per-workbook outputs (default: <data-dir>/batch).')
+    parser.add_argument('--output-type', type=str, choices=list(OUTPUT_FORMATS), default='json',
+                        help='Output format for standardized data.')
+    parser.add_argument('--merged', type=str, default=None,
+                        help="Also write all rows to this output (name without extension) with a 'source workbook' column.")
+    parser.add_argument('--workers', type=int, default=WORKERS, help='Processes used to process the workbooks.')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for the parsed master inventory cache (default: <data-dir>/.cache).')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-parse the master inventory instead of using the cache.')
+    parser.add_argument('--duplicate-policy', type=str, choices=DUPLICATE_POLICIES, default=DUPLICATE_POLICY,
+                        help='Which entry to keep when a Row no. appears on more than one filtered sheet.')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows serialized at a time when writing.')
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+
+    inventory_file = os.path.join(args.data_dir, args.inventory_name)
+    filtered_files = find_filtered_workbooks(args.inputs, exclude=(inventory_file,))
+    if not filtered_files:
+        raise FileNotFoundError(f"No filtered workbooks match {', '.join(args.inputs)}.")
+    output_dir = args.output_dir or os.path.join(args.data_dir, 'batch')
+    options = BatchOptions(output_dir, args.output_type, args.duplicate_policy, args.batch_size)
+
+    start_from_args(args)
+    results = run_batch(filtered_files, options, args.inventory_name, args.data_dir, args.cache_dir,
+                        not args.no_cache, args.workers, args.merged)
+    for result in results:
+        if result.error:
+            print(f"FAILED {result.filtered_file}: {result.error}")
+        else:
+            print(f"{result.filtered_file}: {result.rows} rows -> {result.output_file}")
+    failed = sum(result.error is not None for result in results)
+    print(f"Batch complete: {len(results) - failed} of {len(results)} workbooks processed.")
+    finish_from_args(args)
+    if failed:
+        raise SystemExit(1)
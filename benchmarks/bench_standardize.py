@@ -0,0 +1,86 @@
+"""
+Benchmark standardize_data against the previous iterrows implementation.
+
+Builds an in-memory master frame and a metadata dict for selections from 1k to 1M
+rows, then times the columnar join in inventory_processor.standardize_data and the
+legacy per-row loop it replaced (kept here for comparison). The legacy loop is only
+timed up to --legacy-max rows, since it takes minutes beyond that.
+
+Usage:
+    python benchmarks/bench_standardize.py [--sizes 1000 10000 100000 1000000] [--legacy-max 100000]
+"""
+from argparse import ArgumentParser
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inventory_processor import standardize_data, HEADER_ROW_OFFSET
+from synthetic import generate_master_frame
+
+
+def legacy_standardize_data(master_content: pd.DataFrame, metadata_dict: dict, rows_to_use: list) -> pd.DataFrame:
+    """The iterrows-based standardize_data, as it was before the columnar join."""
+    enriched_rows = []
+    rows_to_use = [(int(row) - HEADER_ROW_OFFSET) for row in rows_to_use]
+    rows_df = master_content[master_content.index.isin(rows_to_use)]
+    for idx, row in rows_df.iterrows():
+        metadata = metadata_dict.get(idx + HEADER_ROW_OFFSET, {})
+        row_data = row.to_dict()
+        row_data.update(metadata)
+        enriched_rows.append(row_data)
+    return pd.DataFrame(enriched_rows)
+
+
+def make_selection(master: pd.DataFrame, n_selected: int, seed: int = 0) -> tuple[dict, list]:
+    """Pick n_selected row numbers from the master and attach metadata to them."""
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(len(master), n_selected, replace=False)
+    rows_to_use = (positions + HEADER_ROW_OFFSET).tolist()
+    metadata = {
+        row_no: {'Relevance (1-5)': int(row_no % 5) + 1, 'Notes': f"note {row_no}", 'Link': None}
+        for row_no in rows_to_use
+    }
+    return metadata, rows_to_use
+
+
+def time_call(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def run(sizes: list[int], legacy_max: int) -> list[dict]:
+    results = []
+    for n_selected in sizes:
+        master = generate_master_frame(max(n_selected * 2, 15_298))
+        metadata, rows_to_use = make_selection(master, n_selected)
+        result = {
+            'selected_rows': n_selected,
+            'master_rows': len(master),
+            'columnar_s': time_call(standardize_data, master, metadata, rows_to_use),
+            'legacy_s': None,
+        }
+        if n_selected <= legacy_max:
+            result['legacy_s'] = time_call(legacy_standardize_data, master, metadata, rows_to_use)
+        results.append(result)
+        legacy = f"{result['legacy_s']:.3f}s" if result['legacy_s'] is not None else "skipped"
+        print(f"{n_selected:>9,} rows | columnar {result['columnar_s']:.3f}s | legacy {legacy}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark standardize_data scaling.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000],
+                        help='Numbers of selected rows to benchmark.')
+    parser.add_argument('--legacy-max', type=int, default=100_000,
+                        help='Largest selection to time with the legacy iterrows implementation.')
+    parser.add_argument('--output', type=str, default=None, help='Optional path to write results as JSON.')
+    args = parser.parse_args()
+    results = run(args.sizes, args.legacy_max)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=4)
@@ -0,0 +1,228 @@
+"""
+Benchmark suite for the whole pipeline on synthetic inventories.
+
+For each master size the suite generates synthetic INVENTORY.xlsx / FILTERED.xlsx
+workbooks (see synthetic.py), then times and memory-profiles every stage on its own:
+
+- capture_filtered_data, capture_master_content (cold, and from a warm cache)
+- standardize_data and writing the standardized output with output_writers.write_frame
+  (JSON, gzip NDJSON, Parquet), as the scripts do
+- create_slim_dataframe and each fill_* step of scrape_standard_for_appendix.py
+
+Each stage is timed once without tracing (wall and CPU time), then run again under
+tracemalloc for its peak allocation, so tracing never inflates the timings.
+Masters larger than one Excel sheet can hold (1,048,576 rows) skip the workbook
+stages and feed the generated frames straight into the later stages.
+
+Results are written as JSON (one file per invocation) so runs can be compared;
+pass --baseline with an earlier result file to print per-stage speedups.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 15000 150000 1500000 --sheets 12
+"""
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inventory_processor import (
+    capture_filtered_data, capture_master_content, combine_filtered_frames, standardize_data, METADATA_COLUMNS
+)
+from scrape_standard_for_appendix import (
+    create_slim_dataframe, fill_producer_type, fill_level_3_taxonomy, fill_tlr_with_zero, fill_relevance_with_zero
+)
+import output_writers
+from synthetic import (
+    EXCEL_MAX_ROWS, generate_master_frame, generate_filtered_sheets,
+    write_inventory_workbook, write_filtered_workbook
+)
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+DEFAULT_SIZES = [15_000, 150_000, 1_500_000]
+
+
+def _row_count(result: Any) -> Optional[int]:
+    if isinstance(result, (pd.DataFrame, dict)):
+        return len(result)
+    return None
+
+
+def measure(name: str, func: Callable[..., Any], setup: Callable[[], tuple] = tuple,
+            rows_in: Optional[int] = None, memory: bool = True) -> tuple[dict, Any]:
+    """
+    Time one stage, then optionally re-run it under tracemalloc for its peak allocation.
+    Args:
+        name (str): Stage name.
+        func (Callable): The stage; called as func(*setup()).
+        setup (Callable): Untimed callable producing fresh arguments (e.g. a copy of a frame the stage mutates).
+        rows_in (Optional[int]): Rows fed into the stage.
+        memory (bool): Whether to measure peak traced memory.
+    Returns:
+        tuple[dict, Any]: The stage record and the stage's result.
+    """
+    args = setup()
+    gc.collect()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    result = func(*args)
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    peak_mb = None
+    if memory:
+        args = setup()
+        gc.collect()
+        tracemalloc.start()
+        func(*args)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    record = {
+        'stage': name,
+        'wall_s': round(wall, 6),
+        'cpu_s': round(cpu, 6),
+        'peak_traced_mb': None if peak_mb is None else round(peak_mb, 3),
+        'rows_in': rows_in,
+        'rows_out': _row_count(result),
+    }
+    print(f"  {name:<34} {wall:>9.3f}s  "
+          f"{'' if peak_mb is None else f'{peak_mb:>9.1f} MB'}  rows {rows_in} -> {record['rows_out']}")
+    return record, result
+
+
+def skipped(name: str, reason: str) -> dict:
+    print(f"  {name:<34} skipped: {reason}")
+    return {'stage': name, 'skipped': reason}
+
+
+def run_size(n_rows: int, n_sheets: int, selected_fraction: float, workdir: str,
+             seed: int = 0, memory: bool = True) -> dict:
+    """Generate inputs for one master size and benchmark every stage."""
+    rows_per_sheet = max(1, int(n_rows * selected_fraction / n_sheets))
+    print(f"{n_rows:,} master rows, {n_sheets} sheets x {rows_per_sheet:,} rows")
+    master = generate_master_frame(n_rows, seed)
+    sheets = generate_filtered_sheets(n_rows, n_sheets, rows_per_sheet, seed)
+    stages = []
+
+    data_dir = os.path.join(workdir, f"rows-{n_rows}-sheets-{n_sheets}-seed-{seed}")
+    fits_excel = n_rows + 1 <= EXCEL_MAX_ROWS
+    if fits_excel:
+        os.makedirs(data_dir, exist_ok=True)
+        # Workbooks are reused between invocations with the same parameters
+        if not os.path.exists(os.path.join(data_dir, 'INVENTORY.xlsx')):
+            write_inventory_workbook(os.path.join(data_dir, 'INVENTORY.xlsx'), master)
+        write_filtered_workbook(os.path.join(data_dir, 'FILTERED.xlsx'), sheets)
+
+        record, filtered = measure(
+            'capture_filtered_data',
+            lambda: capture_filtered_data(data_dir, 'FILTERED.xlsx', as_frame=True),
+            memory=memory)
+        stages.append(record)
+        cache_dir = os.path.join(data_dir, '.cache')
+        record, master = measure(
+            'capture_master_content',
+            lambda: capture_master_content('INVENTORY.xlsx', data_dir, use_cache=False),
+            memory=memory)
+        stages.append(record)
+        capture_master_content('INVENTORY.xlsx', data_dir, cache_dir=cache_dir)
+        record, _ = measure(
+            'capture_master_content[cached]',
+            lambda: capture_master_content('INVENTORY.xlsx', data_dir, cache_dir=cache_dir),
+            memory=memory)
+        stages.append(record)
+    else:
+        reason = f"{n_rows:,} rows exceed one Excel sheet"
+        stages += [skipped(name, reason) for name in
+                   ('capture_filtered_data', 'capture_master_content', 'capture_master_content[cached]')]
+        frames = [frame.assign(**{'source sheet': name}) for name, frame in sheets.items()]
+        filtered = combine_filtered_frames(frames)
+
+    metadata = filtered.set_index('Row no.').reindex(columns=METADATA_COLUMNS)
+    rows_to_use = filtered['Row no.'].tolist()
+    record, standardized = measure(
+        'standardize_data', standardize_data, lambda: (master, metadata, rows_to_use),
+        rows_in=len(rows_to_use), memory=memory)
+    stages.append(record)
+
+    os.makedirs(workdir, exist_ok=True)
+    for output_format in ('json', 'ndjson-gzip', 'parquet'):
+        path = output_writers.output_path(os.path.join(workdir, 'standardized_data'), output_format)
+        record, _ = measure(
+            f'write_standardized[{output_format}]',
+            lambda: output_writers.write_frame(standardized, path, output_format),
+            rows_in=len(standardized), memory=memory)
+        stages.append(record)
+
+    record, slim = measure('create_slim_dataframe', create_slim_dataframe, lambda: (standardized,),
+                           rows_in=len(standardized), memory=memory)
+    stages.append(record)
+    for fill in (fill_producer_type, fill_level_3_taxonomy, fill_tlr_with_zero, fill_relevance_with_zero):
+        record, slim = measure(fill.__name__, fill, lambda: (slim.copy(),), rows_in=len(slim), memory=memory)
+        stages.append(record)
+
+    return {
+        'master_rows': n_rows,
+        'sheets': n_sheets,
+        'rows_per_sheet': rows_per_sheet,
+        'selected_rows': len(rows_to_use),
+        'seed': seed,
+        'stages': stages,
+    }
+
+
+def compare(results: dict, baseline_path: str) -> None:
+    """Print per-stage wall-time ratios against an earlier result file."""
+    with open(baseline_path, 'r', encoding='utf-8') as handle:
+        baseline = json.load(handle)
+    before = {
+        (run['master_rows'], stage['stage']): stage['wall_s']
+        for run in baseline['runs'] for stage in run['stages'] if 'wall_s' in stage
+    }
+    print(f"\nCompared with {baseline_path}:")
+    for run in results['runs']:
+        for stage in run['stages']:
+            old = before.get((run['master_rows'], stage['stage']))
+            if old and 'wall_s' in stage and stage['wall_s'] > 0:
+                print(f"  {run['master_rows']:>9,} {stage['stage']:<34} "
+                      f"{old:>9.3f}s -> {stage['wall_s']:>9.3f}s ({old / stage['wall_s']:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark each pipeline stage on synthetic inventories.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Master inventory sizes (rows).')
+    parser.add_argument('--sheets', type=int, default=12, help='Curated sheets in the filtered workbook.')
+    parser.add_argument('--selected-fraction', type=float, default=0.04,
+                        help='Fraction of master rows referenced by the filtered workbook.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data.')
+    parser.add_argument('--workdir', type=str, default='./bench-data', help='Where generated workbooks are kept.')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass (timings only).')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Result JSON path (default: benchmarks/results/benchmark-<UTC timestamp>.json).')
+    parser.add_argument('--baseline', type=str, default=None, help='Earlier result JSON to compare against.')
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc)
+    results = {
+        'started_at': started.isoformat(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'runs': [
+            run_size(n_rows, args.sheets, args.selected_fraction, args.workdir, args.seed, not args.no_memory)
+            for n_rows in args.sizes
+        ],
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmark-{started.strftime('%Y%m%dT%H%M%SZ')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as handle:
+        json.dump(results, handle, indent=2)
+    print(f"Benchmark results saved to '{output}'.")
+    if args.baseline:
+        compare(results, args.baseline)
@@ -0,0 +1,207 @@
+"""
+Synthetic INVENTORY.xlsx / FILTERED.xlsx generator for benchmarks.
+
+The frames mimic the real inventory: long free-text descriptions, TX taxonomy
+strings with inconsistent separators (including `\\xa0` and the odd bare int in
+"Level Three Category"), producer names with "(Industry)"-style suffixes,
+mostly-empty functional categories and a partly-missing TRL.
+
+Workbooks are written with openpyxl's write-only mode so memory stays flat.
+A single sheet holds at most EXCEL_MAX_ROWS rows, so larger masters can only be
+generated as in-memory frames.
+
+Usage:
+    python benchmarks/synthetic.py --rows 15000 --sheets 12 --output-dir ./bench-data
+"""
+from argparse import ArgumentParser
+import os
+import sys
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inventory_processor import HEADER_ROW_OFFSET, FILTERED_HEADER_INDEX
+
+
+EXCEL_MAX_ROWS = 1_048_576  # Rows per worksheet, header included
+MASTER_COLUMNS = [
+    "Technology Name", "Tech Producer", "Description", "Existing Technology",
+    "Level One Category", "Level Two Category", "Level Three Category", "TRL",
+    "Level One Functional Category", "Level Two Functional Category",
+]
+FILTERED_COLUMNS = [
+    "Row no.", "Organization", "Technology", "Category", "TRL",
+    "Description", "Relevance (1-5)", "Notes", "Link",
+]
+TAXONOMY = {
+    "TX03: Aerospace Power and Energy Storage": {
+        "TX03.1: Power Generation and Energy Conversion": [
+            "TX03.1.1: Photovoltaic Electrical Power", "TX03.1.2: Solar Thermal Power"],
+        "TX03.2: Energy Storage": ["TX03.2.1: Electrochemical: Batteries", "TX03.2.2: Electrochemical: Fuel Cells"],
+    },
+    "TX07: Exploration Destination Systems": {
+        "TX07.1 In-Situ Resource Utilization": [
+            "TX07.1.2\xa0Resource Acquisition, Isolation, and Preparation", "TX07.1.3: Resource Processing"],
+    },
+    "TX08: Sensors and Instruments": {
+        "TX08.1: Remote Sensing Instruments and Sensors": ["TX08.1.2: Electronics", "TX08.1.3: Optical Components"],
+    },
+    "TX11: Software, Modeling, and Simulation": {
+        "TX11.2: Modeling": ["TX11.2.3: Human-System Performance Modeling", "TX11.2.4: Science Modeling"],
+    },
+}
+FUNCTIONAL = ["FN01: Communications", "FN04: Manufacturing", "FN07: Power"]
+PRODUCER_STEMS = [
+    "MicroLink Devices", "Orbital Assembly", "Southwest Research", "Redwire Space", "Astrobotic Technology",
+    "University of South Florida-Main Campus", "Massachusetts Institute of Technology", "Ames Research Center",
+    "Jet Propulsion Laboratory", "Goddard Space Flight Center", "German Space Agency", "Near Earth Asset Discovery",
+]
+PRODUCER_SUFFIXES = [
+    ", Inc. (Industry)", " LLC", " Corporation", " (Academia)", " (NASA Center)", " (Government)", "",
+]
+WORDS = (
+    "solar cell efficiency epitaxial radiation hardened spacecraft autonomous docking lidar sensor "
+    "regolith extraction manufacturing in-space assembly thermal battery propulsion electric power "
+    "mission cost reduction low temperature deep space exploration spintronic vacuum growth process "
+    "validation toolkit metrics human automation integration asteroid mining water rich prospecting"
+).split()
+
+
+def _descriptions(rng: np.random.Generator, count: int) -> list[str]:
+    """Pool of long free-text descriptions (80-250 words each)."""
+    words = np.array(WORDS)
+    return [
+        " ".join(rng.choice(words, rng.integers(80, 250))).capitalize() + "."
+        for _ in range(count)
+    ]
+
+
+def generate_master_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Build a master inventory frame with n_rows rows, as capture_master_content would return it.
+    Args:
+        n_rows (int): Number of data rows.
+        seed (int): Random seed; the same seed always gives the same frame.
+    Returns:
+        pd.DataFrame: Frame with MASTER_COLUMNS and a positional index.
+    """
+    rng = np.random.default_rng(seed)
+    level_paths = [
+        (one, two, three)
+        for one, twos in TAXONOMY.items() for two, threes in twos.items() for three in threes
+    ]
+    paths = rng.integers(0, len(level_paths), n_rows)
+    level_one = np.array([path[0] for path in level_paths], dtype=object)[paths]
+    level_two = np.array([path[1] for path in level_paths], dtype=object)[paths]
+    level_three = np.array([path[2] for path in level_paths], dtype=object)[paths]
+    # Some rows have no taxonomy at all, and a few carry a bare int in Level Three
+    untagged = rng.random(n_rows) < 0.1
+    level_one[untagged] = np.nan
+    level_two[untagged] = np.nan
+    level_three[untagged] = np.nan
+    level_three[rng.random(n_rows) < 0.002] = 9
+
+    producers = np.array([stem + suffix for stem in PRODUCER_STEMS for suffix in PRODUCER_SUFFIXES], dtype=object)
+    trl = rng.integers(1, 10, n_rows).astype(float)
+    trl[rng.random(n_rows) < 0.25] = np.nan
+    functional = np.array(FUNCTIONAL, dtype=object)[rng.integers(0, len(FUNCTIONAL), n_rows)]
+    functional[rng.random(n_rows) < 0.9] = np.nan
+    descriptions = np.array(_descriptions(rng, min(n_rows, 2_000)), dtype=object)
+
+    return pd.DataFrame({
+        "Technology Name": [f"Synthetic Technology {i}" for i in range(n_rows)],
+        "Tech Producer": producers[rng.integers(0, len(producers), n_rows)],
+        "Description": descriptions[rng.integers(0, len(descriptions), n_rows)],
+        "Existing Technology": np.where(rng.random(n_rows) < 0.95, "Yes", "No"),
+        "Level One Category": level_one,
+        "Level Two Category": level_two,
+        "Level Three Category": level_three,
+        "TRL": trl,
+        "Level One Functional Category": functional,
+        "Level Two Functional Category": np.nan,
+    })
+
+
+def generate_filtered_sheets(master_rows: int, n_sheets: int, rows_per_sheet: int,
+                             seed: int = 0) -> dict[str, pd.DataFrame]:
+    """
+    Build the curated sheets of a FILTERED workbook referencing rows of a master of master_rows rows.
+    Args:
+        master_rows (int): Number of data rows in the master.
+        n_sheets (int): Number of curated sheets.
+        rows_per_sheet (int): Row references per sheet.
+        seed (int): Random seed.
+    Returns:
+        dict[str, pd.DataFrame]: Sheet name -> frame with FILTERED_COLUMNS.
+    """
+    rng = np.random.default_rng(seed + 1)
+    # Row numbers are drawn without replacement across all sheets, so no row is curated twice
+    count = min(rows_per_sheet, master_rows // max(n_sheets, 1))
+    all_row_nos = rng.choice(master_rows, count * n_sheets, replace=False) + HEADER_ROW_OFFSET
+    sheets = {}
+    for i in range(n_sheets):
+        row_nos = all_row_nos[i * count:(i + 1) * count]
+        relevance = rng.integers(1, 6, count).astype(float)
+        relevance[rng.random(count) < 0.05] = np.nan
+        sheets[f"Topic {i + 1}"] = pd.DataFrame({
+            "Row no.": row_nos,
+            "Organization": "Org",
+            "Technology": "Tech",
+            "Category": "Cat",
+            "TRL": rng.integers(1, 10, count),
+            "Description": "See master",
+            "Relevance (1-5)": relevance,
+            "Notes": np.where(rng.random(count) < 0.4, "Relevant to ISAM", None),
+            "Link": np.where(rng.random(count) < 0.2, "https://techport.nasa.gov/", None),
+        })
+    return sheets
+
+
+def _cell(value):
+    return None if isinstance(value, float) and np.isnan(value) else value
+
+
+def write_inventory_workbook(path: str, master: pd.DataFrame, sheet_name: str = "Inventory") -> None:
+    """Write a master frame as INVENTORY.xlsx (write-only mode)."""
+    if len(master) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"{len(master):,} rows do not fit in one Excel sheet ({EXCEL_MAX_ROWS:,} max).")
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append(list(master.columns))
+    for row in master.itertuples(index=False, name=None):
+        ws.append([_cell(value) for value in row])
+    wb.save(path)
+
+
+def write_filtered_workbook(path: str, sheets: dict[str, pd.DataFrame]) -> None:
+    """Write curated sheets as FILTERED.xlsx, with the header on the row capture_filtered_data expects."""
+    wb = Workbook(write_only=True)
+    for name, frame in sheets.items():
+        ws = wb.create_sheet(name)
+        ws.append([f"{name} - curated selections"])
+        for _ in range(FILTERED_HEADER_INDEX - 1):
+            ws.append([])
+        ws.append(list(frame.columns))
+        for row in frame.itertuples(index=False, name=None):
+            ws.append([_cell(value) for value in row])
+    gaps = wb.create_sheet("Technology Gaps")
+    gaps.append(["Free-form gap notes; skipped by the processor"])
+    wb.save(path)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Generate synthetic INVENTORY.xlsx and FILTERED.xlsx workbooks.")
+    parser.add_argument('--rows', type=int, default=15_000, help='Master inventory rows.')
+    parser.add_argument('--sheets', type=int, default=12, help='Curated sheets in the filtered workbook.')
+    parser.add_argument('--rows-per-sheet', type=int, default=50, help='Row references per curated sheet.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+    parser.add_argument('--output-dir', type=str, default='./bench-data', help='Directory to write the workbooks to.')
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    master = generate_master_frame(args.rows, args.seed)
+    write_inventory_workbook(os.path.join(args.output_dir, 'INVENTORY.xlsx'), master)
+    write_filtered_workbook(os.path.join(args.output_dir, 'FILTERED.xlsx'),
+                            generate_filtered_sheets(args.rows, args.sheets, args.rows_per_sheet, args.seed))
+    print(f"Synthetic workbooks written to '{args.output_dir}'.")
@@ -0,0 +1,157 @@
+"""
+Out-of-core mode: process a master inventory too large to load into memory.
+
+capture_master_content reads the whole sheet into one frame. run_chunked instead
+streams the master with iter_master_chunks, chunk_size sheet rows at a time, and
+for each batch:
+
+- joins it against the filtered metadata with standardize_data (the batch is
+  indexed by the real 'Row no.', so row numbers stay absolute);
+- runs create_slim_dataframe and the fill_* steps on the result;
+- appends the rows to the output through a FrameWriter.
+
+Only the filtered metadata and one batch are held in memory, so peak memory is set
+by chunk_size rather than by the size of the master. Every step works row by row
+and standardize_data keeps master order, so the output is the same as the
+in-memory pipeline's. Reading stops after the highest row the filtered workbook
+refers to.
+
+The standardized rows keep the master's own values, so their dtypes must not depend
+on which rows share a batch ('TRL' is float64 over the whole master but int64 in a
+batch without blanks). With --standardized, the master is first streamed once to
+find each column's dtype (master_column_dtypes, cached until the workbook changes),
+and every batch is built with those dtypes. The slim steps normalize their columns,
+so the slim output does not need this pass.
+
+Usage:
+    python chunked.py --data-dir ./data --output ./data/slim_data --chunk-size 50000 [--save-type ndjson]
+    python chunked.py --standardized --output ./data/standardized_data    # stop after standardizing
+"""
+from argparse import ArgumentParser
+from typing import Any, Iterator, Optional
+import pandas as pd
+
+from inventory_processor import (
+    DATA_DIR, FILTERED_PATH, INVENTORY_PATH, CHUNK_SIZE, DUPLICATE_POLICIES, DUPLICATE_POLICY, WORKERS,
+    capture_rows_and_metadata, iter_master_chunks, master_column_dtypes, rename_output_columns, standardize_data
+)
+from output_writers import OUTPUT_FORMATS, BATCH_SIZE, output_path, write_frame
+from profiling import profiled_stage, stage, add_profiling_arguments, start_from_args, finish_from_args
+from scrape_standard_for_appendix import SLIM_PATH, build_slim_dataframe, load_producer_keywords
+
+
+def iter_chunked_output(
+    metadata: pd.DataFrame,
+    rows_to_use: list[int],
+    inventory_path: str = INVENTORY_PATH,
+    data_dir: str = DATA_DIR,
+    chunk_size: int = CHUNK_SIZE,
+    slim: bool = True,
+    keywords: Optional[dict[str, list[str]]] = None,
+    dtypes: Optional[list[Any]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Standardized (and, with `slim`, slimmed and filled) rows, one frame per master batch.
+    Args:
+        metadata (pd.DataFrame): Filtered metadata indexed by row number (capture_rows_and_metadata).
+        rows_to_use (list[int]): Row numbers to standardize.
+        inventory_path (str): Path to the master inventory file.
+        data_dir (str): Directory where the data files are stored.
+        chunk_size (int): Master rows read per batch.
+        slim (bool): Also run create_slim_dataframe and the fill_* steps.
+        keywords (Optional[dict[str, list[str]]]): Producer type keywords (see fill_producer_type).
+        dtypes (Optional[list[Any]]): Master column dtypes every batch is built with (see
+            master_column_dtypes); needed for standardized rows that match the in-memory pipeline's.
+    Returns:
+        Iterator[pd.DataFrame]: Output batches, in master order. If no row is selected a single
+            empty frame is yielded, so the output still gets its header.
+    """
+    produced = False
+    for chunk in iter_master_chunks(inventory_path, data_dir, chunk_size=chunk_size, rows_to_use=rows_to_use,
+                                    dtypes=dtypes):
+        with stage('standardize_chunk', rows_in=len(chunk)):
+            standardized = standardize_data(chunk, metadata, rows_to_use)
+        if standardized.empty:
+            continue
+        produced = True
+        standardized = rename_output_columns(standardized)
+        yield build_slim_dataframe(standardized, keywords) if slim else standardized
+    if not produced and slim:
+        yield build_slim_dataframe(pd.DataFrame(), keywords)
+
+
+@profiled_stage()
+def run_chunked(
+    output_file: str,
+    output_type: str = 'json',
+    data_dir: str = DATA_DIR,
+    filtered_path: str = FILTERED_PATH,
+    inventory_path: str = INVENTORY_PATH,
+    chunk_size: int = CHUNK_SIZE,
+    slim: bool = True,
+    keywords: Optional[dict[str, list[str]]] = None,
+    duplicate_policy: str = DUPLICATE_POLICY,
+    workers: int = WORKERS,
+    batch_size: int = BATCH_SIZE,
+    cache_dir: Optional[str] = None,
+    use_cache: bool = True
+) -> int:
+    """
+    Stream the master in batches and append each batch's output rows to output_file.
+    Args:
+        output_file (str): Output path, extension included (see output_path).
+        output_type (str): One of OUTPUT_FORMATS; 'excel' collects every row before writing,
+            so use 'excel-stream' to keep memory bounded.
+        data_dir (str): Directory where the data files are stored.
+        filtered_path (str): Path to the filtered data file.
+        inventory_path (str): Path to the master inventory file.
+        chunk_size (int): Master rows read per batch.
+        slim (bool): Write the slim appendix rows; False writes the standardized rows.
+        keywords (Optional[dict[str, list[str]]]): Producer type keywords (see fill_producer_type).
+        duplicate_policy (str): How to resolve a Row no. listed on more than one sheet.
+        workers (int): Processes used to parse the filtered sheets.
+        batch_size (int): Rows serialized at a time when writing.
+        cache_dir (Optional[str]): Directory caching the master column dtypes (standardized output only);
+            defaults to <data_dir>/.cache.
+        use_cache (bool): Set to False to always recompute the master column dtypes.
+    Returns:
+        int: Number of rows written.
+    """
+    metadata, rows_to_use = capture_rows_and_metadata(
+        data_dir, filtered_path, as_frame=True, duplicate_policy=duplicate_policy, workers=workers
+    )
+    dtypes = None if slim else master_column_dtypes(inventory_path, data_dir, cache_dir=cache_dir, use_cache=use_cache)
+    batches = iter_chunked_output(metadata, rows_to_use, inventory_path, data_dir, chunk_size, slim, keywords, dtypes)
+    return write_frame(batches, output_file, output_type, batch_size)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Process a master inventory that does not fit in memory, batch by batch.")
+    parser.add_argument('--data-dir', type=str, default=DATA_DIR, help='Directory where the data files are stored.')
+    parser.add_argument('--inventory-name', type=str, default=INVENTORY_PATH, help='Name of the master inventory file.')
+    parser.add_argument('--filtered-name', type=str, default=FILTERED_PATH, help='Name of the filtered data file.')
+    parser.add_argument('--output', type=str, default=SLIM_PATH, help='Path of the output, without extension.')
+    parser.add_argument('--save-type', type=str, choices=list(OUTPUT_FORMATS), default='json', help='Output format.')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Master rows read and processed at a time.')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows serialized at a time when writing.')
+    parser.add_argument('--standardized', action='store_true',
+                        help='Write the standardized rows instead of the slim appendix rows.')
+    parser.add_argument('--duplicate-policy', type=str, choices=DUPLICATE_POLICIES, default=DUPLICATE_POLICY,
+                        help='Which entry to keep when a Row no. appears on more than one filtered sheet.')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='Processes used to parse filtered sheets.')
+    parser.add_argument('--producer-keywords', type=str, default=None,
+                        help='JSON file mapping producer types to keywords, in match priority order.')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for the cached master column dtypes (default: <data-dir>/.cache).')
+    parser.add_argument('--no-cache', action='store_true', help='Always recompute the master column dtypes.')
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+
+    keywords = load_producer_keywords(args.producer_keywords) if args.producer_keywords else None
+    path = output_path(args.output, args.save_type)
+    start_from_args(args)
+    rows = run_chunked(path, args.save_type, args.data_dir, args.filtered_name, args.inventory_name,
+                       args.chunk_size, not args.standardized, keywords, args.duplicate_policy, args.workers,
+                       args.batch_size, args.cache_dir, not args.no_cache)
+    print(f"Chunked processing complete: {rows} rows saved to '{path}'.")
+    finish_from_args(args)
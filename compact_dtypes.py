@@ -0,0 +1,117 @@
+"""
+Memory-compact dtypes for the master inventory.
+
+`pd.read_excel` gives every text column a generic string or object dtype and reads
+TRL as float64, so each repeated taxonomy label or producer name is stored once per
+row. compact_frame re-types a frame column by column:
+
+- small integer columns with a known range (TRL 0-9, Relevance 1-5) become the
+  nullable Int8, if every value is a whole number;
+- text columns with few distinct values (the Level One/Two/Three categories, the
+  functional categories, 'Existing Technology', 'Tech Producer', ...) become
+  categoricals. Mixed columns keep their values, so the odd bare int in
+  'Level Three Category' is still an int;
+- the remaining all-text columns (Description, Technology Name) use the Arrow-backed
+  string dtype when pyarrow is installed.
+
+Columns whose values would not survive the conversion are left alone, so the
+compact frame holds the same values as the original. memory_report compares the
+per-column memory of the two frames.
+"""
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+
+SMALL_INT_COLUMNS = ('TRL', 'Relevance (1-5)')  # Columns stored as nullable Int8 when lossless
+CATEGORY_MAX_RATIO = 0.5  # Text columns with at most this share of distinct values become categoricals
+
+
+def _arrow_string_dtype() -> Optional[pd.StringDtype]:
+    """Arrow-backed string dtype with NaN as missing value, or None without pyarrow."""
+    try:
+        import pyarrow  # noqa: F401 - optional dependency
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    except (ImportError, TypeError):
+        # TypeError: pandas before 2.3 has no na_value argument
+        return None
+
+
+def _small_int(series: pd.Series) -> Optional[pd.Series]:
+    """The column as Int8 if every non-missing value is a whole number in Int8's range."""
+    numeric = pd.to_numeric(series, errors='coerce')
+    if numeric.notna().sum() != series.notna().sum():
+        return None
+    values = numeric.dropna()
+    if not ((values % 1 == 0) & values.between(-128, 127)).all():
+        return None
+    return numeric.astype('Int8')
+
+
+def _is_text(series: pd.Series) -> bool:
+    return pd.api.types.is_string_dtype(series) or series.dtype == object
+
+
+def compact_frame(df: pd.DataFrame, category_max_ratio: float = CATEGORY_MAX_RATIO,
+                  small_int_columns: tuple[str, ...] = SMALL_INT_COLUMNS) -> pd.DataFrame:
+    """
+    Re-type the columns of a frame to use less memory, keeping its values.
+    Args:
+        df (pd.DataFrame): The frame, e.g. the master inventory from capture_master_content.
+        category_max_ratio (float): Text columns whose distinct non-missing values are at most
+            this fraction of the rows become categoricals.
+        small_int_columns (tuple[str, ...]): Columns to store as nullable Int8 when lossless.
+    Returns:
+        pd.DataFrame: A new frame with the same index, columns and values.
+    """
+    text_dtype = _arrow_string_dtype()
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if col in small_int_columns and not pd.api.types.is_bool_dtype(series):
+            compact = _small_int(series)
+            if compact is not None:
+                columns[col] = compact
+                continue
+        if not _is_text(series) or len(series) == 0:
+            columns[col] = series
+        elif series.nunique(dropna=True) <= len(series) * category_max_ratio:
+            columns[col] = series.astype('category')
+        elif text_dtype is not None and pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+            columns[col] = series.astype(text_dtype)
+        else:
+            columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-column memory of a frame before and after compact_frame.
+    Args:
+        before (pd.DataFrame): The original frame.
+        after (pd.DataFrame): The compacted frame.
+    Returns:
+        pd.DataFrame: One row per column plus a 'Total' row, with the dtypes and sizes in MB.
+    """
+    before_mb = before.memory_usage(deep=True, index=False) / 2**20
+    after_mb = after.memory_usage(deep=True, index=False) / 2**20
+    report = pd.DataFrame({
+        'dtype before': before.dtypes.astype(str),
+        'dtype after': after.dtypes.astype(str),
+        'MB before': before_mb,
+        'MB after': after_mb,
+    })
+    report.loc['Total'] = ['', '', before_mb.sum(), after_mb.sum()]
+    return report
+
+
+def format_memory_report(report: pd.DataFrame) -> str:
+    """Human-readable table of a memory_report."""
+    header = f"{'Column':<32} {'Before':<10} {'After':<16} {'MB before':>10} {'MB after':>10}"
+    lines = [header, '-' * len(header)]
+    for col, row in report.iterrows():
+        lines.append(
+            f"{str(col)[:32]:<32} {row['dtype before'][:10]:<10} {row['dtype after'][:16]:<16} "
+            f"{row['MB before']:>10.2f} {row['MB after']:>10.2f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,235 @@
+"""
+Incremental re-processing of the filtered workbook.
+
+Analysts usually edit one or two sheets of FILTERED.xlsx between runs, so instead
+of re-parsing every sheet and regenerating the whole standardized output, this
+module keeps per-run state in the cache directory:
+
+- the fingerprint of each filtered sheet (see inventory_cache.sheet_fingerprints)
+  and the rows extracted from it, stored content-addressed by that fingerprint;
+- the SHA-256 of the master inventory the last output was built from;
+- the metadata and standardized frame of the last run, indexed by 'Row no.'.
+
+On the next run only sheets whose fingerprint changed are parsed. The previous
+standardized frame is then patched: rows whose number left the selection are
+dropped, new rows are taken from the master and rows whose metadata changed get
+their metadata columns rewritten. A change to the master inventory (or to the
+duplicate policy) triggers a full rebuild.
+"""
+from dataclasses import dataclass, field
+from typing import Optional
+import hashlib
+import json
+import os
+import pandas as pd
+
+from inventory_cache import content_hash, default_cache_dir, sheet_fingerprints
+from inventory_processor import (
+    DATA_DIR, FILTERED_PATH, INVENTORY_PATH, METADATA_COLUMNS, SHEETS_TO_SKIP, FILTERED_HEADER_INDEX,
+    _read_filtered_sheet, combine_filtered_frames, capture_master_content, standardize_data
+)
+
+
+STATE_VERSION = 1  # Bump when the stored state layout changes
+
+
+@dataclass
+class IncrementalReport:
+    """What an incremental run re-parsed and which output rows it changed."""
+    reparsed_sheets: list[str] = field(default_factory=list)
+    reused_sheets: list[str] = field(default_factory=list)
+    removed_sheets: list[str] = field(default_factory=list)
+    full_rebuild: bool = False
+    rebuild_reason: str = ''
+    added_rows: list[int] = field(default_factory=list)
+    removed_rows: list[int] = field(default_factory=list)
+    updated_rows: list[int] = field(default_factory=list)
+
+    def summary(self) -> str:
+        """Human-readable summary of the run."""
+        lines = [
+            f"Re-parsed sheets: {', '.join(self.reparsed_sheets) or 'none'}",
+            f"Reused sheets: {len(self.reused_sheets)}",
+        ]
+        if self.removed_sheets:
+            lines.append(f"Removed sheets: {', '.join(self.removed_sheets)}")
+        if self.full_rebuild:
+            lines.append(f"Full rebuild: {self.rebuild_reason}")
+        else:
+            lines.append(
+                f"Rows added: {_format_rows(self.added_rows)}; "
+                f"removed: {_format_rows(self.removed_rows)}; "
+                f"updated: {_format_rows(self.updated_rows)}"
+            )
+        return "\n".join(lines)
+
+
+def _format_rows(rows: list[int], limit: int = 20) -> str:
+    if not rows:
+        return '0'
+    shown = ', '.join(str(row) for row in rows[:limit])
+    return f"{len(rows)} ({shown}{', ...' if len(rows) > limit else ''})"
+
+
+def _state_dir(filtered_file: str, cache_dir: str) -> str:
+    slug = hashlib.sha1(os.path.abspath(filtered_file).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, 'incremental', f"{os.path.basename(filtered_file)}.{slug}")
+
+
+def _load_state(state_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(state_dir, 'state.json'), 'r', encoding='utf-8') as handle:
+            state = json.load(handle)
+        if state.get('version') != STATE_VERSION:
+            return None
+        state['metadata'] = pd.read_pickle(os.path.join(state_dir, 'metadata.pkl'))
+        state['standardized'] = pd.read_pickle(os.path.join(state_dir, 'standardized.pkl'))
+        return state
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _save_state(state_dir: str, state: dict, metadata: pd.DataFrame, standardized: pd.DataFrame) -> None:
+    metadata.to_pickle(os.path.join(state_dir, 'metadata.pkl'))
+    standardized.to_pickle(os.path.join(state_dir, 'standardized.pkl'))
+    tmp_path = os.path.join(state_dir, 'state.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        json.dump(state, handle, indent=2)
+    os.replace(tmp_path, os.path.join(state_dir, 'state.json'))
+
+
+def _capture_sheets(filtered_file: str, filtered_path: str, state_dir: str, previous: Optional[dict],
+                    report: IncrementalReport) -> tuple[list[pd.DataFrame], dict[str, str]]:
+    """Load unchanged sheets from the state directory and parse only the changed ones."""
+    fingerprints = {
+        sheet: digest for sheet, digest in sheet_fingerprints(filtered_file).items()
+        if sheet not in SHEETS_TO_SKIP
+    }
+    sheets_dir = os.path.join(state_dir, 'sheets')
+    os.makedirs(sheets_dir, exist_ok=True)
+    xls = None
+    frames = []
+    for sheet, digest in fingerprints.items():
+        sheet_path = os.path.join(sheets_dir, f"{digest}.pkl")
+        if os.path.exists(sheet_path):
+            frame = pd.read_pickle(sheet_path)
+            # Identical content may have been moved to a sheet with another name
+            frame['source sheet'] = sheet
+            report.reused_sheets.append(sheet)
+        else:
+            if xls is None:
+                xls = pd.ExcelFile(filtered_file)
+            frame = _read_filtered_sheet(xls, sheet, filtered_path)
+            frame.to_pickle(sheet_path)
+            report.reparsed_sheets.append(sheet)
+        frames.append(frame)
+    if xls is not None:
+        xls.close()
+
+    if previous is not None:
+        report.removed_sheets = [sheet for sheet in previous['sheets'] if sheet not in fingerprints]
+        # Drop snapshots no longer referenced by any sheet
+        live = {f"{digest}.pkl" for digest in fingerprints.values()}
+        for name in os.listdir(sheets_dir):
+            if name not in live:
+                os.remove(os.path.join(sheets_dir, name))
+    return frames, fingerprints
+
+
+def _changed_rows(previous: pd.DataFrame, current: pd.DataFrame) -> list[int]:
+    """Row numbers present in both metadata frames whose values differ (NaN == NaN)."""
+    common = previous.index.intersection(current.index, sort=False)
+    before = previous.reindex(index=common, columns=current.columns).astype(object)
+    after = current.loc[common].astype(object)
+    differs = ~((before == after) | (before.isna() & after.isna())).all(axis=1)
+    return sorted(int(row) for row in common[differs.to_numpy()])
+
+
+def run_incremental(
+    data_dir: str = DATA_DIR,
+    filtered_path: str = FILTERED_PATH,
+    inventory_path: str = INVENTORY_PATH,
+    cache_dir: Optional[str] = None,
+    duplicate_policy: str = 'last',
+    use_cache: bool = True
+) -> tuple[pd.DataFrame, IncrementalReport]:
+    """
+    Produce the standardized frame, re-using as much of the previous run as possible.
+    Args:
+        data_dir (str): Directory where the data files are stored.
+        filtered_path (str): Path to the filtered data file.
+        inventory_path (str): Path to the master inventory file.
+        cache_dir (Optional[str]): Directory holding the incremental state and the master cache;
+            defaults to <data_dir>/.cache.
+        duplicate_policy (str): 'first', 'last', 'relevance' or 'error'.
+        use_cache (bool): Whether the master inventory may be loaded from its snapshot cache.
+    Returns:
+        tuple:
+            - pd.DataFrame: The standardized frame, identical to a full run of standardize_data.
+            - IncrementalReport: What was re-parsed and which rows changed.
+    """
+    filtered_file = os.path.join(data_dir, filtered_path)
+    inventory_file = os.path.join(data_dir, inventory_path)
+    cache_dir = default_cache_dir(data_dir) if cache_dir is None else cache_dir
+    state_dir = _state_dir(filtered_file, cache_dir)
+    previous = _load_state(state_dir)
+    report = IncrementalReport()
+
+    frames, fingerprints = _capture_sheets(filtered_file, filtered_path, state_dir, previous, report)
+    filtered = combine_filtered_frames(frames, duplicate_policy)
+    metadata = filtered.set_index('Row no.').reindex(columns=METADATA_COLUMNS)
+    rows_to_use = filtered['Row no.'].tolist()
+    master_hash = content_hash(inventory_file)
+    settings = {'duplicate_policy': duplicate_policy, 'header_index': FILTERED_HEADER_INDEX}
+
+    if previous is None:
+        report.full_rebuild, report.rebuild_reason = True, 'no previous state'
+    elif previous['master_sha256'] != master_hash:
+        report.full_rebuild, report.rebuild_reason = True, 'master inventory changed'
+    elif previous['settings'] != settings:
+        report.full_rebuild, report.rebuild_reason = True, 'settings changed'
+
+    def load_master() -> pd.DataFrame:
+        return capture_master_content(inventory_path, data_dir, cache_dir=cache_dir, use_cache=use_cache)
+
+    if report.full_rebuild:
+        standardized = standardize_data(load_master(), metadata, rows_to_use, keep_row_numbers=True)
+    else:
+        old_metadata, standardized = previous['metadata'], previous['standardized']
+        report.added_rows = sorted(int(row) for row in metadata.index.difference(old_metadata.index))
+        report.removed_rows = sorted(int(row) for row in old_metadata.index.difference(metadata.index))
+        report.updated_rows = _changed_rows(old_metadata, metadata)
+        if report.removed_rows or report.added_rows or report.updated_rows:
+            standardized = _patch(standardized, metadata, report, load_master)
+
+    os.makedirs(state_dir, exist_ok=True)
+    _save_state(state_dir, {
+        'version': STATE_VERSION,
+        'sheets': fingerprints,
+        'master_sha256': master_hash,
+        'settings': settings,
+    }, metadata, standardized)
+    return standardized.reset_index(drop=True), report
+
+
+def _patch(standardized: pd.DataFrame, metadata: pd.DataFrame, report: IncrementalReport,
+           load_master) -> pd.DataFrame:
+    """
+    Patch the previous standardized frame (indexed by 'Row no.') with the row changes in `report`.
+    Updated rows only have their metadata columns rewritten; the master is loaded only for added rows.
+    """
+    kept = standardized.drop(index=report.removed_rows, errors='ignore')
+    updated = kept.index.intersection(report.updated_rows)
+    if len(updated):
+        columns = list(metadata.columns)
+        kept = kept.astype({col: object for col in columns if col in kept.columns})
+        kept.loc[updated, columns] = metadata.loc[updated, columns].astype(object)
+
+    patch = pd.DataFrame()
+    if report.added_rows:
+        patch = standardize_data(load_master(), metadata, report.added_rows, keep_row_numbers=True)
+    parts = [part for part in (kept, patch) if not part.empty]
+    if not parts:
+        return pd.DataFrame()
+    columns = list(kept.columns) + [col for col in patch.columns if col not in kept.columns]
+    return pd.concat(parts).sort_index().reindex(columns=columns).infer_objects()
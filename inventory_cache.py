@@ -0,0 +1,323 @@
+"""
+On-disk cache of parsed Excel sheets.
+
+Parsing the 15k-row "Inventory" sheet with openpyxl dominates the runtime of
+every pipeline run, so the parsed frame is snapshotted once into a columnar
+file in a cache directory and re-used until the workbook changes.
+
+The cache lives in a '.cache' directory inside the data directory (default_cache_dir),
+so it follows --data-dir rather than the working directory.
+
+Each snapshot is keyed by the workbook's absolute path and sheet name, and is
+validated against the workbook's mtime, size and SHA-256 content hash:
+- mtime and size unchanged: the snapshot is trusted without hashing.
+- mtime or size changed: the file is hashed; if the hash still matches (e.g. the
+  file was only touched or copied) the stored stat is refreshed and the snapshot
+  re-used, otherwise it is discarded.
+
+Snapshots are written as Arrow IPC (Feather) files and read memory-mapped when
+pyarrow is installed. With pandas' Arrow-backed string dtype (the default from
+pandas 3) the string columns of the loaded frame are views on the mapped file, so
+only the numeric columns and any object columns are copied into memory; with
+object strings (older pandas) every column is copied and the mapping only saves
+the read. Object columns mixing strings and numbers (the master has
+e.g. a bare `9` in "Level Three Category") are stored as a string column plus a
+type-code column so they round-trip exactly. Without pyarrow, or for values
+Arrow can't represent, the frame is pickled instead.
+"""
+from typing import Any, Dict, Optional
+from xml.etree import ElementTree
+import hashlib
+import json
+import os
+import re
+import zipfile
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - exercised only without pyarrow
+    pa = None
+    feather = None
+
+
+CACHE_SUBDIR = '.cache'  # Cache directory inside a data directory
+CACHE_VERSION = 1  # Bump when the snapshot layout changes
+HASH_CHUNK_SIZE = 1 << 20
+
+_SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+_PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_SHARED_STRING_REF = re.compile(rb'<c\b[^>]*\bt="s"[^>]*>\s*<v>(\d+)</v>')
+
+_KIND_PREFIX = '__kind__:'
+_KIND_NULL, _KIND_STR, _KIND_INT, _KIND_FLOAT, _KIND_BOOL = range(5)
+
+
+def default_cache_dir(data_dir: str) -> str:
+    """The cache directory of a data directory: '<data_dir>/.cache'."""
+    return os.path.join(data_dir, CACHE_SUBDIR)
+
+
+def file_fingerprint(path: str, with_hash: bool = True) -> Dict[str, Any]:
+    """
+    Fingerprint a file by path, modification time, size and (optionally) content hash.
+    Args:
+        path (str): Path to the file.
+        with_hash (bool): Whether to compute the SHA-256 of the file contents.
+    Returns:
+        Dict[str, Any]: {'path', 'mtime_ns', 'size', 'sha256'}; 'sha256' is None
+        when with_hash is False.
+    """
+    stat = os.stat(path)
+    return {
+        'path': os.path.abspath(path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': content_hash(path) if with_hash else None,
+    }
+
+
+def content_hash(path: str) -> str:
+    """
+    Compute the SHA-256 hex digest of a file, reading it in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def workbook_parts(archive: zipfile.ZipFile) -> tuple[Dict[str, str], str]:
+    """
+    Locate the parts of an open .xlsx archive.
+    Returns:
+        tuple: Sheet name -> worksheet XML part, in workbook sheet order, and the shared strings part.
+    """
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {}
+    shared_strings_part = 'xl/sharedStrings.xml'
+    for rel in rels.iter(_PACKAGE_REL_NS + 'Relationship'):
+        target = rel.get('Target', '')
+        target = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+        targets[rel.get('Id')] = target
+        if rel.get('Type', '').endswith('/sharedStrings'):
+            shared_strings_part = target
+    sheets = {sheet.get('name'): targets[sheet.get(_REL_ID)] for sheet in workbook.iter(_SHEET_NS + 'sheet')}
+    return sheets, shared_strings_part
+
+
+def sheet_fingerprints(path: str) -> Dict[str, str]:
+    """
+    Fingerprint each sheet of an .xlsx workbook without parsing its cells.
+
+    A sheet's fingerprint is the SHA-256 of its worksheet XML plus the shared strings
+    it references, so editing one sheet leaves the other sheets' fingerprints unchanged
+    even though Excel rewrites the workbook-wide shared string table.
+
+    Args:
+        path (str): Path to the workbook.
+    Returns:
+        Dict[str, str]: Sheet name -> hex digest, in workbook sheet order.
+    """
+    with zipfile.ZipFile(path) as archive:
+        sheet_parts, shared_strings_part = workbook_parts(archive)
+        shared_strings: list[bytes] = []
+        if shared_strings_part in archive.namelist():
+            table = ElementTree.fromstring(archive.read(shared_strings_part))
+            shared_strings = [
+                ''.join(node.text or '' for node in item.iter(_SHEET_NS + 't')).encode('utf-8')
+                for item in table.iter(_SHEET_NS + 'si')
+            ]
+
+        fingerprints = {}
+        for name, part in sheet_parts.items():
+            xml = archive.read(part)
+            digest = hashlib.sha256(xml)
+            for ref in _SHARED_STRING_REF.findall(xml):
+                digest.update(b'\x00' + shared_strings[int(ref)])
+            fingerprints[name] = digest.hexdigest()
+    return fingerprints
+
+
+def _entry_paths(source_path: str, cache_dir: str, key: str) -> tuple[str, str]:
+    """Return the manifest path and the data path stem for a cache entry."""
+    ident = f"{os.path.abspath(source_path)}::{key}::v{CACHE_VERSION}"
+    slug = hashlib.sha1(ident.encode('utf-8')).hexdigest()[:16]
+    stem = os.path.join(cache_dir, f"{os.path.basename(source_path)}.{slug}")
+    return stem + '.json', stem
+
+
+def _read_manifest(manifest_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(manifest_path: str, manifest: Dict[str, Any]) -> None:
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def fingerprint_matches(path: str, fingerprint: Optional[Dict[str, Any]]) -> bool:
+    """
+    Whether a file still matches a fingerprint from file_fingerprint.
+
+    Unchanged mtime and size are trusted without reading the file. Otherwise the file
+    matches only if its size and SHA-256 content hash are unchanged (e.g. it was touched).
+    Args:
+        path (str): Path to the file.
+        fingerprint (Optional[Dict[str, Any]]): The stored fingerprint; None never matches.
+    Returns:
+        bool: True if the file's content is unchanged.
+    """
+    if not fingerprint or not os.path.exists(path):
+        return False
+    current = file_fingerprint(path, with_hash=False)
+    if current['mtime_ns'] == fingerprint.get('mtime_ns') and current['size'] == fingerprint.get('size'):
+        return True
+    return current['size'] == fingerprint.get('size') and content_hash(path) == fingerprint.get('sha256')
+
+
+def _is_current(source_path: str, manifest: Dict[str, Any], manifest_path: str) -> bool:
+    """Check a manifest against the source file, refreshing its stat if only that changed."""
+    stored = manifest.get('fingerprint')
+    if not fingerprint_matches(source_path, stored):
+        return False
+    mtime_ns = os.stat(source_path).st_mtime_ns
+    if mtime_ns != stored.get('mtime_ns'):
+        # Same content under a new mtime: remember the new stat so the next check is cheap
+        stored.update(mtime_ns=mtime_ns)
+        _write_manifest(manifest_path, manifest)
+    return True
+
+
+def _kind_of(value: Any) -> int:
+    if value is None or (isinstance(value, float) and value != value):
+        return _KIND_NULL
+    if isinstance(value, str):
+        return _KIND_STR
+    if isinstance(value, bool):
+        return _KIND_BOOL
+    if isinstance(value, int):
+        return _KIND_INT
+    if isinstance(value, float):
+        return _KIND_FLOAT
+    raise TypeError(f"Unsupported cell type {type(value).__name__}")
+
+
+def _encode_mixed_columns(df: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Split object columns that mix strings and numbers into a string column plus
+    an int8 type-code column, so Arrow can store them.
+    """
+    encoded = {}
+    mixed = []
+    for col in df.columns:
+        series = df[col]
+        if series.dtype != object:
+            encoded[col] = series
+            continue
+        kinds = series.map(_kind_of).to_numpy(dtype='int8')
+        non_null = kinds[kinds != _KIND_NULL]
+        if non_null.size == 0 or (non_null == _KIND_STR).all():
+            encoded[col] = series
+            continue
+        mixed.append(col)
+        encoded[col] = series.map(lambda v: None if _kind_of(v) == _KIND_NULL else str(v)).astype(object)
+        encoded[_KIND_PREFIX + col] = pd.Series(kinds, index=df.index)
+    return pd.DataFrame(encoded, index=df.index), mixed
+
+
+def _decode_mixed_columns(df: pd.DataFrame, mixed: list[str]) -> pd.DataFrame:
+    """Inverse of _encode_mixed_columns."""
+    for col in mixed:
+        kinds = df.pop(_KIND_PREFIX + col).to_numpy()
+        text = df[col].to_numpy(dtype=object)
+        values = [
+            float('nan') if kind == _KIND_NULL else
+            text[i] if kind == _KIND_STR else
+            int(text[i]) if kind == _KIND_INT else
+            float(text[i]) if kind == _KIND_FLOAT else
+            text[i] == 'True'
+            for i, kind in enumerate(kinds)
+        ]
+        df[col] = pd.Series(values, index=df.index, dtype=object)
+    return df
+
+
+def load_cached_frame(source_path: str, cache_dir: Optional[str] = None, key: str = '') -> Optional[pd.DataFrame]:
+    """
+    Load the cached snapshot of a parsed source file, if one exists and is current.
+    Args:
+        source_path (str): Path to the source workbook.
+        cache_dir (Optional[str]): Directory holding the cache; defaults to the one of the
+            source file's directory (see default_cache_dir).
+        key (str): Extra key distinguishing snapshots of the same file (e.g. sheet name).
+    Returns:
+        Optional[pd.DataFrame]: The cached frame, or None on a miss.
+    """
+    cache_dir = default_cache_dir(os.path.dirname(source_path)) if cache_dir is None else cache_dir
+    manifest_path, stem = _entry_paths(source_path, cache_dir, key)
+    manifest = _read_manifest(manifest_path)
+    if manifest is None or not os.path.exists(source_path):
+        return None
+    if not _is_current(source_path, manifest, manifest_path):
+        return None
+    data_path = stem + manifest['extension']
+    try:
+        if manifest['format'] == 'feather':
+            if feather is None:
+                return None
+            # split_blocks avoids copying columns into consolidated blocks; self_destruct
+            # drops each Arrow column once converted
+            df = feather.read_table(data_path, memory_map=True).to_pandas(split_blocks=True, self_destruct=True)
+            return _decode_mixed_columns(df, manifest.get('mixed_columns', []))
+        return pd.read_pickle(data_path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def store_cached_frame(source_path: str, df: pd.DataFrame, cache_dir: Optional[str] = None, key: str = '') -> str:
+    """
+    Snapshot a parsed frame into the cache, replacing any previous snapshot.
+    Args:
+        source_path (str): Path to the source workbook the frame was parsed from.
+        df (pd.DataFrame): The parsed frame.
+        cache_dir (Optional[str]): Directory holding the cache; defaults to the one of the
+            source file's directory (see default_cache_dir).
+        key (str): Extra key distinguishing snapshots of the same file (e.g. sheet name).
+    Returns:
+        str: Path of the written snapshot.
+    """
+    cache_dir = default_cache_dir(os.path.dirname(source_path)) if cache_dir is None else cache_dir
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path, stem = _entry_paths(source_path, cache_dir, key)
+    fingerprint = file_fingerprint(source_path)
+    manifest: Dict[str, Any] = {'fingerprint': fingerprint, 'key': key, 'version': CACHE_VERSION}
+
+    written = False
+    if feather is not None:
+        try:
+            encoded, mixed = _encode_mixed_columns(df)
+            data_path = stem + '.feather'
+            feather.write_feather(encoded, data_path + '.tmp', compression='uncompressed')
+            os.replace(data_path + '.tmp', data_path)
+            manifest.update(format='feather', extension='.feather', mixed_columns=mixed)
+            written = True
+        except (TypeError, ValueError, pa.ArrowException):
+            written = False
+    if not written:
+        data_path = stem + '.pkl'
+        df.to_pickle(data_path)
+        manifest.update(format='pickle', extension='.pkl')
+
+    _write_manifest(manifest_path, manifest)
+    return data_path
@@ -0,0 +1,244 @@
+"""
+Row-number index over the master inventory.
+
+Analysts refer to master rows by their spreadsheet "Row no.", which is the frame
+position plus HEADER_ROW_OFFSET for a full sheet, or the index itself for frames
+from capture_selected_master_rows. InventoryIndex makes that mapping explicit:
+it is built once from a master frame and holds a dense array from row number to
+frame position (-1 for row numbers not in the frame), so
+
+- `position(row_no)` is an O(1) array lookup,
+- `positions_of`, `contains` and `get_rows` are vectorized over any selection,
+- `validate` reports every invalid, out-of-range or missing row number at once.
+
+An index can be saved next to the data (a small .npz file) together with the
+fingerprint of the workbook it was built from, and is only loaded back while that
+workbook is unchanged. capture_master_with_index does this next to the master's
+snapshot cache.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from inventory_cache import default_cache_dir, file_fingerprint, fingerprint_matches
+from inventory_processor import DATA_DIR, INVENTORY_PATH, capture_master_content, master_row_numbers
+
+
+INDEX_VERSION = 1  # Bump when the saved layout changes
+
+
+@dataclass
+class RowValidation:
+    """Outcome of InventoryIndex.validate: the problems found in a list of row numbers."""
+    requested: int = 0
+    invalid: list[Any] = field(default_factory=list)
+    out_of_range: list[int] = field(default_factory=list)
+    missing: list[int] = field(default_factory=list)
+    first_row: Optional[int] = None
+    last_row: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return not (self.invalid or self.out_of_range or self.missing)
+
+    def summary(self) -> str:
+        """Human-readable description of every problem, or a single line when there are none."""
+        if self.ok:
+            return f"All {self.requested} row numbers are present."
+        lines = [f"{self.requested} row numbers checked against rows {self.first_row}-{self.last_row}:"]
+        if self.invalid:
+            lines.append(f"- {len(self.invalid)} not a whole number: {_preview(self.invalid)}")
+        if self.out_of_range:
+            lines.append(f"- {len(self.out_of_range)} out of range: {_preview(self.out_of_range)}")
+        if self.missing:
+            lines.append(f"- {len(self.missing)} in range but not in the inventory: {_preview(self.missing)}")
+        return "\n".join(lines)
+
+    def raise_for_problems(self) -> None:
+        """Raise a ValueError listing every problem, if there are any."""
+        if not self.ok:
+            raise ValueError(self.summary())
+
+
+def _preview(values: list, limit: int = 20) -> str:
+    shown = ', '.join(repr(value) if not isinstance(value, (int, np.integer)) else str(value)
+                      for value in values[:limit])
+    return shown + (', ...' if len(values) > limit else '')
+
+
+def _as_row_numbers(row_nos: Iterable[Any]) -> tuple[np.ndarray, np.ndarray]:
+    """Row numbers as int64, plus a mask of the entries that are whole numbers."""
+    numeric = pd.to_numeric(pd.Series(list(row_nos), dtype=object), errors='coerce').to_numpy(dtype=float)
+    valid = np.isfinite(numeric) & (numeric == np.round(numeric))
+    return np.where(valid, numeric, -1).astype(np.int64), valid
+
+
+class InventoryIndex:
+    """Dense mapping from spreadsheet row number to position in a master frame."""
+
+    def __init__(self, row_numbers: Iterable[int], source: Optional[dict] = None):
+        """
+        Args:
+            row_numbers (Iterable[int]): The row number of each frame position, in order.
+            source (Optional[dict]): Fingerprint of the workbook the frame came from (see save/load).
+        """
+        self.row_numbers = np.asarray(list(row_numbers) if not isinstance(row_numbers, np.ndarray) else row_numbers,
+                                      dtype=np.int64)
+        self.source = source
+        self.first_row = int(self.row_numbers.min()) if len(self.row_numbers) else 0
+        self.last_row = int(self.row_numbers.max()) if len(self.row_numbers) else -1
+        self._positions = np.full(self.last_row - self.first_row + 1, -1, dtype=np.int64)
+        self._positions[self.row_numbers - self.first_row] = np.arange(len(self.row_numbers))
+        # A repeated row number leaves fewer filled slots than rows
+        if np.count_nonzero(self._positions >= 0) != len(self.row_numbers):
+            raise ValueError("Row numbers of an inventory index must be unique.")
+
+    @classmethod
+    def from_frame(cls, master: pd.DataFrame, source: Optional[dict] = None) -> 'InventoryIndex':
+        """Build the index of a frame from capture_master_content or capture_selected_master_rows."""
+        return cls(master_row_numbers(master).to_numpy(), source)
+
+    def __len__(self) -> int:
+        return len(self.row_numbers)
+
+    def position(self, row_no: int) -> int:
+        """Frame position of one row number; raises KeyError if it is not in the frame."""
+        offset = int(row_no) - self.first_row
+        if 0 <= offset < len(self._positions) and self._positions[offset] >= 0:
+            return int(self._positions[offset])
+        raise KeyError(f"Row {row_no} is not in the inventory.")
+
+    def positions_of(self, row_nos: Iterable[Any]) -> np.ndarray:
+        """Frame positions of the row numbers, in the same order; -1 where a row number is not in the frame."""
+        numbers, valid = _as_row_numbers(row_nos)
+        offsets = numbers - self.first_row
+        in_range = valid & (offsets >= 0) & (offsets < len(self._positions))
+        positions = np.full(len(numbers), -1, dtype=np.int64)
+        positions[in_range] = self._positions[offsets[in_range]]
+        return positions
+
+    def contains(self, row_nos: Iterable[Any]) -> np.ndarray:
+        """Boolean mask: which of the row numbers are in the frame."""
+        return self.positions_of(row_nos) >= 0
+
+    def validate(self, row_nos: Iterable[Any]) -> RowValidation:
+        """
+        Check a selection of row numbers against the index in one pass.
+        Args:
+            row_nos (Iterable[Any]): Requested row numbers (e.g. the filtered workbook's 'Row no.').
+        Returns:
+            RowValidation: The invalid, out-of-range and missing row numbers.
+        """
+        values = list(row_nos)
+        numbers, valid = _as_row_numbers(values)
+        in_range = valid & (numbers >= self.first_row) & (numbers <= self.last_row)
+        found = self.positions_of(values) >= 0
+        return RowValidation(
+            requested=len(values),
+            invalid=[value for value, ok in zip(values, valid) if not ok],
+            out_of_range=numbers[valid & ~in_range].tolist(),
+            missing=numbers[in_range & ~found].tolist(),
+            first_row=self.first_row,
+            last_row=self.last_row,
+        )
+
+    def get_rows(self, master: pd.DataFrame, row_nos: Iterable[Any], missing: str = 'raise') -> pd.DataFrame:
+        """
+        Fetch rows of the frame the index was built from, in the requested order.
+        Args:
+            master (pd.DataFrame): The indexed frame.
+            row_nos (Iterable[Any]): Row numbers to fetch.
+            missing (str): 'raise' to raise a ValueError describing every row number that is not
+                in the frame, or 'skip' to leave them out.
+        Returns:
+            pd.DataFrame: The rows, indexed by 'Row no.'.
+        """
+        if len(master) != len(self):
+            raise ValueError(f"The index covers {len(self)} rows but the frame has {len(master)}.")
+        values = list(row_nos)
+        positions = self.positions_of(values)
+        if missing == 'raise':
+            self.validate(values).raise_for_problems()
+        elif missing != 'skip':
+            raise ValueError(f"missing must be 'raise' or 'skip', not '{missing}'.")
+        positions = positions[positions >= 0]
+        return master.iloc[positions].set_axis(pd.Index(self.row_numbers[positions], name='Row no.'), axis=0)
+
+    def save(self, path: str) -> None:
+        """Write the index (and its source fingerprint) as a .npz file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, row_numbers=self.row_numbers,
+                 meta=np.array(json.dumps({'version': INDEX_VERSION, 'source': self.source})))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, source_path: Optional[str] = None) -> Optional['InventoryIndex']:
+        """
+        Load a saved index.
+        Args:
+            path (str): The .npz file written by save.
+            source_path (Optional[str]): If given, the index is only returned while this workbook
+                still matches the fingerprint stored with the index (mtime and size, else SHA-256).
+        Returns:
+            Optional[InventoryIndex]: The index, or None if it is missing, outdated or stale.
+        """
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data['meta']))
+                row_numbers = data['row_numbers']
+        except (OSError, ValueError, KeyError):
+            return None
+        if meta.get('version') != INDEX_VERSION:
+            return None
+        source = meta.get('source')
+        if source_path is not None and not fingerprint_matches(source_path, source):
+            return None
+        return cls(row_numbers, source)
+
+
+def index_path(source_path: str, cache_dir: Optional[str] = None, sheet_name: str = "Inventory") -> str:
+    """Where capture_master_with_index keeps the index of a workbook's sheet (by default in '.cache' next to it)."""
+    cache_dir = default_cache_dir(os.path.dirname(source_path)) if cache_dir is None else cache_dir
+    slug = hashlib.sha1(f"{os.path.abspath(source_path)}::{sheet_name}".encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(source_path)}.{slug}.index.npz")
+
+
+def capture_master_with_index(
+    inventory_path: str = INVENTORY_PATH,
+    data_dir: str = DATA_DIR,
+    sheet_name: str = "Inventory",
+    cache_dir: Optional[str] = None,
+    use_cache: bool = True
+) -> tuple[pd.DataFrame, InventoryIndex]:
+    """
+    Load the master inventory together with its row-number index.
+
+    The index is saved next to the master's snapshot cache and re-used until the
+    workbook changes.
+
+    Args:
+        inventory_path (str): Path to the master inventory file.
+        data_dir (str): Directory where the data files are stored.
+        sheet_name (str): Name of the sheet to read from the Excel file.
+        cache_dir (Optional[str]): Directory holding the snapshot cache and the index; defaults to <data_dir>/.cache.
+        use_cache (bool): Set to False to neither read nor write cached files.
+    Returns:
+        tuple:
+            - pd.DataFrame: The master content, as capture_master_content returns it.
+            - InventoryIndex: Its row-number index.
+    """
+    full_path = os.path.join(data_dir, inventory_path)
+    cache_dir = default_cache_dir(data_dir) if cache_dir is None else cache_dir
+    master = capture_master_content(inventory_path, data_dir, sheet_name, cache_dir=cache_dir, use_cache=use_cache)
+    path = index_path(full_path, cache_dir, sheet_name)
+    index = InventoryIndex.load(path, full_path) if use_cache else None
+    if index is None or len(index) != len(master):
+        index = InventoryIndex.from_frame(master, source=file_fingerprint(full_path))
+        if use_cache:
+            index.save(path)
+    return master, index
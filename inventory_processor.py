@@ -21,151 +21,549 @@ Output format will be:
 | --- | --- | --- | --- | --- | --- | --- | --- | --- | --- | --- | --- | --- | --- |
 | 0 | Tech X | Org A | Description A | Existing Tech A | Cat 1 | Cat 2 | Cat 3 | 5 | Func Cat 1 | Func Cat 2 | Relevance (1-5) | Notes | Link |
 """
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from math import comb
+import numpy as np
 import pandas as pd
 import os
+import warnings
+from openpyxl import load_workbook
+from inventory_cache import default_cache_dir, load_cached_frame, store_cached_frame
+from compact_dtypes import compact_frame, memory_report, format_memory_report
+from output_writers import OUTPUT_FORMATS, BATCH_SIZE, output_path, write_frame
+from profiling import profiled_stage, stage, add_profiling_arguments, start_from_args, finish_from_args
 
 
 DATA_DIR = './data/'  # Directory where the data files are stored
 INVENTORY_PATH = './INVENTORY.xlsx' # "Master file" with all of the original data
 FILTERED_PATH = './FILTERED.xlsx' # Handmade file with relevant identifed data
 STANDARDIZED_PATH = './standardized_data'  # Output file for standardized data
+CACHE_DIR = default_cache_dir(DATA_DIR)  # Snapshot cache of the data directory (see inventory_cache)
+USE_CACHE = True  # Whether capture_master_content may use the on-disk snapshot cache
+HEADER_ROW_OFFSET = 2  # Spreadsheet "Row no." = DataFrame index + 2 (1-based rows plus the header row)
+CHUNK_SIZE = 50_000  # Master rows read per batch by iter_master_chunks
+FILTERED_HEADER_INDEX = 3  # 0-based row of the header in each filtered sheet
+SHEETS_TO_SKIP = {"Non-Inventory Technologies", "Technology Gaps"}  # Sheets that don't follow the format
+METADATA_COLUMNS = ['Relevance (1-5)', 'Notes', 'Link']  # Filtered columns carried into the output
+MASTER_COLUMNS = [  # Master columns the standardized and slim outputs are built from
+    "Technology Name", "Tech Producer", "Description", "Existing Technology",
+    "Level One Category", "Level Two Category", "Level Three Category", "TRL",
+    "Level One Functional Category", "Level Two Functional Category",
+]
+DUPLICATE_POLICIES = ('first', 'last', 'relevance', 'error')
+DUPLICATE_POLICY = 'last'  # How to resolve a Row no. listed on more than one sheet
+WORKERS = 1  # Processes used to parse filtered sheets; > 1 also loads the master concurrently
+COMPACT = False  # Whether the master inventory is loaded with compact dtypes (see compact_dtypes)
+
+
+def _read_filtered_sheet(xls: pd.ExcelFile | str, sheet: str, filtered_path: str) -> pd.DataFrame:
+    """
+    Read one sheet of the filtered workbook and keep the rows with a valid 'Row no.'.
+    Args:
+        xls (pd.ExcelFile | str): The open filtered workbook, or its path (in pool workers).
+        sheet (str): Name of the sheet to read.
+        filtered_path (str): Path of the workbook, for error messages.
+    Returns:
+        pd.DataFrame: The sheet's rows with an int 'Row no.' > 0 and a 'source sheet' column.
+    """
+    df = pd.read_excel(xls, sheet_name=sheet, header=FILTERED_HEADER_INDEX)
+    df.columns = df.columns.str.strip()
+    if 'Row no.' not in df.columns:
+        raise ValueError(
+            f"'Row no.' column not found in sheet '{sheet}' of '{filtered_path}'."
+        )
+    df['Row no.'] = pd.to_numeric(df['Row no.'], errors='coerce')
+    df = df.dropna(subset=['Row no.'])
+    df['Row no.'] = df['Row no.'].astype(int)
+    df = df[df['Row no.'] > 0]
+    df['source sheet'] = sheet
+    return df
+
 
+def resolve_duplicate_rows(frame: pd.DataFrame, policy: str = 'last') -> pd.DataFrame:
+    """
+    Resolve 'Row no.' values that appear more than once in the combined filtered frame.
+
+    All duplicates are reported together: with the 'error' policy as a single ValueError,
+    otherwise as a single warning. Rows keep the position of the first occurrence of
+    their row number.
+
+    Args:
+        frame (pd.DataFrame): Combined filtered rows with 'Row no.' and 'source sheet' columns.
+        policy (str): Which duplicate to keep: 'first', 'last', 'relevance' (highest
+            'Relevance (1-5)', first on ties) or 'error' to refuse duplicates.
+    Returns:
+        pd.DataFrame: The frame with one row per 'Row no.'.
+    """
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicate policy '{policy}'; expected one of {DUPLICATE_POLICIES}.")
+    duplicated = frame['Row no.'].duplicated(keep=False)
+    if not duplicated.any():
+        return frame
+
+    sheets_by_row = frame[duplicated].groupby('Row no.', sort=True)['source sheet'].agg(list)
+    report = "; ".join(f"{row_no} in {sheets}" for row_no, sheets in sheets_by_row.items())
+    message = f"{len(sheets_by_row)} row number(s) appear more than once in the filtered data: {report}"
+    if policy == 'error':
+        raise ValueError(message)
+    warnings.warn(f"{message}. Keeping the '{policy}' occurrence.", stacklevel=2)
+
+    if policy == 'relevance':
+        relevance = pd.to_numeric(frame.get('Relevance (1-5)'), errors='coerce')
+        ranked = frame.assign(_relevance=relevance).sort_values('_relevance', ascending=False, kind='stable')
+        chosen = ranked.drop_duplicates('Row no.', keep='first').drop(columns='_relevance')
+    else:
+        chosen = frame.drop_duplicates('Row no.', keep=policy)
+    first_seen = frame['Row no.'].drop_duplicates(keep='first')
+    return chosen.set_index('Row no.').loc[first_seen].reset_index()
+
+
+def combine_filtered_frames(frames: list[pd.DataFrame], duplicate_policy: str = 'last') -> pd.DataFrame:
+    """
+    Concatenate per-sheet filtered frames (in sheet order) and resolve duplicate row numbers.
+    Args:
+        frames (list[pd.DataFrame]): Frames from _read_filtered_sheet.
+        duplicate_policy (str): 'first', 'last', 'relevance' or 'error'.
+    Returns:
+        pd.DataFrame: The combined frame with one row per 'Row no.'.
+    """
+    combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if combined.empty:
+        raise ValueError("No valid rows found in the filtered data file.")
+    return resolve_duplicate_rows(combined, duplicate_policy)
+
+
+@profiled_stage()
 def capture_filtered_data(
     data_dir: str = DATA_DIR, 
-    filtered_path: str = FILTERED_PATH
-) -> Dict[int, Dict[str, Any]]:
+    filtered_path: str = FILTERED_PATH,
+    as_frame: bool = False,
+    duplicate_policy: str = 'last',
+    workers: int = 1
+) -> Dict[int, Dict[str, Any]] | pd.DataFrame:
     """
     Capture the filtered data from the FILTERED_PATH file.
     Reads the specified sheets, extracts the row numbers and their associated metadata,
     and returns a dict where keys are 'Row no.' and values are the whole dataframe rows as dicts.
 
+    With `as_frame=True` the sheets are instead returned as one concatenated frame with a
+    'source sheet' column. Row numbers found on more than one sheet are resolved by
+    `duplicate_policy` (see resolve_duplicate_rows) in both modes.
+
+    With `workers > 1` the sheets are parsed across a process pool. Results are
+    combined in workbook sheet order, so the output is identical to the serial path.
+
     Args:
         data_dir (str): Directory where the data files are stored.
         filtered_path (str): Path to the filtered data file.
+        as_frame (bool): Return the combined DataFrame instead of a dict.
+        duplicate_policy (str): 'first', 'last', 'relevance' or 'error'.
+        workers (int): Number of processes used to parse sheets.
 
     Returns:
-        Dict[int, Dict[str, Any]]: A dictionary indexed by Row no. with row dicts as values.
+        Dict[int, Dict[str, Any]] | pd.DataFrame: A dictionary indexed by Row no. with row dicts
+        as values, or the combined frame when `as_frame` is set.
     """
-    correct_header_index = 3
-    sheets_to_skip = {"Non-Inventory Technologies", "Technology Gaps"}
-    combined_rows: Dict[int, Dict[str, Any]] = {}
-
     file_path = os.path.join(data_dir, filtered_path)
     xls = pd.ExcelFile(file_path)
-
-    for sheet in xls.sheet_names:
-        if sheet in sheets_to_skip:
-            continue
-        df = pd.read_excel(xls, sheet_name=sheet, header=correct_header_index)
-        df.columns = df.columns.str.strip()
-        if 'Row no.' not in df.columns:
-            raise ValueError(
-                f"'Row no.' column not found in sheet '{sheet}' of '{filtered_path}'."
-            )
-        df['Row no.'] = pd.to_numeric(df['Row no.'], errors='coerce')
-        df = df.dropna(subset=['Row no.'])
-        df['Row no.'] = df['Row no.'].astype(int)
-        df = df[df['Row no.'] > 0]
-        combined_rows.update(df.set_index('Row no.').to_dict(orient='index'))
-    if not combined_rows:
-        raise ValueError("No valid rows found in the filtered data file.")
-    return combined_rows
-
-
+    sheets = [sheet for sheet in xls.sheet_names if sheet not in SHEETS_TO_SKIP]
+
+    if workers > 1 and len(sheets) > 1:
+        xls.close()
+        with ProcessPoolExecutor(max_workers=min(workers, len(sheets))) as pool:
+            # map() yields in submission order, keeping the result deterministic
+            frames = list(pool.map(_read_filtered_sheet, repeat(file_path), sheets, repeat(filtered_path)))
+    else:
+        frames = [_read_filtered_sheet(xls, sheet, filtered_path) for sheet in sheets]
+    combined = combine_filtered_frames(frames, duplicate_policy)
+    if as_frame:
+        return combined
+    return combined.drop(columns='source sheet').set_index('Row no.').to_dict(orient='index')
+
+
+@profiled_stage()
 def capture_rows_and_metadata(
     data_dir: str = DATA_DIR,
-    filtered_path: str = FILTERED_PATH
-) -> tuple[dict[int, dict[str, object]], list[int]]:
+    filtered_path: str = FILTERED_PATH,
+    as_frame: bool = False,
+    duplicate_policy: str = 'last',
+    workers: int = 1
+) -> tuple[dict[int, dict[str, object]] | pd.DataFrame, list[int]]:
     """
     Capture row numbers and key metadata from the specified filtered data file.
 
     Reads the filtered sheets, extracts the row numbers and associated metadata,
     and returns:
       - A dictionary: keys are row numbers (int), values are dicts with metadata.
+        With `as_frame=True`, a DataFrame indexed by row number instead.
       - A list: all used row numbers (int).
 
     Returns:
         tuple:
-            - dict[int, dict[str, object]]: Row number → metadata dict.
+            - dict[int, dict[str, object]] | pd.DataFrame: Row number → metadata.
             - list[int]: List of row numbers present.
     """
-    filtered_data = capture_filtered_data(data_dir, filtered_path)
+    filtered = capture_filtered_data(
+        data_dir, filtered_path, as_frame=True, duplicate_policy=duplicate_policy, workers=workers
+    )
+    # capture_filtered_data guarantees unique int row numbers > 0
+    metadata = filtered.set_index('Row no.').reindex(columns=METADATA_COLUMNS)
+    rows_to_use = filtered['Row no.'].tolist()
+    if as_frame:
+        return metadata, rows_to_use
+    return metadata.to_dict(orient='index'), rows_to_use
+
+
+@profiled_stage()
+def capture_master_content(
+    inventory_path: str = INVENTORY_PATH,
+    data_dir: str = DATA_DIR,
+    sheet_name: str = "Inventory",
+    cache_dir: str | None = None,
+    use_cache: bool = True,
+    compact: bool = False,
+    report_memory: bool = False
+) -> pd.DataFrame:
+    """
+    Capture the master content from the specified inventory file and sheet.
 
-    rows_to_use: list[int] = []
-    metadata_dict: dict[int, dict[str, object]] = {}
+    The parsed sheet is snapshotted into `cache_dir` (see inventory_cache) and
+    re-used on later calls until the workbook's mtime, size or content changes.
 
-    for row_no, row in filtered_data.items():
-        # No need for pd.isna or type cast; capture_filtered_data guarantees int keys > 0
-        rows_to_use.append(row_no)
-        metadata_dict[row_no] = {
-            'Relevance (1-5)': row.get('Relevance (1-5)'),
-            'Notes': row.get('Notes'),
-            'Link': row.get('Link')
-        }
-    return metadata_dict, rows_to_use
+    Args:
+        inventory_path (str): Path to the master inventory file.
+        data_dir (str): Directory where the data files are stored.
+        sheet_name (str): Name of the sheet to read from the Excel file.
+        cache_dir (Optional[str]): Directory holding the parsed-sheet cache; defaults to <data_dir>/.cache.
+        use_cache (bool): Set to False to always parse the workbook and leave the cache untouched.
+        compact (bool): Return the frame with compact dtypes (categoricals, Int8, Arrow
+            strings; see compact_dtypes.compact_frame). The values are unchanged.
+        report_memory (bool): With `compact`, print the per-column memory before and after.
+    Returns:
+        pd.DataFrame: DataFrame containing the captured rows and their metadata.
+    """
+    full_path = os.path.join(data_dir, inventory_path)
+    cache_dir = default_cache_dir(data_dir) if cache_dir is None else cache_dir
+    df = load_cached_frame(full_path, cache_dir, key=sheet_name) if use_cache else None
+    if df is None:
+        df = pd.read_excel(full_path, sheet_name=sheet_name)
+        df.columns = df.columns.str.strip()
+        if use_cache:
+            store_cached_frame(full_path, df, cache_dir, key=sheet_name)
+
+    if compact:
+        compacted = compact_frame(df)
+        if report_memory:
+            print(format_memory_report(memory_report(df, compacted)))
+        return compacted
+    return df
 
 
-def capture_master_content(inventory_path: str = INVENTORY_PATH, data_dir: str = DATA_DIR, sheet_name: str = "Inventory") -> pd.DataFrame:
+@profiled_stage()
+def capture_selected_master_rows(
+    rows_to_use: Iterable[int],
+    inventory_path: str = INVENTORY_PATH,
+    data_dir: str = DATA_DIR,
+    sheet_name: str = "Inventory"
+) -> pd.DataFrame:
     """
-    Capture the master content from the specified inventory file and sheet.
+    Capture only the requested rows of the master inventory.
+
+    Streams the sheet row by row in read-only mode, keeps the rows whose spreadsheet
+    row number is in `rows_to_use` and stops reading after the highest requested row,
+    so memory and parse time scale with the selection rather than the master file.
+
     Args:
+        rows_to_use (Iterable[int]): Spreadsheet row numbers ("Row no.") to capture.
         inventory_path (str): Path to the master inventory file.
         data_dir (str): Directory where the data files are stored.
         sheet_name (str): Name of the sheet to read from the Excel file.
     Returns:
-        pd.DataFrame: DataFrame containing the captured rows and their metadata.
+        pd.DataFrame: The requested rows, indexed by their real row number ('Row no.').
     """
-    full_path = os.path.join(data_dir, inventory_path)
-    df = pd.read_excel(full_path, sheet_name=sheet_name)
-    df.columns = df.columns.str.strip()
+    wanted = {int(row) for row in rows_to_use if not pd.isna(row)}
+    header, row_numbers, records = next(_stream_master_rows(os.path.join(data_dir, inventory_path), sheet_name, wanted))
+    index = pd.Index(row_numbers, name='Row no.')
+    return pd.DataFrame.from_records(records, columns=header, index=index)
+
+
+def _stream_master_rows(
+    full_path: str,
+    sheet_name: str,
+    wanted: set[int] | None = None,
+    chunk_size: int | None = None
+) -> Iterator[tuple[list[str], list[int], list[list[Any]]]]:
+    """
+    Read a sheet row by row in read-only mode and yield (header, row numbers, records) batches.
+    A batch is yielded after every chunk_size sheet rows (once at the end without chunk_size,
+    even if it is empty). With `wanted`, only those rows are kept and reading stops after the highest.
+    """
+    wb = load_workbook(full_path, read_only=True, data_only=True)
+    try:
+        rows = wb[sheet_name].iter_rows(values_only=True)
+        header = [str(col).strip() if col is not None else '' for col in next(rows, ())]
+        last_row = max(wanted, default=0) if wanted is not None else None
+        row_numbers: list[int] = []
+        records: list[list[Any]] = []
+        for row_no, values in enumerate(rows, start=HEADER_ROW_OFFSET):
+            if last_row is not None and row_no > last_row:
+                break
+            if wanted is None or row_no in wanted:
+                values = tuple(values[:len(header)]) + (None,) * (len(header) - len(values))
+                row_numbers.append(row_no)
+                records.append([_convert_cell(value) for value in values])
+            if chunk_size and (row_no - HEADER_ROW_OFFSET + 1) % chunk_size == 0:
+                yield header, row_numbers, records
+                row_numbers, records = [], []
+        if not chunk_size or records:
+            yield header, row_numbers, records
+    finally:
+        wb.close()
+
+
+def iter_master_chunks(
+    inventory_path: str = INVENTORY_PATH,
+    data_dir: str = DATA_DIR,
+    sheet_name: str = "Inventory",
+    chunk_size: int = CHUNK_SIZE,
+    rows_to_use: Iterable[int] | None = None,
+    dtypes: list[Any] | None = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream the master inventory in batches of chunk_size sheet rows.
 
-    return df
+    Only one batch is held in memory at a time. Each frame is indexed by the real
+    spreadsheet row number ('Row no.'), so it can be passed to standardize_data like a
+    frame from capture_selected_master_rows. Batches without any kept row are skipped.
 
+    Args:
+        inventory_path (str): Path to the master inventory file.
+        data_dir (str): Directory where the data files are stored.
+        sheet_name (str): Name of the sheet to read from the Excel file.
+        chunk_size (int): Sheet rows read per batch.
+        rows_to_use (Iterable[int] | None): Keep only these row numbers and stop after the
+            highest one; None keeps every row.
+        dtypes (list[Any] | None): dtype of each column, by position (see master_column_dtypes).
+            Without it each batch infers its own dtypes, so e.g. 'TRL' is int64 in a batch
+            without blanks and float64 in one with.
+    Returns:
+        Iterator[pd.DataFrame]: The batches, in sheet order.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    wanted = None if rows_to_use is None else {int(row) for row in rows_to_use if not pd.isna(row)}
+    for header, row_numbers, records in _stream_master_rows(
+        os.path.join(data_dir, inventory_path), sheet_name, wanted, chunk_size
+    ):
+        if not records:
+            continue
+        index = pd.Index(row_numbers, name='Row no.')
+        if dtypes is None:
+            yield pd.DataFrame.from_records(records, columns=header, index=index)
+            continue
+        columns = {i: pd.Series([record[i] for record in records], index=index, dtype=dtype)
+                   for i, dtype in enumerate(dtypes)}
+        chunk = pd.DataFrame(columns, index=index)
+        chunk.columns = header
+        yield chunk
 
-def standardize_data(master_content: pd.DataFrame, metadata_dict: dict, rows_to_use: list) -> pd.DataFrame:
+
+def _infer_dtype(samples: list[Any]) -> Any:
+    """The dtype pandas infers for a column holding (one of each kind of) these values."""
+    return pd.DataFrame.from_records([[value] for value in samples], columns=['value'])['value'].dtype
+
+
+def master_column_dtypes(
+    inventory_path: str = INVENTORY_PATH,
+    data_dir: str = DATA_DIR,
+    sheet_name: str = "Inventory",
+    cache_dir: str | None = None,
+    use_cache: bool = True
+) -> list[Any]:
+    """
+    The dtype of each master column, as capture_master_content infers it from the whole sheet.
+
+    pandas infers a column's dtype from the kinds of values it holds (ints, floats, blanks,
+    strings, ...), not from the values themselves. The sheet is streamed once, keeping one
+    sample of each kind per column, and the dtype is inferred from those samples. The result
+    is cached (see inventory_cache) until the workbook changes.
+
+    Args:
+        inventory_path (str): Path to the master inventory file.
+        data_dir (str): Directory where the data files are stored.
+        sheet_name (str): Name of the sheet to read from the Excel file.
+        cache_dir (Optional[str]): Directory holding the cache; defaults to <data_dir>/.cache.
+        use_cache (bool): Set to False to always read the workbook and leave the cache untouched.
+    Returns:
+        list[Any]: One dtype per column, by position.
+    """
+    full_path = os.path.join(data_dir, inventory_path)
+    key = f"{sheet_name}:dtypes"
+    cache_dir = default_cache_dir(data_dir) if cache_dir is None else cache_dir
+    cached = load_cached_frame(full_path, cache_dir, key=key) if use_cache else None
+    if cached is not None:
+        return list(cached.dtypes)
+
+    samples: list[dict[Any, Any]] = []
+    header: list[str] = []
+    for header, _, records in _stream_master_rows(full_path, sheet_name, chunk_size=CHUNK_SIZE):
+        if not samples:
+            samples = [{} for _ in header]
+        for record in records:
+            for kinds, value in zip(samples, record):
+                kind = 'blank' if isinstance(value, float) and value != value else type(value)
+                kinds.setdefault(kind, value)
+    dtypes = [_infer_dtype(list(kinds.values())) for kinds in samples]
+    if use_cache:
+        empty = pd.DataFrame({i: pd.Series(dtype=dtype) for i, dtype in enumerate(dtypes)})
+        store_cached_frame(full_path, empty, cache_dir, key=key)
+    return dtypes
+
+
+def _convert_cell(value: Any) -> Any:
+    """Convert an openpyxl cell value the way pd.read_excel does."""
+    if value is None:
+        return float('nan')
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def master_row_numbers(master_content: pd.DataFrame) -> pd.Index:
+    """
+    Return the spreadsheet row numbers ("Row no.") of the rows in a master frame.
+
+    Frames from capture_selected_master_rows are already indexed by 'Row no.';
+    frames from capture_master_content use a positional index offset by the header.
+    """
+    if master_content.index.name == 'Row no.':
+        return master_content.index
+    return master_content.index + HEADER_ROW_OFFSET
+
+
+@profiled_stage()
+def standardize_data(
+    master_content: pd.DataFrame,
+    metadata_dict: dict | pd.DataFrame,
+    rows_to_use: list,
+    keep_row_numbers: bool = False,
+    index: Any = None
+) -> pd.DataFrame:
     """
     Standardize the data by enriching the rows with metadata.
 
     This function takes a DataFrame of rows and a dictionary of metadata,
     and returns a new DataFrame where each row is enriched with the corresponding metadata.
+    The enrichment is a single columnar join on the row number: master columns keep
+    their order, metadata columns already in the master are overwritten in place for
+    rows that have metadata, and the remaining metadata columns are appended.
 
     Args:
         master_content (pd.DataFrame): DataFrame with master content
-        metadata_dict (dict): {row_no: metadata_dict, ...}
+        metadata_dict (dict | pd.DataFrame): {row_no: metadata_dict, ...}, or a frame indexed by row number
         rows_to_use (list): List of row indices to include
+        keep_row_numbers (bool): Index the result by 'Row no.' instead of a fresh RangeIndex.
+        index (InventoryIndex | None): Row-number index of master_content (see inventory_index);
+            rows are then looked up by position instead of scanning the whole frame.
 
     Returns:
         pd.DataFrame: Enriched DataFrame
     """
-    # Map row number to DataFrame index if needed
-    enriched_rows = []
     # Ensure the rows_to_use are integers then reduce the master_content to only those rows
     if not isinstance(rows_to_use, list):
         raise ValueError("rows_to_use should be a list of row numbers.")
-    rows_to_use = [(int(row)-2) for row in rows_to_use if isinstance(row, (int, float)) and not pd.isna(row)]
-    rows_df = master_content[master_content.index.isin(rows_to_use)]
-
-    for idx, row in rows_df.iterrows():
-        row_no = idx+2
-        metadata = metadata_dict.get(row_no, {})
-        row_data = row.to_dict()
-        row_data.update(metadata)
-        enriched_rows.append(row_data)
-    return pd.DataFrame(enriched_rows)
+    rows_to_use = [int(row) for row in rows_to_use if isinstance(row, (int, float)) and not pd.isna(row)]
+    if index is not None:
+        # Sorted positions keep the master order of the isin scan below
+        positions = np.unique(index.positions_of(rows_to_use))
+        positions = positions[positions >= 0]
+        if not len(positions):
+            return pd.DataFrame()
+        rows_df = master_content.iloc[positions].set_axis(
+            pd.Index(index.row_numbers[positions], name='Row no.'), axis=0
+        )
+    else:
+        row_numbers = master_row_numbers(master_content)
+        selected = row_numbers.isin(rows_to_use)
+        if not selected.any():
+            return pd.DataFrame()
+        rows_df = master_content[selected].set_axis(pd.Index(row_numbers[selected], name='Row no.'), axis=0)
+
+    if isinstance(metadata_dict, pd.DataFrame):
+        metadata_df = metadata_dict
+    else:
+        metadata_df = pd.DataFrame.from_dict(metadata_dict, orient='index')
+    has_metadata = rows_df.index.isin(metadata_df.index)
+    metadata_df = metadata_df.reindex(rows_df.index)
+
+    enriched = rows_df.copy()
+    for col in metadata_df.columns.intersection(rows_df.columns):
+        enriched[col] = enriched[col].where(~has_metadata, metadata_df[col])
+    enriched = enriched.join(metadata_df[metadata_df.columns.difference(rows_df.columns, sort=False)])
+    if keep_row_numbers:
+        return enriched.infer_objects()
+    return enriched.reset_index(drop=True).infer_objects()
+
+
+@profiled_stage()
+def capture_inputs(
+    data_dir: str = DATA_DIR,
+    filtered_path: str = FILTERED_PATH,
+    inventory_path: str = INVENTORY_PATH,
+    selective: bool = False,
+    workers: int = 1,
+    duplicate_policy: str = 'last',
+    cache_dir: str | None = None,
+    use_cache: bool = True,
+    compact: bool = False
+) -> tuple[pd.DataFrame, list[int], pd.DataFrame]:
+    """
+    Capture the filtered metadata and the master content.
 
+    With `workers > 1` the filtered sheets are parsed across a process pool while the
+    master inventory is loaded at the same time in a background thread. The selective
+    reader needs the row numbers first, so `selective` always loads the master afterwards.
+    With `compact` the master is returned with compact dtypes (see capture_master_content).
 
-def main(output_type: str = 'json'):
+    Returns:
+        tuple:
+            - pd.DataFrame: Metadata indexed by row number.
+            - list[int]: Row numbers to use.
+            - pd.DataFrame: Master content.
     """
-    Main function to execute the row capture and standardization process.
+    def load_master() -> pd.DataFrame:
+        return capture_master_content(inventory_path, data_dir, cache_dir=cache_dir, use_cache=use_cache,
+                                      compact=compact, report_memory=compact)
+
+    def load_metadata() -> tuple[pd.DataFrame, list[int]]:
+        return capture_rows_and_metadata(
+            data_dir, filtered_path, as_frame=True, duplicate_policy=duplicate_policy, workers=workers
+        )
+
+    if selective:
+        metadata, rows_to_use = load_metadata()
+        master = capture_selected_master_rows(rows_to_use, inventory_path, data_dir)
+        return metadata, rows_to_use, compact_frame(master) if compact else master
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=1) as master_loader:
+            master_future = master_loader.submit(load_master)
+            metadata, rows_to_use = load_metadata()
+            return metadata, rows_to_use, master_future.result()
+    metadata, rows_to_use = load_metadata()
+    return metadata, rows_to_use, load_master()
+
+
+def rename_output_columns(standardized_df: pd.DataFrame) -> pd.DataFrame:
     """
-    metadata, rows_to_use = capture_rows_and_metadata()
-    captured_data = capture_master_content(INVENTORY_PATH, DATA_DIR)
-    standardized_df = standardize_data(captured_data, metadata, rows_to_use)
-
-    # Reorder and rename columns as per the output format
-    standardized_df = standardized_df.rename(columns={
+    Rename the standardized columns as per the output format.
+    Args:
+        standardized_df (pd.DataFrame): The frame returned by standardize_data.
+    Returns:
+        pd.DataFrame: The renamed frame.
+    """
+    return standardized_df.rename(columns={
         "Technology": "Technology",
         "Organization": "Producer",
         "Description": "Description",
@@ -176,12 +574,52 @@ def main(output_type: str = 'json'):
         "Link": "Link"
     })
 
-    # Save as json for debugging first
-    match output_type:
-        case 'json':
-            standardized_df.to_json(os.path.join(DATA_DIR, STANDARDIZED_PATH), orient='records', indent=4)
-        case 'excel':
-            standardized_df.to_excel(os.path.join(DATA_DIR, STANDARDIZED_PATH), index=False)
+
+def main(output_type: str = 'json', selective: bool = False, workers: int = 1, incremental: bool = False,
+         batch_size: int = BATCH_SIZE, remap_from: str | None = None):
+    """
+    Main function to execute the row capture and standardization process.
+
+    Args:
+        output_type (str): One of output_writers.OUTPUT_FORMATS ('json', 'ndjson', 'ndjson-gzip',
+            'ndjson-zstd', 'parquet', 'excel' or 'excel-stream').
+        selective (bool): Stream only the referenced rows of the master inventory
+            (see capture_selected_master_rows) instead of loading the whole sheet.
+        workers (int): Processes used to parse the filtered sheets (see capture_inputs).
+        incremental (bool): Re-parse only changed filtered sheets and patch the previous
+            run's output (see incremental.run_incremental).
+        batch_size (int): Rows serialized at a time when writing the output.
+        remap_from (str | None): Older master inventory the filtered workbook was made against.
+            Its row numbers are moved onto the current master first (see snapshot_diff.remap_inputs).
+    """
+    if remap_from and (selective or incremental):
+        raise ValueError("Remapping row numbers needs the whole master; it cannot be combined with selective or incremental runs.")
+    if incremental:
+        from incremental import run_incremental
+        standardized_df, report = run_incremental(
+            DATA_DIR, FILTERED_PATH, INVENTORY_PATH,
+            cache_dir=CACHE_DIR, duplicate_policy=DUPLICATE_POLICY, use_cache=USE_CACHE
+        )
+        print(report.summary())
+    else:
+        metadata, rows_to_use, captured_data = capture_inputs(
+            DATA_DIR, FILTERED_PATH, INVENTORY_PATH,
+            selective=selective, workers=workers, duplicate_policy=DUPLICATE_POLICY,
+            cache_dir=CACHE_DIR, use_cache=USE_CACHE, compact=COMPACT
+        )
+        if remap_from:
+            from snapshot_diff import remap_inputs
+            metadata, rows_to_use, diff = remap_inputs(
+                metadata, rows_to_use, captured_data, remap_from, DATA_DIR, cache_dir=CACHE_DIR, use_cache=USE_CACHE
+            )
+            print(f"Remapped row numbers from '{remap_from}': {diff.summary()}")
+        standardized_df = standardize_data(captured_data, metadata, rows_to_use)
+
+    standardized_df = rename_output_columns(standardized_df)
+
+    # Written in bounded batches; 'json' is byte-identical to to_json(orient='records', indent=4)
+    with stage('write_output', rows_in=len(standardized_df)):
+        write_frame(standardized_df, os.path.join(DATA_DIR, STANDARDIZED_PATH), output_type, batch_size)
 
 
 if __name__ == "__main__":
@@ -191,13 +629,37 @@ if __name__ == "__main__":
     parser.add_argument('--standardized-name', type=str, default=STANDARDIZED_PATH, help='Name of the standardized data file.')
     parser.add_argument('--inventory-name', type=str, default=INVENTORY_PATH, help='Name of the master inventory file.')
     parser.add_argument('--filtered-name', type=str, default=FILTERED_PATH, help='Name of the filtered data file.')
-    parser.add_argument('--output-type', type=str, choices=['json', 'excel'], default='json', help='Output format for standardized data.')
+    parser.add_argument('--output-type', type=str, choices=list(OUTPUT_FORMATS), default='json', help='Output format for standardized data.')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows serialized at a time when writing the output.')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for the parsed master inventory cache (default: <data-dir>/.cache).')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-parse the master inventory instead of using the cache.')
+    parser.add_argument('--selective', action='store_true', help='Stream only the master rows referenced by the filtered file.')
+    parser.add_argument('--compact', action='store_true',
+                        help='Load the master inventory with compact dtypes and print a per-column memory report.')
+    parser.add_argument('--duplicate-policy', type=str, choices=DUPLICATE_POLICIES, default=DUPLICATE_POLICY,
+                        help='Which entry to keep when a Row no. appears on more than one filtered sheet.')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help='Processes used to parse filtered sheets; above 1 the master is also loaded concurrently.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Re-parse only the filtered sheets that changed since the last run and patch its output.')
+    parser.add_argument('--remap-from', type=str, default=None,
+                        help='Older master inventory (in the data directory) the filtered file was made against; '
+                             'its row numbers are remapped onto the current master.')
+    add_profiling_arguments(parser)
     args = parser.parse_args()
 
     DATA_DIR = args.data_dir
     INVENTORY_PATH = args.inventory_name
     FILTERED_PATH = args.filtered_name
-    STANDARDIZED_PATH = args.standardized_name + ('.json' if args.output_type == 'json' else '.xlsx')
-    main(output_type=args.output_type)
+    CACHE_DIR = args.cache_dir or default_cache_dir(DATA_DIR)
+    USE_CACHE = not args.no_cache
+    DUPLICATE_POLICY = args.duplicate_policy
+    COMPACT = args.compact
+    STANDARDIZED_PATH = output_path(args.standardized_name, args.output_type)
+    start_from_args(args)
+    main(output_type=args.output_type, selective=args.selective, workers=args.workers, incremental=args.incremental,
+         batch_size=args.batch_size, remap_from=args.remap_from)
     print(f"Data processing complete. Standardized data saved to '{STANDARDIZED_PATH}'.")
+    finish_from_args(args)
 
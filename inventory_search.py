@@ -0,0 +1,386 @@
+"""
+Full-text search over the master inventory.
+
+Curators pick rows for FILTERED.xlsx by searching the master's 'Technology Name'
+and 'Description' columns. SearchIndex is a tokenized inverted index over those
+two columns, ranked with BM25 (a match in the name counts NAME_WEIGHT times),
+whose results carry the spreadsheet "Row no." of each match.
+
+- Tokens are lowercase runs of letters and digits, minus a few stop words.
+- Postings are stored as flat numpy arrays (CSR layout), so a query is a handful
+  of vectorized gathers and adds over the matching postings.
+- Results can be filtered by taxonomy code (e.g. TX03, TX03.1 or FN04; a code also
+  matches every code below it), TRL range and producer type (classify_producers).
+  Codes are read with taxonomy.parse_taxonomy, so 'TX3: Power', 'TX 03 - Power' and
+  the 'Level 3 Taxonomy' labels of the appendix all mean TX03.
+
+The index is saved in the cache directory together with the fingerprint of the
+workbook it was built from. When the workbook changes it is rebuilt incrementally:
+rows whose name and description are unchanged re-use their stored tokens, even if
+they moved to another row number, and only new or edited rows are tokenized again.
+
+Usage:
+    python inventory_search.py "solar array deployment" --taxonomy TX03 --trl-min 4 --producer-type Academia
+    python inventory_search.py "radiation hardened" --rows-only    # Row no. values, one per line
+"""
+from argparse import ArgumentParser
+from collections import Counter
+from typing import Iterable, Optional
+import hashlib
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+
+from inventory_cache import default_cache_dir, file_fingerprint, fingerprint_matches
+from inventory_processor import DATA_DIR, INVENTORY_PATH, capture_master_content, master_row_numbers
+from scrape_standard_for_appendix import classify_producers, load_producer_keywords
+from taxonomy import TX_COLUMNS, FN_COLUMNS, TaxonomyCode, parse_taxonomy
+
+
+SEARCH_INDEX_VERSION = 2  # Bump when the saved layout or the tokenizer changes
+TEXT_COLUMNS = ('Technology Name', 'Description')  # Columns that are indexed
+NAME_WEIGHT = 2  # A token in the technology name counts this many times
+BM25_K1 = 1.2
+BM25_B = 0.75
+SEARCH_LIMIT = 20  # Default number of results
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'into', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with',
+})
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+CODE_DEPTH = 3  # TX03 / TX03.1 / TX03.1.1
+
+
+def tokenize(text) -> list[str]:
+    """Lowercase letter/digit tokens of a text, without stop words; [] for missing values."""
+    if not isinstance(text, str):
+        if text is None or (isinstance(text, float) and np.isnan(text)):
+            return []
+        text = str(text)
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def _text_hash(name, description) -> int:
+    """64-bit hash of a row's indexed text, used to re-use its tokens across rebuilds."""
+    text = '\x1f'.join('' if pd.isna(value) else str(value) for value in (name, description))
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+def _code_levels(parsed: Optional[TaxonomyCode]) -> tuple[str, ...]:
+    """A parsed code at every depth, e.g. ('TX03', 'TX03.1', ''); all '' for None."""
+    return tuple(
+        TaxonomyCode(parsed.system, parsed.path[:depth + 1], '').code if parsed and len(parsed.path) > depth else ''
+        for depth in range(CODE_DEPTH)
+    )
+
+
+def _codes(df: pd.DataFrame, columns: tuple[str, ...]) -> np.ndarray:
+    """
+    Taxonomy code of each row at every depth, e.g. ['TX03', 'TX03.1', 'TX03.1.1'];
+    taken from the most specific of `columns` that has a code, '' where there is none.
+    Each distinct label is parsed once, with taxonomy.parse_taxonomy.
+    """
+    levels = np.full((len(df), CODE_DEPTH), '', dtype=object)
+    for col in reversed(columns):  # Least specific first, so more specific columns overwrite
+        if col in df.columns:
+            codes, uniques = pd.factorize(df[col])
+            table = np.array([_code_levels(parse_taxonomy(value)) for value in np.asarray(uniques, dtype=object)]
+                             + [_code_levels(None)], dtype=object)
+            found = table[codes]
+            has_code = found[:, 0] != ''
+            levels[has_code] = found[has_code]
+    return levels.astype(str)
+
+
+class SearchIndex:
+    """BM25-ranked inverted index over the master inventory's names and descriptions."""
+
+    def __init__(self, arrays: dict, source: Optional[dict] = None, keywords: Optional[dict] = None):
+        """
+        Args:
+            arrays (dict): The index arrays, as built by build or read by load.
+            source (Optional[dict]): Fingerprint of the workbook the index was built from.
+            keywords (Optional[dict]): Producer type keywords used for the producer types.
+        """
+        self.source = source
+        self.keywords = keywords
+        for name, value in arrays.items():
+            setattr(self, name, value)
+        self.term_ids = {term: i for i, term in enumerate(self.vocab.tolist())}
+        doc_of_posting = np.repeat(np.arange(len(self.row_numbers)), np.diff(self.doc_ptr))
+        doc_lengths = np.bincount(doc_of_posting, weights=self.doc_tfs, minlength=len(self.row_numbers))
+        average = doc_lengths.mean() if len(doc_lengths) and doc_lengths.mean() > 0 else 1.0
+        self._norm = (BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / average)).astype(np.float32)
+        doc_freq = np.diff(self.term_ptr)
+        self._idf = np.log(1 + (len(self.row_numbers) - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.row_numbers)
+
+    @classmethod
+    def build(cls, master: pd.DataFrame, previous: Optional['SearchIndex'] = None, source: Optional[dict] = None,
+              keywords: Optional[dict[str, list[str]]] = None) -> 'SearchIndex':
+        """
+        Index a master frame from capture_master_content (or capture_selected_master_rows).
+        Args:
+            master (pd.DataFrame): The master inventory.
+            previous (Optional[SearchIndex]): An older index whose tokens are re-used for rows
+                with unchanged text.
+            source (Optional[dict]): Fingerprint of the workbook, stored with the index.
+            keywords (Optional[dict[str, list[str]]]): Producer type keywords (see classify_producers).
+        Returns:
+            SearchIndex: The new index.
+        """
+        names = master['Technology Name'] if 'Technology Name' in master.columns else pd.Series(None, index=master.index)
+        descriptions = master['Description'] if 'Description' in master.columns else pd.Series(None, index=master.index)
+        hashes = np.fromiter((_text_hash(n, d) for n, d in zip(names, descriptions)), dtype=np.int64, count=len(master))
+
+        vocab = previous.vocab.tolist() if previous is not None else []
+        term_ids = dict(previous.term_ids) if previous is not None else {}
+        reusable = {h: i for i, h in enumerate(previous.text_hashes.tolist())} if previous is not None else {}
+        doc_terms, doc_tfs, counts = [], [], np.zeros(len(master), dtype=np.int64)
+        previous_terms = previous.doc_terms.tolist() if previous is not None else []
+        previous_tfs = previous.doc_tfs.tolist() if previous is not None else []
+        for i, (text_hash, name, description) in enumerate(zip(hashes.tolist(), names, descriptions)):
+            old = reusable.get(text_hash)
+            if old is not None:
+                start, end = int(previous.doc_ptr[old]), int(previous.doc_ptr[old + 1])
+                doc_terms.extend(previous_terms[start:end])
+                doc_tfs.extend(previous_tfs[start:end])
+                counts[i] = end - start
+                continue
+            weighted = Counter(tokenize(description))
+            for token in tokenize(name):
+                weighted[token] += NAME_WEIGHT
+            for token, tf in weighted.items():
+                term_id = term_ids.get(token)
+                if term_id is None:
+                    term_id = term_ids[token] = len(vocab)
+                    vocab.append(token)
+                doc_terms.append(term_id)
+                doc_tfs.append(tf)
+            counts[i] = len(weighted)
+
+        doc_ptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        doc_terms = np.array(doc_terms, dtype=np.int32)
+        doc_tfs = np.array(doc_tfs, dtype=np.float32)
+
+        # Drop terms no row uses any more and renumber the rest
+        used = np.bincount(doc_terms, minlength=len(vocab)) > 0
+        remap = np.cumsum(used) - 1
+        doc_terms = remap[doc_terms].astype(np.int32)
+        vocab = np.array(vocab, dtype=str)[used] if len(vocab) else np.zeros(0, dtype=str)
+
+        # Inverted (term -> documents) layout of the same postings
+        order = np.argsort(doc_terms, kind='stable')
+        post_docs = np.repeat(np.arange(len(master), dtype=np.int32), counts)[order]
+        term_ptr = np.concatenate(([0], np.cumsum(np.bincount(doc_terms, minlength=len(vocab))))).astype(np.int64)
+
+        trl = pd.to_numeric(master['TRL'], errors='coerce') if 'TRL' in master.columns else pd.Series(np.nan, index=master.index)
+        producers = master['Tech Producer'] if 'Tech Producer' in master.columns else pd.Series(None, index=master.index)
+        arrays = {
+            'vocab': vocab,
+            'doc_ptr': doc_ptr,
+            'doc_terms': doc_terms,
+            'doc_tfs': doc_tfs,
+            'term_ptr': term_ptr,
+            'post_docs': post_docs,
+            'post_tfs': doc_tfs[order],
+            'row_numbers': master_row_numbers(master).to_numpy(dtype=np.int64),
+            'text_hashes': hashes,
+            'trl': trl.to_numpy(dtype=np.float64, na_value=np.nan),
+            'producer_types': np.asarray(classify_producers(producers, keywords), dtype=str),
+            'tx_codes': _codes(master, TX_COLUMNS),
+            'fn_codes': _codes(master, FN_COLUMNS),
+            'names': names.astype(object).where(names.notna(), '').astype(str).to_numpy(dtype=str),
+            'producers': producers.astype(object).where(producers.notna(), '').astype(str).to_numpy(dtype=str),
+        }
+        return cls(arrays, source, keywords)
+
+    def filter_mask(self, taxonomy: Optional[str] = None, trl_min: Optional[float] = None,
+                    trl_max: Optional[float] = None, producer_types: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Boolean mask of the rows that pass the filters; see search for the arguments.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if taxonomy:
+            parsed = parse_taxonomy(taxonomy)
+            if parsed is None:
+                raise ValueError(f"'{taxonomy}' is not a taxonomy code such as TX03, TX03.1 or FN04.")
+            depth = len(parsed.path)
+            if depth > CODE_DEPTH:
+                raise ValueError(f"Taxonomy codes have at most {CODE_DEPTH} levels, got '{taxonomy}'.")
+            codes = self.fn_codes if parsed.system == 'FN' else self.tx_codes
+            mask &= codes[:, depth - 1] == parsed.code
+        if trl_min is not None:
+            mask &= self.trl >= trl_min
+        if trl_max is not None:
+            mask &= self.trl <= trl_max
+        if producer_types:
+            mask &= np.isin(self.producer_types, list(producer_types))
+        return mask
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every row for a query (0 for rows matching none of its tokens)."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.term_ptr[term_id], self.term_ptr[term_id + 1]
+            docs, tfs = self.post_docs[start:end], self.post_tfs[start:end]
+            scores[docs] += self._idf[term_id] * tfs * (BM25_K1 + 1) / (tfs + self._norm[docs])
+        return scores
+
+    def search(self, query: str = '', taxonomy: Optional[str] = None, trl_min: Optional[float] = None,
+               trl_max: Optional[float] = None, producer_types: Optional[Iterable[str]] = None,
+               limit: Optional[int] = SEARCH_LIMIT) -> pd.DataFrame:
+        """
+        Search the inventory.
+        Args:
+            query (str): Free text; rows are ranked by BM25 over their name and description.
+                Without query tokens, every row passing the filters is returned in row order.
+            taxonomy (Optional[str]): Taxonomy code such as 'TX03', 'TX03.1' or 'FN04'; matches
+                rows with that code or any code below it.
+            trl_min (Optional[float]): Lowest TRL to include; rows without a TRL are excluded.
+            trl_max (Optional[float]): Highest TRL to include; rows without a TRL are excluded.
+            producer_types (Optional[Iterable[str]]): Producer types to include (e.g. 'Academia').
+            limit (Optional[int]): Maximum number of results; None for all.
+        Returns:
+            pd.DataFrame: 'Row no.', 'Score', 'Technology Name', 'Tech Producer', 'Producer Type',
+            'Taxonomy' and 'TRL' of the results, best first.
+        """
+        mask = self.filter_mask(taxonomy, trl_min, trl_max, producer_types)
+        if tokenize(query):
+            scores = self.scores(query)
+            candidates = np.flatnonzero(mask & (scores > 0))
+            if limit is not None and len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            # Best score first; ties in row order
+            candidates = candidates[np.lexsort((self.row_numbers[candidates], -scores[candidates]))]
+        else:
+            scores = np.zeros(len(self), dtype=np.float32)
+            candidates = np.flatnonzero(mask)
+            candidates = candidates[np.argsort(self.row_numbers[candidates], kind='stable')][:limit]
+        tx = self.tx_codes[candidates]
+        return pd.DataFrame({
+            'Row no.': self.row_numbers[candidates],
+            'Score': scores[candidates].astype(float),
+            'Technology Name': self.names[candidates],
+            'Tech Producer': self.producers[candidates],
+            'Producer Type': self.producer_types[candidates],
+            'Taxonomy': np.where(tx[:, 2] != '', tx[:, 2], np.where(tx[:, 1] != '', tx[:, 1], tx[:, 0])),
+            'TRL': self.trl[candidates],
+        })
+
+    def row_numbers_for(self, query: str = '', **filters) -> list[int]:
+        """The "Row no." values of search(query, **filters), best first."""
+        return self.search(query, **filters)['Row no.'].tolist()
+
+    def save(self, path: str) -> None:
+        """Write the index (and its source fingerprint) as a .npz file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        meta = {'version': SEARCH_INDEX_VERSION, 'source': self.source, 'keywords': self.keywords}
+        arrays = {name: getattr(self, name) for name in _ARRAY_NAMES}
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['SearchIndex']:
+        """Load a saved index; None if it is missing or was written by another version."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data['meta']))
+                if meta.get('version') != SEARCH_INDEX_VERSION:
+                    return None
+                arrays = {name: data[name] for name in _ARRAY_NAMES}
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(arrays, meta.get('source'), meta.get('keywords'))
+
+
+_ARRAY_NAMES = ('vocab', 'doc_ptr', 'doc_terms', 'doc_tfs', 'term_ptr', 'post_docs', 'post_tfs', 'row_numbers',
+                'text_hashes', 'trl', 'producer_types', 'tx_codes', 'fn_codes', 'names', 'producers')
+
+
+def search_index_path(source_path: str, cache_dir: Optional[str] = None, sheet_name: str = "Inventory") -> str:
+    """Where load_search_index keeps the search index of a workbook's sheet (by default in '.cache' next to it)."""
+    cache_dir = default_cache_dir(os.path.dirname(source_path)) if cache_dir is None else cache_dir
+    slug = hashlib.sha1(f"{os.path.abspath(source_path)}::{sheet_name}".encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(source_path)}.{slug}.search.npz")
+
+
+def load_search_index(
+    inventory_path: str = INVENTORY_PATH,
+    data_dir: str = DATA_DIR,
+    sheet_name: str = "Inventory",
+    cache_dir: Optional[str] = None,
+    use_cache: bool = True,
+    keywords: Optional[dict[str, list[str]]] = None,
+    rebuild: bool = False
+) -> SearchIndex:
+    """
+    Load the search index of the master inventory, building or updating it if needed.
+
+    A saved index is used as is while the workbook is unchanged. Otherwise the master is
+    read (through the snapshot cache) and the index rebuilt, re-using the saved tokens of
+    every row whose text did not change.
+
+    Args:
+        inventory_path (str): Path to the master inventory file.
+        data_dir (str): Directory where the data files are stored.
+        sheet_name (str): Name of the sheet to read from the Excel file.
+        cache_dir (Optional[str]): Directory holding the snapshot cache and the search index; defaults to <data_dir>/.cache.
+        use_cache (bool): Set to False to neither read nor write cached files.
+        keywords (Optional[dict[str, list[str]]]): Producer type keywords (see classify_producers).
+        rebuild (bool): Tokenize every row again instead of re-using a saved index.
+    Returns:
+        SearchIndex: The up-to-date index.
+    """
+    full_path = os.path.join(data_dir, inventory_path)
+    cache_dir = default_cache_dir(data_dir) if cache_dir is None else cache_dir
+    path = search_index_path(full_path, cache_dir, sheet_name)
+    saved = SearchIndex.load(path) if use_cache and not rebuild else None
+    if saved is not None and saved.keywords == keywords and fingerprint_matches(full_path, saved.source):
+        return saved
+    master = capture_master_content(inventory_path, data_dir, sheet_name, cache_dir=cache_dir, use_cache=use_cache)
+    index = SearchIndex.build(master, previous=saved, source=file_fingerprint(full_path), keywords=keywords)
+    if use_cache:
+        index.save(path)
+    return index
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Search the master inventory's technology names and descriptions.")
+    parser.add_argument('query', type=str, nargs='?', default='', help='Search terms (leave out to list every filtered row).')
+    parser.add_argument('--taxonomy', type=str, default=None, help='Taxonomy code such as TX03, TX03.1 or FN04.')
+    parser.add_argument('--trl-min', type=float, default=None, help='Lowest TRL to include.')
+    parser.add_argument('--trl-max', type=float, default=None, help='Highest TRL to include.')
+    parser.add_argument('--producer-type', type=str, action='append', default=None,
+                        help='Producer type to include (repeat for several), e.g. Academia.')
+    parser.add_argument('--limit', type=int, default=SEARCH_LIMIT, help='Maximum number of results (0 for all).')
+    parser.add_argument('--rows-only', action='store_true', help='Print only the Row no. values, one per line.')
+    parser.add_argument('--data-dir', type=str, default=DATA_DIR, help='Directory holding the master inventory.')
+    parser.add_argument('--inventory-name', type=str, default=INVENTORY_PATH, help='Name of the master inventory file.')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for the cache and the search index (default: <data-dir>/.cache).')
+    parser.add_argument('--no-cache', action='store_true', help='Build the index in memory without reading or saving it.')
+    parser.add_argument('--rebuild', action='store_true', help='Tokenize every row again instead of updating the saved index.')
+    parser.add_argument('--producer-keywords', type=str, default=None,
+                        help='JSON file mapping producer types to keywords, in priority order.')
+    args = parser.parse_args()
+
+    keywords = load_producer_keywords(args.producer_keywords) if args.producer_keywords else None
+    index = load_search_index(args.inventory_name, args.data_dir, cache_dir=args.cache_dir,
+                              use_cache=not args.no_cache, keywords=keywords, rebuild=args.rebuild)
+    results = index.search(args.query, args.taxonomy, args.trl_min, args.trl_max, args.producer_type,
+                           limit=args.limit or None)
+    if args.rows_only:
+        print("\n".join(str(row_no) for row_no in results['Row no.']))
+    else:
+        with pd.option_context('display.max_rows', None, 'display.max_colwidth', 60, 'display.width', 200):
+            print(results.to_string(index=False) if len(results) else "No matching rows.")
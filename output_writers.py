@@ -0,0 +1,389 @@
+"""
+Batch-wise writers and readers for the standardized and slim outputs.
+
+`DataFrame.to_json(orient='records', indent=4)` builds the whole pretty-printed
+document in memory before writing it. The writers here take a frame (or a stream
+of frames) in bounded batches and write each batch as it comes, so only one batch
+is ever serialized at a time:
+
+- 'json'         the original pretty-printed records array, byte-identical to to_json(indent=4)
+- 'ndjson'       one JSON record per line; 'ndjson-gzip' and 'ndjson-zstd' compress the stream
+- 'parquet'      one row group per batch (needs pyarrow)
+- 'excel'        the original DataFrame.to_excel output (not streamed)
+- 'excel-stream' openpyxl write-only workbook, constant memory
+
+`iter_frame_batches` reads any of these back lazily, batch by batch; the format is
+taken from the file extension. Only the pretty-printed JSON array has to be parsed
+whole before it can be batched. Compressed NDJSON with zstd needs the optional
+`zstandard` package.
+"""
+from typing import Any, Iterable, Iterator, Optional
+import gzip
+import io
+import math
+import os
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+BATCH_SIZE = 50_000  # Rows serialized at a time
+GZIP_LEVEL = 6  # zlib's default trade-off; gzip.open defaults to the much slower 9
+EXCEL_MAX_ROWS = 1_048_576  # Rows per worksheet, header included
+OUTPUT_FORMATS = {  # Format -> file extension
+    'json': '.json',
+    'ndjson': '.ndjson',
+    'ndjson-gzip': '.ndjson.gz',
+    'ndjson-zstd': '.ndjson.zst',
+    'parquet': '.parquet',
+    'excel': '.xlsx',
+    'excel-stream': '.xlsx',
+}
+
+
+def output_path(stem: str, output_format: str) -> str:
+    """
+    Append the extension of an output format to a path stem.
+    Args:
+        stem (str): Path without extension, e.g. './data/standardized_data'.
+        output_format (str): One of OUTPUT_FORMATS.
+    Returns:
+        str: The full output path.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'; expected one of {', '.join(OUTPUT_FORMATS)}.")
+    return stem + OUTPUT_FORMATS[output_format]
+
+
+def detect_format(path: str) -> str:
+    """Output format of a file, from its extension ('.xlsx' files are read the same either way)."""
+    name = path.lower()
+    for output_format, extension in sorted(OUTPUT_FORMATS.items(), key=lambda item: -len(item[1])):
+        if name.endswith(extension):
+            return 'excel' if extension == '.xlsx' else output_format
+    raise ValueError(f"Cannot tell the format of '{path}' from its extension.")
+
+
+def iter_batches(df: pd.DataFrame, batch_size: int = BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """Yield consecutive slices of at most batch_size rows (nothing for an empty frame)."""
+    for start in range(0, len(df), max(batch_size, 1)):
+        yield df.iloc[start:start + batch_size]
+
+
+def _cell(value: Any) -> Any:
+    """Excel cell value: missing values become empty cells, numpy scalars Python scalars."""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class _JsonArrayWriter:
+    """Pretty-printed records array; each batch is serialized by to_json and spliced in."""
+
+    def __init__(self, path: str):
+        self._handle = open(path, 'w', encoding='utf-8')
+        self._records = 0
+
+    def write(self, batch: pd.DataFrame) -> None:
+        if batch.empty:
+            return
+        text = batch.to_json(orient='records', indent=4)
+        # "[\n    {...},\n    {...}\n]" -> "\n    {...},\n    {...}"
+        self._handle.write(("[" if self._records == 0 else ",") + text[1:-1].rstrip("\n"))
+        self._records += len(batch)
+
+    def close(self) -> None:
+        self._handle.write("[\n\n]" if self._records == 0 else "\n]")
+        self._handle.close()
+
+
+class _NdjsonWriter:
+    """One record per line, optionally through a gzip or zstd stream."""
+
+    def __init__(self, path: str, compression: Optional[str] = None):
+        self._raw = None
+        if compression == 'gzip':
+            self._handle = gzip.open(path, 'wt', encoding='utf-8', compresslevel=GZIP_LEVEL)
+        elif compression == 'zstd':
+            if zstandard is None:
+                raise ImportError("The 'ndjson-zstd' format needs the zstandard package (pip install zstandard).")
+            self._raw = open(path, 'wb')
+            self._handle = io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(self._raw), encoding='utf-8')
+        else:
+            self._handle = open(path, 'w', encoding='utf-8')
+
+    def write(self, batch: pd.DataFrame) -> None:
+        if not batch.empty:
+            self._handle.write(batch.to_json(orient='records', lines=True))
+
+    def close(self) -> None:
+        self._handle.close()
+        if self._raw is not None and not self._raw.closed:
+            self._raw.close()
+
+
+class _ParquetWriter:
+    """
+    One row group per batch. The schema is fixed by the first batch: numeric and
+    boolean columns keep their type, everything else (including object columns
+    mixing strings and numbers, such as 'Level Three Category') is written as string.
+    """
+
+    def __init__(self, path: str):
+        import pyarrow  # Optional dependency, only needed for this format
+        import pyarrow.parquet
+        self._pa = pyarrow
+        self._parquet = pyarrow.parquet
+        self._path = path
+        self._writer = None
+        self._schema = None
+
+    def _arrow_type(self, series: pd.Series):
+        pa = self._pa
+        if pd.api.types.is_bool_dtype(series):
+            return pa.bool_()
+        if pd.api.types.is_integer_dtype(series):
+            return pa.int64()
+        if pd.api.types.is_float_dtype(series):
+            return pa.float64()
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return pa.timestamp('ns')
+        return pa.string()
+
+    def _to_table(self, batch: pd.DataFrame):
+        pa = self._pa
+        arrays = []
+        for field in self._schema:
+            values = batch[field.name] if field.name in batch.columns else pd.Series(None, index=batch.index)
+            if pa.types.is_string(field.type) and pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+                values = values.astype(object).map(lambda value: None if _cell(value) is None else str(value))
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))
+        return pa.Table.from_arrays(arrays, schema=self._schema)
+
+    def write(self, batch: pd.DataFrame) -> None:
+        if self._schema is None:
+            self._schema = self._pa.schema(
+                [(str(col), self._arrow_type(batch[col])) for col in batch.columns]
+            )
+            self._writer = self._parquet.ParquetWriter(self._path, self._schema)
+        if not batch.empty:
+            self._writer.write_table(self._to_table(batch))
+
+    def close(self) -> None:
+        if self._writer is None:
+            self._parquet.write_table(self._pa.table({}), self._path)
+        else:
+            self._writer.close()
+
+
+class _ExcelStreamWriter:
+    """openpyxl write-only workbook: rows go to a temporary file as they are appended."""
+
+    def __init__(self, path: str, sheet_name: str = 'Sheet1'):
+        self._path = path
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(sheet_name)
+        self._rows = 0
+
+    def write(self, batch: pd.DataFrame) -> None:
+        if self._rows == 0:
+            self._sheet.append([str(col) for col in batch.columns])
+            self._rows = 1
+        if self._rows + len(batch) > EXCEL_MAX_ROWS:
+            raise ValueError(f"More than {EXCEL_MAX_ROWS:,} rows do not fit in one Excel sheet; "
+                             "use the ndjson or parquet format.")
+        for row in batch.itertuples(index=False, name=None):
+            self._sheet.append([_cell(value) for value in row])
+        self._rows += len(batch)
+
+    def close(self) -> None:
+        self._workbook.save(self._path)
+
+
+class _ExcelWriter:
+    """DataFrame.to_excel, as before; batches are collected and written on close."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._batches: list[pd.DataFrame] = []
+
+    def write(self, batch: pd.DataFrame) -> None:
+        self._batches.append(batch)
+
+    def close(self) -> None:
+        frame = pd.concat(self._batches) if self._batches else pd.DataFrame()
+        frame.to_excel(self._path, index=False)
+
+
+class FrameWriter:
+    """
+    Write frames to one output file in batches. Use as a context manager:
+
+        with FrameWriter(path, 'ndjson-gzip') as writer:
+            for batch in batches:
+                writer.write(batch)
+
+    Frames passed to write() are split into batches of at most batch_size rows.
+    All batches must have the same columns.
+    """
+
+    def __init__(self, path: str, output_format: str, batch_size: int = BATCH_SIZE):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}'; expected one of {', '.join(OUTPUT_FORMATS)}.")
+        self.path = path
+        self.batch_size = batch_size
+        self.rows = 0
+        match output_format:
+            case 'json':
+                self._writer = _JsonArrayWriter(path)
+            case 'ndjson':
+                self._writer = _NdjsonWriter(path)
+            case 'ndjson-gzip':
+                self._writer = _NdjsonWriter(path, 'gzip')
+            case 'ndjson-zstd':
+                self._writer = _NdjsonWriter(path, 'zstd')
+            case 'parquet':
+                self._writer = _ParquetWriter(path)
+            case 'excel':
+                self._writer = _ExcelWriter(path)
+            case 'excel-stream':
+                self._writer = _ExcelStreamWriter(path)
+        self._columns: Optional[list] = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._columns is None:
+            self._columns = list(df.columns)
+            if df.empty:
+                # Still fixes the header/schema of an output that stays empty
+                self._writer.write(df)
+        elif list(df.columns) != self._columns:
+            raise ValueError("All batches written to one output must have the same columns.")
+        for batch in iter_batches(df, self.batch_size):
+            self._writer.write(batch)
+            self.rows += len(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def __enter__(self) -> 'FrameWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_frame(df: pd.DataFrame | Iterable[pd.DataFrame], path: str, output_format: str,
+                batch_size: int = BATCH_SIZE) -> int:
+    """
+    Write a frame, or an iterable of frames, to path in bounded batches.
+    Args:
+        df (pd.DataFrame | Iterable[pd.DataFrame]): The data to write.
+        path (str): Output file path (see output_path for the usual extension).
+        output_format (str): One of OUTPUT_FORMATS.
+        batch_size (int): Maximum rows serialized at a time.
+    Returns:
+        int: Number of rows written.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    frames = [df] if isinstance(df, pd.DataFrame) else df
+    with FrameWriter(path, output_format, batch_size) as writer:
+        for frame in frames:
+            writer.write(frame)
+    return writer.rows
+
+
+def _iter_excel(path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(col) for col in header]
+        width = len(columns)
+        batch = []
+        for row in rows:
+            # Read-only worksheets drop trailing empty cells of a row
+            batch.append(row + (None,) * (width - len(row)) if len(row) < width else row[:width])
+            if len(batch) == batch_size:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _iter_ndjson(path: str, output_format: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    raw = None
+    if output_format == 'ndjson-gzip':
+        handle = gzip.open(path, 'rt', encoding='utf-8')
+    elif output_format == 'ndjson-zstd':
+        if zstandard is None:
+            raise ImportError("Reading .ndjson.zst files needs the zstandard package (pip install zstandard).")
+        raw = open(path, 'rb')
+        handle = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw), encoding='utf-8')
+    else:
+        handle = open(path, 'r', encoding='utf-8')
+    try:
+        lines = []
+        for line in handle:
+            if line.strip():
+                lines.append(line)
+            if len(lines) == batch_size:
+                yield pd.read_json(io.StringIO(''.join(lines)), lines=True, orient='records')
+                lines = []
+        if lines:
+            yield pd.read_json(io.StringIO(''.join(lines)), lines=True, orient='records')
+    finally:
+        handle.close()
+        if raw is not None:
+            raw.close()
+
+
+def iter_frame_batches(path: str, batch_size: int = BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Read an output file back lazily, batch_size rows at a time.
+    Args:
+        path (str): A file written by write_frame (format taken from the extension).
+        batch_size (int): Maximum rows per yielded frame.
+    Returns:
+        Iterator[pd.DataFrame]: The file's rows in order, with a fresh positional index per batch.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"The file {path} does not exist.")
+    output_format = detect_format(path)
+    if output_format == 'json':
+        # A pretty-printed array cannot be split before parsing it
+        yield from iter_batches(pd.read_json(path, orient='records'), batch_size)
+    elif output_format.startswith('ndjson'):
+        yield from _iter_ndjson(path, output_format, batch_size)
+    elif output_format == 'parquet':
+        import pyarrow.parquet
+        for record_batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield record_batch.to_pandas()
+    else:
+        yield from _iter_excel(path, batch_size)
+
+
+def read_frame(path: str) -> pd.DataFrame:
+    """Read a whole output file written by write_frame (format taken from the extension)."""
+    output_format = detect_format(path)
+    if output_format == 'json':
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"The file {path} does not exist.")
+        return pd.read_json(path, orient='records')
+    batches = list(iter_frame_batches(path))
+    if not batches:
+        return pd.DataFrame()
+    return pd.concat(batches, ignore_index=True)
@@ -0,0 +1,257 @@
+"""
+Single-process pipeline from the two workbooks to the slim appendix table.
+
+Running inventory_processor.py and then scrape_standard_for_appendix.py hands the
+standardized frame over through standardized_data.json: it is pretty-printed,
+written, parsed back and has its dtypes re-inferred. This module chains the same
+steps in one process and passes the frames in memory:
+
+    capture      FILTERED.xlsx + INVENTORY.xlsx -> metadata, master
+    standardize  metadata, master               -> standardized
+    slim         standardized                   -> slim
+    fill         slim                           -> appendix
+
+Each stage is declared once in STAGES with the artifacts it needs and provides.
+Any subset can be run; an artifact needed by a selected stage and not produced by
+an earlier selected stage must be supplied, as a frame or as a file written by
+output_writers. Intermediate artifacts are only written to disk when asked for.
+
+Usage:
+    python pipeline.py --data-dir ./data --output ./data/slim_data
+    python pipeline.py --write standardized=./data/standardized_data.json
+    python pipeline.py --stages slim fill --input standardized=./data/standardized_data.json
+"""
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Callable, Optional
+import pandas as pd
+
+from inventory_cache import default_cache_dir
+from inventory_processor import (
+    DATA_DIR, FILTERED_PATH, INVENTORY_PATH, DUPLICATE_POLICIES, DUPLICATE_POLICY, WORKERS,
+    capture_inputs, standardize_data, rename_output_columns
+)
+from output_writers import OUTPUT_FORMATS, BATCH_SIZE, detect_format, output_path, read_frame, write_frame
+from producer_entities import load_producer_entities
+from profiling import stage, add_profiling_arguments, start_from_args, finish_from_args
+from scrape_standard_for_appendix import (
+    SLIM_PATH, create_slim_dataframe, fill_appendix_columns, load_producer_keywords
+)
+
+
+@dataclass
+class PipelineOptions:
+    """Settings shared by the stages; the defaults match the two scripts' defaults."""
+    data_dir: str = DATA_DIR
+    filtered_path: str = FILTERED_PATH
+    inventory_path: str = INVENTORY_PATH
+    selective: bool = False
+    workers: int = WORKERS
+    duplicate_policy: str = DUPLICATE_POLICY
+    cache_dir: Optional[str] = None  # Defaults to <data_dir>/.cache
+    use_cache: bool = True
+    compact: bool = False
+    producer_keywords: Optional[dict[str, list[str]]] = None
+    resolve_producers: bool = False
+    batch_size: int = BATCH_SIZE
+
+    def __post_init__(self) -> None:
+        if self.cache_dir is None:
+            self.cache_dir = default_cache_dir(self.data_dir)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One pipeline step: reads the `requires` artifacts and returns the `provides` ones."""
+    name: str
+    requires: tuple[str, ...]
+    provides: tuple[str, ...]
+    run: Callable[[dict[str, pd.DataFrame], PipelineOptions], dict[str, pd.DataFrame]]
+
+
+def _capture(artifacts: dict[str, pd.DataFrame], options: PipelineOptions) -> dict[str, pd.DataFrame]:
+    metadata, _, master = capture_inputs(
+        options.data_dir, options.filtered_path, options.inventory_path,
+        selective=options.selective, workers=options.workers, duplicate_policy=options.duplicate_policy,
+        cache_dir=options.cache_dir, use_cache=options.use_cache, compact=options.compact
+    )
+    return {'metadata': metadata, 'master': master}
+
+
+def _standardize(artifacts: dict[str, pd.DataFrame], options: PipelineOptions) -> dict[str, pd.DataFrame]:
+    metadata = artifacts['metadata']
+    # The metadata index holds the row numbers in filtered-workbook order
+    standardized = standardize_data(artifacts['master'], metadata, metadata.index.tolist())
+    return {'standardized': rename_output_columns(standardized)}
+
+
+def _slim(artifacts: dict[str, pd.DataFrame], options: PipelineOptions) -> dict[str, pd.DataFrame]:
+    return {'slim': create_slim_dataframe(artifacts['standardized'])}
+
+
+def _fill(artifacts: dict[str, pd.DataFrame], options: PipelineOptions) -> dict[str, pd.DataFrame]:
+    slim = artifacts['slim']
+    entities = load_producer_entities(slim['Tech Producer'], options.cache_dir, options.use_cache) \
+        if options.resolve_producers else None
+    # The fill_* steps modify their input; keep the 'slim' artifact as it was
+    return {'appendix': fill_appendix_columns(slim.copy(), options.producer_keywords, entities)}
+
+
+STAGES = (
+    Stage('capture', requires=(), provides=('metadata', 'master'), run=_capture),
+    Stage('standardize', requires=('metadata', 'master'), provides=('standardized',), run=_standardize),
+    Stage('slim', requires=('standardized',), provides=('slim',), run=_slim),
+    Stage('fill', requires=('slim',), provides=('appendix',), run=_fill),
+)
+STAGE_NAMES = tuple(s.name for s in STAGES)
+ARTIFACTS = tuple(artifact for s in STAGES for artifact in s.provides)
+INDEXED_ARTIFACTS = {'metadata', 'master'}  # Frames that may be indexed by 'Row no.'
+
+
+def select_stages(names: Optional[list[str]] = None) -> list[Stage]:
+    """
+    Stages to run, in pipeline order.
+    Args:
+        names (Optional[list[str]]): Stage names; all stages if None.
+    Returns:
+        list[Stage]: The selected stages.
+    """
+    if names is None:
+        return list(STAGES)
+    unknown = [name for name in names if name not in STAGE_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown stage(s) {', '.join(unknown)}; expected some of {', '.join(STAGE_NAMES)}.")
+    return [s for s in STAGES if s.name in names]
+
+
+def missing_artifacts(stages: list[Stage], available: set[str]) -> list[str]:
+    """Artifacts the stages need that neither an earlier selected stage nor `available` provides."""
+    provided, missing = set(available), []
+    for s in stages:
+        missing += [artifact for artifact in s.requires if artifact not in provided and artifact not in missing]
+        provided.update(s.provides)
+    return missing
+
+
+def load_artifact(name: str, path: str) -> pd.DataFrame:
+    """Read an artifact written by write_artifact (or any file output_writers can read)."""
+    frame = read_frame(path)
+    if name in INDEXED_ARTIFACTS and 'Row no.' in frame.columns:
+        frame = frame.set_index('Row no.')
+    return frame
+
+
+def write_artifact(frame: pd.DataFrame, path: str, batch_size: int = BATCH_SIZE) -> None:
+    """Write an artifact, format taken from the extension; a 'Row no.' index is kept as a column."""
+    if frame.index.name == 'Row no.':
+        frame = frame.reset_index()
+    write_frame(frame, path, detect_format(path), batch_size)
+
+
+def run_pipeline(
+    stages: Optional[list[str]] = None,
+    inputs: Optional[dict[str, pd.DataFrame | str]] = None,
+    write: Optional[dict[str, str]] = None,
+    options: Optional[PipelineOptions] = None
+) -> dict[str, pd.DataFrame]:
+    """
+    Run the selected stages in one process, passing frames between them in memory.
+    Args:
+        stages (Optional[list[str]]): Names of the stages to run (see STAGES); all if None.
+        inputs (Optional[dict[str, pd.DataFrame | str]]): Artifacts the selected stages need but
+            do not produce, as frames or as paths to files written by output_writers.
+        write (Optional[dict[str, str]]): Artifact name -> path to write it to once produced;
+            the format is taken from the extension. Nothing is written otherwise.
+        options (Optional[PipelineOptions]): Paths and settings for the stages.
+    Returns:
+        dict[str, pd.DataFrame]: All artifacts, supplied and produced, by name.
+    """
+    options = options or PipelineOptions()
+    selected = select_stages(stages)
+    inputs, write = inputs or {}, write or {}
+    missing = missing_artifacts(selected, set(inputs))
+    if missing:
+        raise ValueError(f"Stages {', '.join(s.name for s in selected)} need {', '.join(missing)}; "
+                         "run the stages producing them or pass them as inputs.")
+    unknown = [name for name in list(inputs) + list(write) if name not in ARTIFACTS]
+    if unknown:
+        raise ValueError(f"Unknown artifact(s) {', '.join(unknown)}; expected some of {', '.join(ARTIFACTS)}.")
+
+    artifacts = {
+        name: load_artifact(name, value) if isinstance(value, str) else value
+        for name, value in inputs.items()
+    }
+    for s in selected:
+        with stage(s.name):
+            artifacts.update(s.run(artifacts, options))
+        for name in s.provides:
+            if name in write:
+                with stage(f'write_{name}', rows_in=len(artifacts[name])):
+                    write_artifact(artifacts[name], write[name], options.batch_size)
+    return artifacts
+
+
+def _parse_assignments(values: list[str], flag: str) -> dict[str, str]:
+    assignments = {}
+    for value in values:
+        name, sep, path = value.partition('=')
+        if not sep or not path:
+            raise ValueError(f"{flag} expects ARTIFACT=PATH, got '{value}'.")
+        assignments[name] = path
+    return assignments
+
+
+def main():
+    """Main function to execute the pipeline from the command line."""
+    parser = ArgumentParser(description="Run capture, standardize, slim and fill in one process.")
+    parser.add_argument('--stages', type=str, nargs='+', choices=STAGE_NAMES, default=None,
+                        help='Stages to run (default: all, in pipeline order).')
+    parser.add_argument('--input', type=str, action='append', default=[], metavar='ARTIFACT=PATH',
+                        help=f"Supply an artifact the selected stages do not produce ({', '.join(ARTIFACTS)}).")
+    parser.add_argument('--write', type=str, action='append', default=[], metavar='ARTIFACT=PATH',
+                        help='Also write an intermediate artifact; the format is taken from the extension.')
+    parser.add_argument('--output', type=str, default=SLIM_PATH,
+                        help="Path (without extension) for the last selected stage's main artifact.")
+    parser.add_argument('--save-type', type=str, choices=list(OUTPUT_FORMATS), default='json',
+                        help='Format of --output.')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows serialized at a time when writing.')
+    parser.add_argument('--data-dir', type=str, default=DATA_DIR, help='Directory where the data files are stored.')
+    parser.add_argument('--inventory-name', type=str, default=INVENTORY_PATH, help='Name of the master inventory file.')
+    parser.add_argument('--filtered-name', type=str, default=FILTERED_PATH, help='Name of the filtered data file.')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for the parsed master inventory cache (default: <data-dir>/.cache).')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-parse the master inventory instead of using the cache.')
+    parser.add_argument('--selective', action='store_true', help='Stream only the master rows referenced by the filtered file.')
+    parser.add_argument('--compact', action='store_true',
+                        help='Load the master inventory with compact dtypes and print a per-column memory report.')
+    parser.add_argument('--duplicate-policy', type=str, choices=DUPLICATE_POLICIES, default=DUPLICATE_POLICY,
+                        help='Which entry to keep when a Row no. appears on more than one filtered sheet.')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help='Processes used to parse filtered sheets; above 1 the master is also loaded concurrently.')
+    parser.add_argument('--producer-keywords', type=str, default=None,
+                        help='JSON file mapping producer types to keywords, in match priority order.')
+    parser.add_argument('--resolve-producers', action='store_true',
+                        help='Group variants of each producer name and give them all the same producer type.')
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+
+    options = PipelineOptions(
+        data_dir=args.data_dir, filtered_path=args.filtered_name, inventory_path=args.inventory_name,
+        selective=args.selective, workers=args.workers, duplicate_policy=args.duplicate_policy,
+        cache_dir=args.cache_dir, use_cache=not args.no_cache, compact=args.compact,
+        producer_keywords=load_producer_keywords(args.producer_keywords) if args.producer_keywords else None,
+        resolve_producers=args.resolve_producers, batch_size=args.batch_size,
+    )
+    stages = select_stages(args.stages)
+    write = _parse_assignments(args.write, '--write')
+    # An explicit --write of the final artifact takes precedence over --output
+    path = write.setdefault(stages[-1].provides[0], output_path(args.output, args.save_type))
+
+    start_from_args(args)
+    run_pipeline([s.name for s in stages], _parse_assignments(args.input, '--input'), write, options)
+    print(f"Pipeline complete ({', '.join(s.name for s in stages)}). Output saved to '{path}'.")
+    finish_from_args(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Entity resolution for 'Tech Producer' names.
+
+The master spells one organization many ways: "Ames Research Center (NASA Center)",
+"NASA Ames", "MicroLink Devices, Inc. (Industry)" and "MicroLink Devices". This
+module groups such variants under one canonical producer:
+
+- names are normalized: parentheticals such as "(Industry)" or "(NASA Center)" and
+  legal forms (Inc., LLC, Corp., ...) are dropped, case, punctuation and whitespace
+  ignored, and the names of a NASA center ("NASA Ames", "Ames Research Center") share
+  one key. Names with the same normalized key are one entity;
+- distinct keys are compared only within blocks: keys sharing a token or a token's
+  first PREFIX_LENGTH letters. Blocks of more than MAX_BLOCK_SIZE keys (words such as
+  'university') are too common to tell organizations apart and are skipped, so the
+  number of comparisons grows close to linearly with the number of producers;
+- a candidate pair is rejected when one key has a distinctive (non-generic) token the
+  other lacks, allowing for typos and split words, so "University of North Florida"
+  stays apart from "University of South Florida" and "University of Texas at Austin"
+  from "University of Texas";
+- otherwise it matches when the cosine of its character trigrams reaches the threshold,
+  or when it shares at least MIN_SHARED_TOKENS non-generic tokens and the IDF-weighted
+  cosine of its tokens reaches the threshold. Words common to many producers ('NASA',
+  'Research', 'Center', ...) weigh little and never count as shared, so one distinctive
+  word is not enough: "Ames Laboratory" stays apart from "Ames Research Center" and
+  "NASA Ames".
+  Matches are merged transitively;
+- each entity is named after its most frequent variant.
+
+Resolutions are cached as JSON in the cache directory, keyed by the producer names
+and their counts, and are used by fill_producer_type (so every variant of a producer
+gets the same producer type) and by reporting.
+
+Usage:
+    python producer_entities.py --data-dir ./data [--output ./data/producer_entities.csv]
+"""
+from argparse import ArgumentParser
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Iterable
+import hashlib
+import json
+import math
+import os
+import re
+import numpy as np
+import pandas as pd
+
+from inventory_cache import default_cache_dir
+
+
+ENTITY_VERSION = 4  # Bump when normalization or matching changes
+MATCH_THRESHOLD = 0.8  # Lowest similarity at which two producer keys are the same entity
+MIN_SHARED_TOKENS = 2  # Non-generic tokens two keys must share to match on token similarity
+MAX_BLOCK_SIZE = 200  # Blocks with more keys than this are not compared
+PREFIX_LENGTH = 4  # Letters of a token used as an extra, typo-tolerant blocking key
+GENERIC_WEIGHT = 0.2  # Weight factor of GENERIC_TOKENS
+LEGAL_FORMS = {
+    'inc', 'incorporated', 'llc', 'ltd', 'limited', 'corp', 'corporation', 'co', 'company', 'plc', 'lp', 'llp',
+    'gmbh', 'ag', 'sa', 'bv', 'pty', 'the',
+}
+GENERIC_TOKENS = {
+    'nasa', 'research', 'center', 'centre', 'space', 'flight', 'laboratory', 'laboratories', 'lab', 'labs',
+    'national', 'agency', 'of', 'and', 'for', 'at', 'technologies', 'technology', 'systems', 'inc', 'main', 'campus',
+}
+NASA_CENTERS = {  # Distinctive word of each NASA center: "NASA Ames" is "Ames Research Center"
+    'ames', 'armstrong', 'glenn', 'goddard', 'johnson', 'kennedy', 'langley', 'marshall', 'stennis',
+}
+NASA_CENTER_WORDS = {'nasa', 'research', 'center', 'centre', 'space', 'flight'}
+_PARENTHETICAL = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def producer_key(name: object) -> str:
+    """Normalized form of a producer name ('' for missing values); equal keys are the same entity."""
+    if not isinstance(name, str):
+        return ''
+    text = _PARENTHETICAL.sub(' ', name.lower()).replace('&', ' and ')
+    tokens = [token for token in _NON_WORD.split(text) if token and token not in LEGAL_FORMS]
+    center = [token for token in tokens if token not in NASA_CENTER_WORDS]
+    if len(center) == 1 and center[0] in NASA_CENTERS and len(center) < len(tokens):
+        return f"nasa {center[0]}"  # "NASA Ames", "Ames Research Center", "NASA Ames Research Center"
+    return ' '.join(tokens)
+
+
+def _trigrams(key: str) -> Counter:
+    padded = f"  {key} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _cosine(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(weight * b[item] for item, weight in a.items() if item in b)
+    if not dot:
+        return 0.0
+    return dot / math.sqrt(sum(w * w for w in a.values()) * sum(w * w for w in b.values()))
+
+
+def _tokens_align(a: set[str], b: set[str], key_a: str, key_b: str) -> bool:
+    """
+    Whether every distinctive token of each key has a counterpart in the other: the same
+    token, the same first PREFIX_LENGTH letters (typos), or a piece of the other key written
+    without spaces ("micro link" and "microlink").
+    """
+    for tokens, other, other_key in ((a, b, key_b), (b, a, key_a)):
+        joined = other_key.replace(' ', '')
+        prefixes = {token[:PREFIX_LENGTH] for token in other if len(token) >= PREFIX_LENGTH}
+        for token in tokens - other - GENERIC_TOKENS:
+            if token not in joined and (len(token) < PREFIX_LENGTH or token[:PREFIX_LENGTH] not in prefixes):
+                return False
+    return True
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def _match_keys(keys: list[str], threshold: float, max_block_size: int) -> list[int]:
+    """Entity number of each distinct key: blocking, pairwise scoring within blocks, union-find."""
+    tokens = [set(key.split()) for key in keys]
+    frequency = Counter(token for token_set in tokens for token in token_set)
+    idf = {token: math.log(1 + len(keys) / count) * (GENERIC_WEIGHT if token in GENERIC_TOKENS else 1.0)
+           for token, count in frequency.items()}
+    blocks = defaultdict(list)
+    for i, token_set in enumerate(tokens):
+        for token in token_set:
+            if token in GENERIC_TOKENS:
+                continue
+            blocks['t:' + token].append(i)
+            if len(token) > PREFIX_LENGTH:
+                blocks['p:' + token[:PREFIX_LENGTH]].append(i)
+
+    vectors: dict[int, dict] = {}
+    trigrams: dict[int, Counter] = {}
+    seen: set[tuple[int, int]] = set()
+    groups = _UnionFind(len(keys))
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > max_block_size:
+            continue
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                a, b = members[x], members[y]
+                if (a, b) in seen or groups.find(a) == groups.find(b):
+                    continue
+                seen.add((a, b))
+                for i in (a, b):
+                    if i not in vectors:
+                        vectors[i] = {token: idf[token] for token in tokens[i]}
+                        trigrams[i] = _trigrams(keys[i])
+                if not _tokens_align(tokens[a], tokens[b], keys[a], keys[b]):
+                    continue  # A distinctive word only one name has tells the organizations apart
+                if _cosine(trigrams[a], trigrams[b]) >= threshold or (
+                        len((tokens[a] & tokens[b]) - GENERIC_TOKENS) >= MIN_SHARED_TOKENS
+                        and _cosine(vectors[a], vectors[b]) >= threshold):
+                    groups.union(a, b)
+    return [groups.find(i) for i in range(len(keys))]
+
+
+@dataclass
+class ProducerEntities:
+    """Canonical producer of every known producer name."""
+    canonical: dict[str, str]  # Producer name -> canonical name of its entity
+
+    def canonical_names(self, producers: pd.Series) -> pd.Series:
+        """Canonical name of each producer; names that were not resolved are kept as they are."""
+        return producers.map(self.canonical).where(producers.isin(self.canonical.keys()), producers)
+
+    def groups(self) -> dict[str, list[str]]:
+        """Canonical name -> all its variants, for entities with more than one."""
+        grouped = defaultdict(list)
+        for name, canonical in self.canonical.items():
+            grouped[canonical].append(name)
+        return {canonical: sorted(names) for canonical, names in grouped.items() if len(names) > 1}
+
+    def unify_labels(self, producers: pd.Series, labels: np.ndarray, priority: Iterable[str],
+                     unknown: str = 'Unknown') -> np.ndarray:
+        """
+        Give every variant of an entity the same label: the most common known label among its
+        rows, ties broken by `priority` order. Entities with only `unknown` labels keep it.
+        """
+        frame = pd.DataFrame({'entity': self.canonical_names(producers).to_numpy(), 'label': labels})
+        known = frame[frame['label'] != unknown]
+        if known.empty:
+            return np.asarray(labels, dtype=object)
+        rank = {label: i for i, label in enumerate(priority)}
+        counts = known.groupby(['entity', 'label'], sort=False).size().reset_index(name='rows')
+        counts['rank'] = counts['label'].map(rank).fillna(len(rank))
+        best = counts.sort_values(['rows', 'rank'], ascending=[False, True]).drop_duplicates('entity')
+        unified = frame['entity'].map(best.set_index('entity')['label'])
+        return unified.where(unified.notna(), frame['label']).to_numpy(dtype=object)
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per producer name with its canonical name, sorted by canonical name."""
+        return pd.DataFrame(
+            sorted(self.canonical.items(), key=lambda item: (item[1], item[0])), columns=['Tech Producer', 'Canonical Producer']
+        )
+
+
+def resolve_producers(producers: pd.Series, threshold: float = MATCH_THRESHOLD,
+                      max_block_size: int = MAX_BLOCK_SIZE) -> ProducerEntities:
+    """
+    Group producer name variants into entities.
+    Args:
+        producers (pd.Series): Producer names, one per row; counts decide each entity's name.
+        threshold (float): Lowest similarity (0-1) at which two normalized names are merged.
+        max_block_size (int): Blocks with more names than this are not compared.
+    Returns:
+        ProducerEntities: The canonical name of every distinct producer.
+    """
+    counts = producers.dropna()[producers.dropna().map(lambda v: isinstance(v, str))].value_counts(sort=False)
+    names = counts.index.tolist()
+    name_keys = [producer_key(name) for name in names]
+    keys = list(dict.fromkeys(name_keys))
+    entity_of_key = dict(zip(keys, _match_keys(keys, threshold, max_block_size)))
+
+    # Most rows first, then the shorter name, then alphabetical, so the choice is deterministic
+    ranked = sorted(range(len(names)), key=lambda i: (-counts.iloc[i], len(names[i]), names[i]))
+    canonical_of_entity: dict[int, str] = {}
+    for i in ranked:
+        canonical_of_entity.setdefault(entity_of_key[name_keys[i]], names[i])
+    return ProducerEntities({name: canonical_of_entity[entity_of_key[key]] for name, key in zip(names, name_keys)})
+
+
+def entities_path(producers: pd.Series, cache_dir: str, threshold: float = MATCH_THRESHOLD) -> str:
+    """Cache file of a resolution, keyed by the producer names, their counts and the settings."""
+    counts = producers.dropna().astype(str).value_counts().sort_index()
+    digest = hashlib.sha256(json.dumps(
+        [ENTITY_VERSION, threshold, MAX_BLOCK_SIZE, MIN_SHARED_TOKENS, list(counts.index), counts.tolist()]
+    ).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"producer_entities.{digest}.json")
+
+
+def load_producer_entities(producers: pd.Series, cache_dir: str, use_cache: bool = True,
+                           threshold: float = MATCH_THRESHOLD) -> ProducerEntities:
+    """
+    Resolve producers, re-using the cached resolution of the same names.
+    Args:
+        producers (pd.Series): Producer names, one per row (e.g. the 'Tech Producer' column).
+        cache_dir (str): Directory holding the cached resolutions (e.g. default_cache_dir(data_dir)).
+        use_cache (bool): Set to False to neither read nor write the cache.
+        threshold (float): See resolve_producers.
+    Returns:
+        ProducerEntities: The canonical name of every distinct producer.
+    """
+    path = entities_path(producers, cache_dir, threshold)
+    if use_cache and os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as handle:
+                return ProducerEntities(json.load(handle)['canonical'])
+        except (OSError, ValueError, KeyError):
+            pass  # A damaged cache file is rebuilt below
+    entities = resolve_producers(producers, threshold)
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as handle:
+            json.dump({'version': ENTITY_VERSION, 'canonical': entities.canonical}, handle)
+        os.replace(tmp, path)
+    return entities
+
+
+if __name__ == "__main__":
+    from inventory_processor import DATA_DIR, INVENTORY_PATH, capture_master_content
+
+    parser = ArgumentParser(description="Group variants of the master inventory's producer names.")
+    parser.add_argument('--data-dir', type=str, default=DATA_DIR, help='Directory holding the master inventory.')
+    parser.add_argument('--inventory-name', type=str, default=INVENTORY_PATH, help='Name of the master inventory file.')
+    parser.add_argument('--threshold', type=float, default=MATCH_THRESHOLD, help='Lowest similarity (0-1) to merge two names.')
+    parser.add_argument('--output', type=str, default=None, help='Write every name and its canonical name to this CSV file.')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for the cache and the resolutions (default: <data-dir>/.cache).')
+    parser.add_argument('--no-cache', action='store_true', help='Resolve again instead of using a cached resolution.')
+    args = parser.parse_args()
+
+    master = capture_master_content(args.inventory_name, args.data_dir, cache_dir=args.cache_dir, use_cache=not args.no_cache)
+    entities = load_producer_entities(master['Tech Producer'], args.cache_dir or default_cache_dir(args.data_dir),
+                                      not args.no_cache, args.threshold)
+    groups = entities.groups()
+    print(f"{len(entities.canonical)} producer names form {len(set(entities.canonical.values()))} entities; "
+          f"{len(groups)} have several variants.")
+    for canonical, names in sorted(groups.items()):
+        print(f"{canonical}: {' | '.join(name for name in names if name != canonical)}")
+    if args.output:
+        entities.to_frame().to_csv(args.output, index=False)
+        print(f"Resolution written to '{args.output}'.")
@@ -0,0 +1,256 @@
+"""
+Lightweight per-stage instrumentation for the pipeline scripts.
+
+Pipeline functions are wrapped with @profiled_stage and inline steps with
+`with stage(...)`. While profiling is off both reduce to a single global check,
+so normal runs pay nothing measurable. With profiling on (the --profile flag of
+both CLIs) each stage records:
+
+- wall time and CPU time,
+- the process's peak RSS after the stage,
+- the tracemalloc peak above the memory in use when the stage started,
+- rows in (first frame/dict/list argument) and rows out (the result),
+
+and optionally a cProfile dump per top-level stage. Stages may nest; nested
+stages are recorded with their depth and their memory peaks are folded into
+their parents'. Only stages run on the thread that enabled profiling are
+recorded (e.g. the concurrent master load of --workers runs untraced inside
+its caller's stage). The trace can be saved as JSON and printed as a summary table.
+"""
+from argparse import ArgumentParser, Namespace
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, asdict, field
+from functools import wraps
+from typing import Any, Callable, Iterator, Optional
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+PROFILE_OUTPUT = './profile_trace.json'  # Default path of the JSON trace
+
+
+@dataclass
+class StageRecord:
+    """Measurements for one execution of one stage."""
+    stage: str
+    depth: int
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_mb: Optional[float] = None
+    traced_peak_delta_mb: Optional[float] = None
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    cprofile_path: Optional[str] = None
+    _traced_start: int = field(default=0, repr=False)
+    _traced_peak: int = field(default=0, repr=False)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def count_rows(value: Any) -> Optional[int]:
+    """Row count of a frame, dict or list, or of the first such item of a tuple."""
+    if isinstance(value, tuple):
+        return next((count_rows(item) for item in value if count_rows(item) is not None), None)
+    if hasattr(value, 'shape') and len(getattr(value, 'shape', ())) >= 1:
+        return int(value.shape[0])
+    if isinstance(value, (dict, list)):
+        return len(value)
+    return None
+
+
+class Profiler:
+    """Collects StageRecords for the stages run while it is active."""
+
+    def __init__(self, trace_memory: bool = True, cprofile_dir: Optional[str] = None):
+        self.trace_memory = trace_memory
+        self.cprofile_dir = cprofile_dir
+        self.records: list[StageRecord] = []
+        self._stack: list[StageRecord] = []
+        self._started_tracing = False
+        self._thread = threading.get_ident()
+
+    def owns_current_thread(self) -> bool:
+        return threading.get_ident() == self._thread
+
+    def start(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.cprofile_dir:
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+
+    def stop(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def measure(self, name: str, rows_in: Optional[int] = None) -> Iterator[StageRecord]:
+        """Measure the enclosed block as one stage; set `rows_out` on the yielded record."""
+        record = StageRecord(stage=name, depth=len(self._stack), rows_in=rows_in)
+        self.records.append(record)
+        position = len(self.records)
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # Keep the parent's peak before resetting it for this stage
+                self._stack[-1]._traced_peak = max(self._stack[-1]._traced_peak, peak)
+            tracemalloc.reset_peak()
+            record._traced_start = record._traced_peak = current
+        profile = None
+        if self.cprofile_dir and not self._stack:
+            profile = cProfile.Profile()
+        self._stack.append(record)
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        try:
+            if profile is not None:
+                profile.enable()
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            record.wall_s = time.perf_counter() - wall_start
+            record.cpu_s = time.process_time() - cpu_start
+            self._stack.pop()
+            record.peak_rss_mb = _peak_rss_mb()
+            if self.trace_memory:
+                record._traced_peak = max(record._traced_peak, tracemalloc.get_traced_memory()[1])
+                record.traced_peak_delta_mb = (record._traced_peak - record._traced_start) / 2**20
+                if self._stack:
+                    self._stack[-1]._traced_peak = max(self._stack[-1]._traced_peak, record._traced_peak)
+            if profile is not None:
+                slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+                record.cprofile_path = os.path.join(self.cprofile_dir, f"{position:02d}-{slug}.prof")
+                profile.dump_stats(record.cprofile_path)
+
+    def run(self, name: str, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        rows_in = next((count_rows(arg) for arg in args if count_rows(arg) is not None), None)
+        with self.measure(name, rows_in) as record:
+            result = func(*args, **kwargs)
+            record.rows_out = count_rows(result)
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_memory': self.trace_memory,
+            'stages': [
+                {key: value for key, value in asdict(record).items() if not key.startswith('_')}
+                for record in self.records
+            ],
+        }
+
+    def save(self, path: str) -> None:
+        """Write the trace as JSON."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+
+    def summary_table(self) -> str:
+        """Human-readable table of all stages, nested stages indented under their parents."""
+        header = f"{'Stage':<40} {'Wall s':>9} {'CPU s':>9} {'Peak RSS MB':>12} {'Alloc MB':>9} {'Rows in':>9} {'Rows out':>9}"
+        lines = [header, '-' * len(header)]
+
+        def fmt(value: Optional[float], spec: str) -> str:
+            return '-' if value is None else format(value, spec)
+
+        for record in self.records:
+            name = ('  ' * record.depth + record.stage)[:40]
+            lines.append(
+                f"{name:<40} {record.wall_s:>9.3f} {record.cpu_s:>9.3f} "
+                f"{fmt(record.peak_rss_mb, '>12.1f')} {fmt(record.traced_peak_delta_mb, '>9.1f')} "
+                f"{fmt(record.rows_in, '>9d')} {fmt(record.rows_out, '>9d')}"
+            )
+        return "\n".join(lines)
+
+
+_PROFILER: Optional[Profiler] = None
+_UNRECORDED = StageRecord(stage='', depth=0)  # Yielded by stage() when nothing is recorded
+
+
+def enable_profiling(trace_memory: bool = True, cprofile_dir: Optional[str] = None) -> Profiler:
+    """Start recording stages; returns the active Profiler."""
+    global _PROFILER
+    disable_profiling()
+    _PROFILER = Profiler(trace_memory=trace_memory, cprofile_dir=cprofile_dir)
+    _PROFILER.start()
+    return _PROFILER
+
+
+def disable_profiling() -> Optional[Profiler]:
+    """Stop recording stages; returns the Profiler that was active, if any."""
+    global _PROFILER
+    profiler, _PROFILER = _PROFILER, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+def profiled_stage(name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator recording every call of a function as a stage while profiling is enabled."""
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        stage_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _PROFILER is None or not _PROFILER.owns_current_thread():
+                return func(*args, **kwargs)
+            return _PROFILER.run(stage_name, func, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def stage(name: str, rows_in: Optional[int] = None):
+    """
+    Context manager recording the enclosed block as a stage while profiling is enabled.
+    Yields the StageRecord so the block can set its `rows_out`.
+    """
+    if _PROFILER is None or not _PROFILER.owns_current_thread():
+        return nullcontext(_UNRECORDED)
+    return _PROFILER.measure(name, rows_in)
+
+
+def add_profiling_arguments(parser: ArgumentParser, default_output: str = PROFILE_OUTPUT) -> None:
+    """Add the --profile family of options to a CLI parser."""
+    parser.add_argument('--profile', action='store_true',
+                        help='Record per-stage timing and memory, print a summary and save a JSON trace.')
+    parser.add_argument('--profile-output', type=str, default=default_output,
+                        help='Path of the JSON trace written with --profile.')
+    parser.add_argument('--profile-no-memory', action='store_true',
+                        help='With --profile, skip tracemalloc (it slows allocation-heavy stages).')
+    parser.add_argument('--profile-cprofile-dir', type=str, default=None,
+                        help='With --profile, also dump a cProfile .prof file per top-level stage here.')
+
+
+def start_from_args(args: Namespace) -> Optional[Profiler]:
+    """Enable profiling if the CLI asked for it."""
+    if not args.profile:
+        return None
+    return enable_profiling(trace_memory=not args.profile_no_memory, cprofile_dir=args.profile_cprofile_dir)
+
+
+def finish_from_args(args: Namespace) -> None:
+    """Stop profiling, print the summary table and save the JSON trace."""
+    profiler = disable_profiling()
+    if profiler is None:
+        return
+    print(profiler.summary_table())
+    profiler.save(args.profile_output)
+    print(f"Profile trace saved to '{args.profile_output}'.")
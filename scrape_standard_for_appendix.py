@@ -1,6 +1,16 @@
 from argparse import ArgumentParser
+from functools import lru_cache
+from typing import Iterator
+import json
+import re
+import numpy as np
 import pandas as pd
 import os
+from profiling import profiled_stage, stage, add_profiling_arguments, start_from_args, finish_from_args
+from inventory_cache import default_cache_dir
+from producer_entities import ProducerEntities, load_producer_entities
+from taxonomy import normalize_labels
+from output_writers import OUTPUT_FORMATS, BATCH_SIZE, output_path, write_frame, read_frame, iter_frame_batches
 
 COLUMNS = [
     "Technology Name",
@@ -16,18 +26,59 @@ COLUMNS = [
 STANDARDIZED_PATH = "./data/standardized_data.json"
 SLIM_PATH = "./data/slim_data"
 
-def get_dataframe_from_json(file_path: str) -> pd.DataFrame:
+ACADEMIA_KEYWORDS = ["University", "College", "Institute", "Academy", "(Academia)"]
+GOVERNMENT_KEYWORDS = [
+    "AFRL",
+    "NASA",
+    "National Aeronautics and Space Administration",
+    "NASA Ames",
+    "Ames Research Center",
+    "NASA Langley",
+    "Langley Research Center",
+    "Goddard",
+    "Goddard Space Flight Center",
+    "NASA Goddard",
+    "Johnson Space Center",
+    "Kennedy Space Center",
+    "Marshall",
+    "Marshall Space Flight Center",
+    "Jet Propulsion Laboratory",
+    "JPL",
+    "Wallops Flight Facility",
+    "German Space Agency",
+    "DLR",
+    "European Space Agency",
+    "ESA",
+    "(Government)"
+]
+INDUSTRY_KEYWORDS = ["Company", "Corporation", "LLC", "Inc.", "(Industry)"]
+# Producer types in match priority order: the first type with a matching keyword wins
+PRODUCER_TYPE_KEYWORDS = {
+    "Academia": ACADEMIA_KEYWORDS,
+    "Government": GOVERNMENT_KEYWORDS,
+    "Industry": INDUSTRY_KEYWORDS,
+}
+
+@profiled_stage()
+def get_dataframe_from_json(file_path: str, batch_size: int | None = None) -> pd.DataFrame | Iterator[pd.DataFrame]:
     """
-    Load a DataFrame from a JSON file.
+    Load a DataFrame from a standardized output file.
+    Besides the JSON records array this reads every format output_writers can write
+    (NDJSON, optionally gzip/zstd compressed, Parquet and Excel), chosen by file extension.
     Args:
-        file_path (str): Path to the JSON file.
+        file_path (str): Path to the file.
+        batch_size (int | None): If set, return an iterator yielding frames of at most
+            batch_size rows, reading the file lazily, instead of one frame.
     Returns:
-        pd.DataFrame: DataFrame loaded from the JSON file.
+        pd.DataFrame | Iterator[pd.DataFrame]: DataFrame loaded from the file, or its batches.
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"The file {file_path} does not exist.")
-    return pd.read_json(file_path, orient='records')
+    if batch_size is not None:
+        return iter_frame_batches(file_path, batch_size)
+    return read_frame(file_path)
 
+@profiled_stage()
 def create_slim_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Create a slim DataFrame with only the specified columns.
@@ -36,7 +87,8 @@ def create_slim_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: A slimmed-down version of the original DataFrame.
     """
-    slim_df = df.reindex(columns=COLUMNS).copy()
+    # Object dtype first: newer pandas refuses to put "" into float columns such as TRL
+    slim_df = df.reindex(columns=COLUMNS).astype(object)
 
     # Fill NaN values with empty strings
     slim_df.fillna("", inplace=True)
@@ -50,8 +102,7 @@ def is_academia(producer: str) -> bool:
     Returns:
         bool: True if the producer is an academic institution, False otherwise.
     """
-    academia_keywords = ["University", "College", "Institute", "Academy", "(Academia)"]
-    return any(keyword in producer for keyword in academia_keywords)
+    return any(keyword in producer for keyword in ACADEMIA_KEYWORDS)
 
 def is_government(producer: str) -> bool:
     """
@@ -61,31 +112,7 @@ def is_government(producer: str) -> bool:
     Returns:
         bool: True if the producer is a government entity, False otherwise.
     """
-    government_keywords = [
-        "AFRL",
-        "NASA",
-        "National Aeronautics and Space Administration",
-        "NASA Ames",
-        "Ames Research Center",
-        "NASA Langley",
-        "Langley Research Center",
-        "Goddard",
-        "Goddard Space Flight Center",
-        "NASA Goddard",
-        "Johnson Space Center",
-        "Kennedy Space Center",
-        "Marshall",
-        "Marshall Space Flight Center",
-        "Jet Propulsion Laboratory",
-        "JPL",
-        "Wallops Flight Facility",
-        "German Space Agency",
-        "DLR",
-        "European Space Agency",
-        "ESA",
-        "(Government)"
-    ]
-    return any(keyword in producer for keyword in government_keywords)
+    return any(keyword in producer for keyword in GOVERNMENT_KEYWORDS)
 
 def is_industry(producer: str) -> bool:
     """
@@ -95,36 +122,109 @@ def is_industry(producer: str) -> bool:
     Returns:
         bool: True if the producer is an industry entity, False otherwise.
     """
-    industry_keywords = ["Company", "Corporation", "LLC", "Inc.", "(Industry)"]
-    return any(keyword in producer for keyword in industry_keywords)
+    return any(keyword in producer for keyword in INDUSTRY_KEYWORDS)
+
+def load_producer_keywords(path: str) -> dict[str, list[str]]:
+    """
+    Load producer type keyword tables from a JSON config file.
+
+    The file maps each producer type to its keywords; the order of the types in the
+    file is their match priority, e.g.
+    {"Academia": ["University", ...], "Government": ["NASA", ...], "Industry": ["LLC", ...]}
+
+    Args:
+        path (str): Path to the JSON file.
+    Returns:
+        dict[str, list[str]]: Producer type -> keywords, in priority order.
+    """
+    with open(path, 'r', encoding='utf-8') as handle:
+        keywords = json.load(handle)
+    if not isinstance(keywords, dict) or not all(
+        isinstance(words, list) and all(isinstance(word, str) for word in words) for words in keywords.values()
+    ):
+        raise ValueError(f"{path} must map each producer type to a list of keyword strings.")
+    return keywords
+
+@lru_cache(maxsize=8)
+def _compile_producer_classifier(keyword_table: tuple[tuple[str, tuple[str, ...]], ...]) -> re.Pattern:
+    """
+    Compile all keyword sets into a single regex.
 
-def fill_producer_type(df: pd.DataFrame) -> pd.DataFrame:
+    Each producer type becomes an optional lookahead with its own group, so one match at
+    the start of the string reports every type that has a keyword anywhere in it.
+    """
+    lookaheads = [
+        f"(?:(?=.*?(?P<type{i}>{'|'.join(re.escape(word) for word in words)})))?"
+        for i, (_, words) in enumerate(keyword_table) if words
+    ]
+    return re.compile('^' + ''.join(lookaheads), re.DOTALL)
+
+def classify_producers(producers: pd.Series, keywords: dict[str, list[str]] | None = None) -> np.ndarray:
+    """
+    Classify producer names into producer types.
+
+    Each distinct producer is classified once, through pd.factorize, and the results are
+    mapped back to every row. A producer gets the first type, in `keywords` priority order,
+    with a keyword contained in its name; otherwise 'Unknown'.
+
+    Args:
+        producers (pd.Series): Producer names.
+        keywords (dict[str, list[str]] | None): Producer type -> keywords; defaults to PRODUCER_TYPE_KEYWORDS.
+    Returns:
+        np.ndarray: Producer type for each row.
+    """
+    keywords = PRODUCER_TYPE_KEYWORDS if keywords is None else keywords
+    keyword_table = tuple((name, tuple(words)) for name, words in keywords.items())
+    pattern = _compile_producer_classifier(keyword_table)
+    names = [name for name, words in keyword_table if words]
+
+    codes, uniques = pd.factorize(producers)
+    labels = []
+    for producer in uniques:
+        match = pattern.match(producer) if isinstance(producer, str) else None
+        groups = match.groups() if match else ()
+        labels.append(next((names[i] for i, group in enumerate(groups) if group is not None), 'Unknown'))
+    # The extra label catches the -1 code factorize gives missing values
+    labels.append('Unknown')
+    return np.array(labels, dtype=object)[codes]
+
+@profiled_stage()
+def fill_producer_type(df: pd.DataFrame, keywords: dict[str, list[str]] | None = None,
+                       entities: ProducerEntities | None = None) -> pd.DataFrame:
     """
     Fill the 'Producer Type' column based on the 'Tech Producer' column.
     Args:
         df (pd.DataFrame): The DataFrame to process.
+        keywords (dict[str, list[str]] | None): Producer type -> keywords in priority order;
+            defaults to Academia, then Government, then Industry (PRODUCER_TYPE_KEYWORDS).
+        entities (ProducerEntities | None): Resolved producers (see producer_entities). Every
+            variant of a producer then gets the type most of its rows have.
     Returns:
         pd.DataFrame: The DataFrame with 'Producer Type' filled.
     """
-    df['Producer Type'] = df['Tech Producer'].apply(lambda x: 'Academia' if is_academia(x) else
-                                                     'Government' if is_government(x) else
-                                                     'Industry' if is_industry(x) else
-                                                     'Unknown')
+    types = classify_producers(df['Tech Producer'], keywords)
+    if entities is not None:
+        types = entities.unify_labels(df['Tech Producer'], types, PRODUCER_TYPE_KEYWORDS if keywords is None else keywords)
+    df['Producer Type'] = pd.Series(types, index=df.index).astype(str)
     return df
 
+@profiled_stage()
 def fill_level_3_taxonomy(df: pd.DataFrame) -> pd.DataFrame:
     """
     Fill the 'Level 3 Taxonomy' column based on the 'Level Three Category' column.
+    Labels are normalized to 'TX03.1.1: Name' (see taxonomy.normalize_labels), parsing each
+    distinct label once; cells without text, such as bare ints, become "Unknown".
     Args:
         df (pd.DataFrame): The DataFrame to process.    
     Returns:
         pd.DataFrame: The DataFrame with 'Level 3 Taxonomy' filled.
     """
-    df['Level 3 Taxonomy'] = df['Level Three Category'].apply(lambda x: x if isinstance(x, str) and x else "Unknown")
+    df['Level 3 Taxonomy'] = normalize_labels(df['Level Three Category'])
     # Remove the 'Level Three Category' column as it's no longer needed
     df.drop(columns=['Level Three Category'], inplace=True, errors='ignore')
     return df
 
+@profiled_stage()
 def fill_tlr_with_zero(df: pd.DataFrame) -> pd.DataFrame:
     """    Fill the 'TRL' column with 0 where it is NaN or empty.
     Args:
@@ -139,6 +239,7 @@ def fill_tlr_with_zero(df: pd.DataFrame) -> pd.DataFrame:
     df['TRL'] = df['TRL'].clip(lower=0, upper=9)
     return df
 
+@profiled_stage()
 def fill_relevance_with_zero(df: pd.DataFrame) -> pd.DataFrame:
     """Fill the 'Relevance (1-5)' column with 0 where it is NaN or empty.
     Args:
@@ -153,36 +254,83 @@ def fill_relevance_with_zero(df: pd.DataFrame) -> pd.DataFrame:
     df['Relevance (1-5)'] = df['Relevance (1-5)'].astype(int)
     return df
 
+def fill_appendix_columns(slim_df: pd.DataFrame, keywords: dict[str, list[str]] | None = None,
+                          entities: ProducerEntities | None = None) -> pd.DataFrame:
+    """
+    Run every fill_* step, in order, on a frame returned by create_slim_dataframe.
+    Args:
+        slim_df (pd.DataFrame): The slim DataFrame.
+        keywords (dict[str, list[str]] | None): Producer type keywords (see fill_producer_type).
+        entities (ProducerEntities | None): Resolved producers (see fill_producer_type).
+    Returns:
+        pd.DataFrame: The filled DataFrame.
+    """
+    slim_df = fill_producer_type(slim_df, keywords, entities)
+    slim_df = fill_level_3_taxonomy(slim_df)
+    slim_df = fill_tlr_with_zero(slim_df)
+    slim_df = fill_relevance_with_zero(slim_df)
+    return slim_df
+
+def build_slim_dataframe(df: pd.DataFrame, keywords: dict[str, list[str]] | None = None,
+                         entities: ProducerEntities | None = None) -> pd.DataFrame:
+    """
+    Run create_slim_dataframe and every fill_* step on a standardized frame.
+    Each step works row by row, so batches of a file can be processed independently.
+    Args:
+        df (pd.DataFrame): The standardized DataFrame (or a batch of it).
+        keywords (dict[str, list[str]] | None): Producer type keywords (see fill_producer_type).
+        entities (ProducerEntities | None): Resolved producers (see fill_producer_type).
+    Returns:
+        pd.DataFrame: The slim DataFrame.
+    """
+    return fill_appendix_columns(create_slim_dataframe(df), keywords, entities)
+
 def main():
     """Main function to execute the script.
     """
     parser = ArgumentParser(description="Process and standardize technology data.")
-    parser.add_argument('--input', type=str, default=STANDARDIZED_PATH, help='Path to the input JSON file containing technology data.')
+    parser.add_argument('--input', type=str, default=STANDARDIZED_PATH,
+                        help='Path to the standardized data (.json, .ndjson[.gz|.zst], .parquet or .xlsx).')
     parser.add_argument('--output', type=str, default=SLIM_PATH, help='Path to save the standardized data.')
-    parser.add_argument('--save-type', type=str, choices=['json', 'excel'], default='json',
-                        help='Format to save the standardized data (json or excel).')
+    parser.add_argument('--save-type', type=str, choices=list(OUTPUT_FORMATS), default='json',
+                        help='Format to save the standardized data.')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='Read, process and write the input this many rows at a time instead of all at once.')
+    parser.add_argument('--producer-keywords', type=str, default=None,
+                        help='JSON file mapping producer types to keywords, in match priority order.')
+    parser.add_argument('--resolve-producers', action='store_true',
+                        help='Group variants of each producer name and give them all the same producer type.')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help="Directory for cached producer resolutions (default: .cache in the input's directory).")
+    add_profiling_arguments(parser)
     args = parser.parse_args()
     if not os.path.exists(args.input):
         raise FileNotFoundError(f"The input file {args.input} does not exist.")
+    if args.resolve_producers and args.batch_size:
+        raise ValueError("--resolve-producers needs every producer at once; it cannot be combined with --batch-size.")
     # Ensure the output directory exists
     os.makedirs(os.path.dirname(args.output), exist_ok=True)
 
-    # Load the DataFrame from the JSON file
-    df = get_dataframe_from_json(args.input)
-    slim_df = create_slim_dataframe(df)
-    standardized_df = fill_producer_type(slim_df)
-    standardized_df = fill_level_3_taxonomy(standardized_df)
-    standardized_df = fill_tlr_with_zero(standardized_df)
-    standardized_df = fill_relevance_with_zero(standardized_df)
-    
-    # Save the standardized DataFrame
-    if args.save_type == 'excel':
-        path = args.output + ".xlsx"
-        standardized_df.to_excel(path, index=False)
+    start_from_args(args)
+    keywords = load_producer_keywords(args.producer_keywords) if args.producer_keywords else None
+    path = output_path(args.output, args.save_type)
+    if args.batch_size:
+        # Each batch is read, slimmed, filled and written before the next one is read
+        batches = (build_slim_dataframe(df, keywords) for df in get_dataframe_from_json(args.input, args.batch_size))
+        with stage('write_output'):
+            write_frame(batches, path, args.save_type, args.batch_size)
     else:
-        path = args.output + ".json"
-        standardized_df.to_json(path, orient='records', indent=4)
+        # Load the DataFrame from the input file
+        df = get_dataframe_from_json(args.input)
+        cache_dir = args.cache_dir or default_cache_dir(os.path.dirname(args.input))
+        entities = load_producer_entities(df['Tech Producer'], cache_dir) if args.resolve_producers else None
+        standardized_df = build_slim_dataframe(df, keywords, entities)
+
+        # Save the standardized DataFrame
+        with stage('write_output', rows_in=len(standardized_df)):
+            write_frame(standardized_df, path, args.save_type, BATCH_SIZE)
     print(f"Standardized data saved to {path}")
+    finish_from_args(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
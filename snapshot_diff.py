@@ -0,0 +1,309 @@
+"""
+Diff two versions of the master inventory and remap filtered row numbers.
+
+Every "Row no." in FILTERED.xlsx points at a row of the master inventory. When the
+master is re-exported with rows inserted, removed or reordered, those numbers point
+at the wrong technologies. This module:
+
+- fingerprints each master row: a key hash of its normalized 'Technology Name' and
+  'Tech Producer' (KEY_COLUMNS) that identifies the technology, and a content hash
+  of all its columns that detects edits. The key collapses whitespace (including
+  non-breaking spaces) and ignores case. Numbers compare by value in both hashes;
+- diffs two snapshots in one vectorized pass by joining on the key hash. Rows sharing
+  a key are paired in order of appearance. The result lists the added, removed and
+  changed rows and holds the old -> new row-number remap;
+- applies the remap to filtered frames (remap_filtered_frame), to the inputs of
+  standardize_data (remap_inputs, used by inventory_processor.py --remap-from) or
+  rewrites the 'Row no.' cells of a FILTERED workbook in place (remap_filtered_workbook).
+
+Usage:
+    python snapshot_diff.py OLD_INVENTORY.xlsx INVENTORY.xlsx
+    python snapshot_diff.py OLD_INVENTORY.xlsx INVENTORY.xlsx --remap FILTERED.xlsx --output FILTERED_remapped.xlsx
+"""
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Iterable, Optional
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from inventory_processor import (
+    DATA_DIR, FILTERED_HEADER_INDEX, SHEETS_TO_SKIP, capture_master_content, master_row_numbers
+)
+from profiling import profiled_stage
+
+
+KEY_COLUMNS = ('Technology Name', 'Tech Producer')  # Columns identifying a technology across versions
+UNMAPPED_POLICIES = ('error', 'drop', 'keep')
+_MIX = np.uint64(0x100000001B3)  # Multiplier folding one column's hashes into the row fingerprint
+
+
+def _normalized_value(value: object, ignore_case: bool = False) -> str:
+    """A cell as comparable text: '' if missing, whole numbers without '.0', whitespace (incl. \\xa0) collapsed."""
+    if isinstance(value, str):
+        text = ' '.join(value.split())
+        return text.lower() if ignore_case else text
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NA or value is pd.NaT:
+        return ''
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_)):
+        return str(int(value)) if float(value).is_integer() else str(float(value))
+    text = ' '.join(str(value).split())
+    return text.lower() if ignore_case else text
+
+
+def _column_hashes(series: pd.Series, ignore_case: bool = False, normalize_text: bool = True) -> np.ndarray:
+    """uint64 hash of every cell's normalized text; each distinct value is normalized and hashed once."""
+    if not normalize_text:
+        values = series.to_numpy(dtype=object, na_value='')
+        if pd.api.types.infer_dtype(values, skipna=False) == 'string':
+            return pd.util.hash_array(values, categorize=False)  # Text compared as is, no per-value pass
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    if pd.api.types.infer_dtype(uniques, skipna=False) == 'string':  # Inlined fast path for text-only columns
+        text = [' '.join(value.split()).lower() for value in uniques] if ignore_case else \
+            [' '.join(value.split()) for value in uniques]
+    else:
+        text = [_normalized_value(value, ignore_case) for value in uniques]
+    text = np.array(text + [''], dtype=object)
+    return pd.util.hash_array(text, categorize=False)[codes]  # code -1 (missing) picks the trailing ''
+
+
+def row_fingerprints(master: pd.DataFrame, columns: Optional[Iterable[str]] = None,
+                     ignore_case: bool = False, normalize_text: bool = True) -> np.ndarray:
+    """
+    64-bit fingerprint of every row over the given columns.
+    Args:
+        master (pd.DataFrame): A master inventory frame.
+        columns (Optional[Iterable[str]]): Columns to hash, in this order; missing columns hash
+            as empty. Defaults to all columns of the frame.
+        ignore_case (bool): Compare text case-insensitively.
+        normalize_text (bool): Collapse whitespace in text columns. Without it, columns holding
+            only text are hashed as is (faster); numbers are always compared by value.
+    Returns:
+        np.ndarray: uint64 fingerprints, one per row.
+    """
+    columns = list(master.columns) if columns is None else list(columns)
+    empty = pd.util.hash_array(np.array([''], dtype=object), categorize=False)[0]
+    fingerprints = np.zeros(len(master), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for col in columns:
+            hashes = _column_hashes(master[col], ignore_case, normalize_text) if col in master.columns else empty
+            fingerprints = fingerprints * _MIX ^ hashes
+    return fingerprints
+
+
+@dataclass
+class SnapshotDiff:
+    """Outcome of diff_snapshots: how the rows of an old master map onto a new one."""
+    remap: pd.Series  # New row number, indexed by old row number, for every row in both versions
+    added: np.ndarray  # New row numbers with no counterpart in the old version
+    removed: np.ndarray  # Old row numbers with no counterpart in the new version
+    changed: pd.DataFrame  # 'old' and 'new' row numbers of matched rows whose content differs
+
+    @property
+    def moved(self) -> int:
+        """Number of matched rows whose row number changed."""
+        return int((self.remap.index.to_numpy() != self.remap.to_numpy()).sum())
+
+    @property
+    def identical(self) -> bool:
+        return not (len(self.added) or len(self.removed) or len(self.changed) or self.moved)
+
+    def summary(self) -> str:
+        """Human-readable counts of the differences."""
+        return (
+            f"{len(self.remap)} rows matched ({self.moved} moved, {len(self.changed)} changed), "
+            f"{len(self.added)} added, {len(self.removed)} removed."
+        )
+
+
+@profiled_stage()
+def diff_snapshots(old: pd.DataFrame, new: pd.DataFrame, key_columns: tuple[str, ...] = KEY_COLUMNS) -> SnapshotDiff:
+    """
+    Diff two versions of the master inventory.
+    Args:
+        old (pd.DataFrame): The older master, as capture_master_content returns it.
+        new (pd.DataFrame): The newer master.
+        key_columns (tuple[str, ...]): Columns whose normalized values identify a row across versions.
+    Returns:
+        SnapshotDiff: The old -> new row-number remap and the added, removed and changed rows.
+    """
+    content_columns = list(dict.fromkeys([*old.columns, *new.columns]))
+
+    def keyed(master: pd.DataFrame, side: str) -> pd.DataFrame:
+        keys = pd.Series(row_fingerprints(master, key_columns, ignore_case=True))
+        return pd.DataFrame({
+            'key': keys.to_numpy(),
+            'occurrence': keys.groupby(keys.to_numpy(), sort=False).cumcount().to_numpy(),
+            side: master_row_numbers(master).to_numpy(dtype=np.int64),
+            f'{side} content': row_fingerprints(master, content_columns, normalize_text=False),
+        })
+
+    joined = keyed(old, 'old').merge(keyed(new, 'new'), on=['key', 'occurrence'], how='outer', sort=False)
+    matched = joined['old'].notna() & joined['new'].notna()
+    pairs = joined[matched].astype({'old': np.int64, 'new': np.int64}).sort_values('old')
+    changed = pairs.loc[pairs['old content'] != pairs['new content'], ['old', 'new']].reset_index(drop=True)
+    return SnapshotDiff(
+        remap=pd.Series(pairs['new'].to_numpy(), index=pd.Index(pairs['old'].to_numpy(), name='Row no.'), name='New row no.'),
+        added=np.sort(joined.loc[joined['old'].isna(), 'new'].to_numpy(dtype=np.int64)),
+        removed=np.sort(joined.loc[joined['new'].isna(), 'old'].to_numpy(dtype=np.int64)),
+        changed=changed,
+    )
+
+
+def _remap_values(row_nos: pd.Series, diff: SnapshotDiff, unmapped: str, what: str) -> pd.Series:
+    """New row numbers for old ones; unmapped numbers become NaN ('drop'), stay ('keep') or raise ('error')."""
+    if unmapped not in UNMAPPED_POLICIES:
+        raise ValueError(f"Unknown unmapped policy '{unmapped}'; expected one of {UNMAPPED_POLICIES}.")
+    mapped = row_nos.map(diff.remap)
+    missing = mapped.isna() & row_nos.notna()
+    if missing.any():
+        numbers = ', '.join(str(row_no) for row_no in row_nos[missing].tolist())
+        message = f"{int(missing.sum())} row number(s) in {what} are not in the new inventory: {numbers}"
+        if unmapped == 'error':
+            raise ValueError(message)
+        warnings.warn(f"{message}. Rows are {'dropped' if unmapped == 'drop' else 'kept unchanged'}.", stacklevel=3)
+        if unmapped == 'keep':
+            mapped = mapped.where(~missing, row_nos)
+    edited = row_nos.isin(diff.changed['old'])
+    if edited.any():
+        numbers = ', '.join(str(row_no) for row_no in row_nos[edited].tolist())
+        warnings.warn(f"{int(edited.sum())} row(s) in {what} changed in the new inventory: {numbers}", stacklevel=3)
+    return mapped
+
+
+def remap_filtered_frame(frame: pd.DataFrame, diff: SnapshotDiff, unmapped: str = 'error') -> pd.DataFrame:
+    """
+    Move a filtered frame's row numbers from the old master version to the new one.
+    Args:
+        frame (pd.DataFrame): Filtered rows with a 'Row no.' column (capture_filtered_data) or
+            index (the metadata from capture_rows_and_metadata).
+        diff (SnapshotDiff): diff_snapshots(old master, new master).
+        unmapped (str): For rows removed from the new master: 'error' to raise a ValueError listing
+            all of them, 'drop' to leave them out, 'keep' to keep their old number. Both of the
+            latter warn, as does referencing a row whose content changed.
+    Returns:
+        pd.DataFrame: The frame with new row numbers.
+    """
+    on_index = 'Row no.' not in frame.columns and frame.index.name == 'Row no.'
+    row_nos = frame.index.to_series() if on_index else frame['Row no.']
+    mapped = _remap_values(row_nos, diff, unmapped, 'the filtered data')
+    keep = mapped.notna().to_numpy()
+    result = frame[keep].copy()
+    new_row_nos = mapped[keep].astype(np.int64).to_numpy()
+    if on_index:
+        result.index = pd.Index(new_row_nos, name='Row no.')
+    else:
+        result['Row no.'] = new_row_nos
+    return result
+
+
+def remap_inputs(
+    metadata: pd.DataFrame,
+    rows_to_use: list[int],
+    master: pd.DataFrame,
+    old_inventory_path: str,
+    data_dir: str = DATA_DIR,
+    cache_dir: Optional[str] = None,
+    use_cache: bool = True,
+    unmapped: str = 'error'
+) -> tuple[pd.DataFrame, list[int], SnapshotDiff]:
+    """
+    Remap the output of capture_rows_and_metadata, curated against an older master, onto the current one.
+    Args:
+        metadata (pd.DataFrame): Metadata indexed by old row number.
+        rows_to_use (list[int]): Old row numbers, in filtered order.
+        master (pd.DataFrame): The current (whole) master inventory.
+        old_inventory_path (str): The master version the filtered workbook was made against, relative to data_dir.
+        data_dir (str): Directory holding the old master.
+        cache_dir (Optional[str]): Directory for the parsed master inventory cache; defaults to <data_dir>/.cache.
+        use_cache (bool): Whether the old master may be loaded from the cache.
+        unmapped (str): 'error', 'drop' or 'keep' (see remap_filtered_frame).
+    Returns:
+        tuple:
+            - pd.DataFrame: Metadata indexed by new row number.
+            - list[int]: New row numbers, in filtered order.
+            - SnapshotDiff: The diff between the two masters.
+    """
+    old = capture_master_content(old_inventory_path, data_dir, cache_dir=cache_dir, use_cache=use_cache)
+    diff = diff_snapshots(old, master)
+    remapped = remap_filtered_frame(metadata.loc[rows_to_use], diff, unmapped)
+    return remapped, remapped.index.tolist(), diff
+
+
+def remap_filtered_workbook(filtered_file: str, diff: SnapshotDiff, output_file: Optional[str] = None,
+                            unmapped: str = 'error') -> int:
+    """
+    Rewrite the 'Row no.' cells of a FILTERED workbook for a new master version, keeping everything else.
+    Args:
+        filtered_file (str): Path to the filtered workbook.
+        diff (SnapshotDiff): diff_snapshots(old master, new master).
+        output_file (Optional[str]): Where to save the result; defaults to overwriting filtered_file.
+        unmapped (str): 'error' (nothing is written), 'drop' (the cell is cleared, so the row is
+            ignored) or 'keep' (the old number stays).
+    Returns:
+        int: Number of cells whose row number changed.
+    """
+    workbook = load_workbook(filtered_file)
+    cells = []
+    for sheet in workbook.worksheets:
+        if sheet.title in SHEETS_TO_SKIP or sheet.max_row <= FILTERED_HEADER_INDEX + 1:
+            continue
+        header = [str(cell.value).strip() if cell.value is not None else None
+                  for cell in sheet[FILTERED_HEADER_INDEX + 1]]
+        if 'Row no.' not in header:
+            continue
+        column = header.index('Row no.') + 1
+        for (cell,) in sheet.iter_rows(min_row=FILTERED_HEADER_INDEX + 2, min_col=column, max_col=column):
+            value = pd.to_numeric(cell.value, errors='coerce') if not isinstance(cell.value, bool) else np.nan
+            if pd.notna(value) and value == int(value) and value > 0:
+                cells.append((cell, int(value)))
+
+    old_row_nos = pd.Series([row_no for _, row_no in cells], dtype='int64')
+    mapped = _remap_values(old_row_nos, diff, unmapped, os.path.basename(filtered_file))
+    updated = 0
+    for (cell, old_row_no), new_row_no in zip(cells, mapped.tolist()):
+        if pd.isna(new_row_no):
+            cell.value = None
+        elif int(new_row_no) != old_row_no:
+            cell.value = int(new_row_no)
+        else:
+            continue
+        updated += 1
+    workbook.save(output_file or filtered_file)
+    return updated
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Diff two versions of the master inventory and remap filtered row numbers.")
+    parser.add_argument('old', type=str, help='Older master inventory workbook.')
+    parser.add_argument('new', type=str, help='Newer master inventory workbook.')
+    parser.add_argument('--sheet-name', type=str, default='Inventory', help='Sheet holding the inventory.')
+    parser.add_argument('--remap', type=str, default=None, help='FILTERED workbook whose Row no. values should be remapped.')
+    parser.add_argument('--output', type=str, default=None, help='Where to save the remapped workbook (default: in place).')
+    parser.add_argument('--unmapped', type=str, choices=UNMAPPED_POLICIES, default='error',
+                        help='What to do with filtered rows that are not in the new inventory.')
+    parser.add_argument('--report', type=str, default=None, help='Write the old -> new row-number remap to this CSV file.')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for the parsed master inventory cache (default: <data-dir>/.cache).')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-parse the workbooks instead of using the cache.')
+    args = parser.parse_args()
+
+    def load(path: str) -> pd.DataFrame:
+        return capture_master_content(os.path.basename(path), os.path.dirname(path) or '.', args.sheet_name,
+                                      cache_dir=args.cache_dir, use_cache=not args.no_cache)
+
+    diff = diff_snapshots(load(args.old), load(args.new))
+    print(diff.summary())
+    if len(diff.added):
+        print(f"Added rows: {', '.join(map(str, diff.added[:50]))}{' ...' if len(diff.added) > 50 else ''}")
+    if len(diff.removed):
+        print(f"Removed rows: {', '.join(map(str, diff.removed[:50]))}{' ...' if len(diff.removed) > 50 else ''}")
+    if args.report:
+        diff.remap.to_csv(args.report)
+        print(f"Remap written to '{args.report}'.")
+    if args.remap:
+        updated = remap_filtered_workbook(args.remap, diff, args.output, args.unmapped)
+        print(f"Updated {updated} Row no. cells; saved to '{args.output or args.remap}'.")
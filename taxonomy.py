@@ -0,0 +1,276 @@
+"""
+Taxonomy tree over the master inventory's TX and FN categories.
+
+Category cells hold free text such as "TX03.1.1: Photovoltaic Electrical Power",
+"TX07.1.2\xa0Resource Acquisition, ..." or the odd bare int. This module:
+
+- parses each distinct label once (parse_taxonomy is memoized) into a normalized
+  code ('TX03.1.1': two-digit top level, no leading zeros below) and its name;
+- builds a TaxonomyTree whose integer node ids are assigned in preorder, so the
+  descendants of a node are the contiguous ids up to `subtree_end[node]`, and keeps
+  every node's ancestor at each depth in one array. Ancestor, descendant and
+  is-ancestor lookups are O(1) array reads;
+- attaches node ids to rows (node_ids, attach_node_ids), taking the most specific
+  category column with a code; rows without one get -1;
+- rolls rows up to any level of the tree with vectorized counts and means
+  (rollup, appendix_rollup).
+
+Usage:
+    python taxonomy.py --input ./data/slim_data.json --level 2 [--output ./data/tx_level_2.csv]
+"""
+from argparse import ArgumentParser
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional
+import os
+import re
+import numpy as np
+import pandas as pd
+
+
+TX_COLUMNS = ('Level Three Category', 'Level Two Category', 'Level One Category')  # Most specific first
+FN_COLUMNS = ('Level Two Functional Category', 'Level One Functional Category')
+APPENDIX_COLUMN = 'Level 3 Taxonomy'  # Taxonomy label of the slim appendix data
+UNKNOWN_LABEL = 'Unknown'
+_LABEL = re.compile(r'\b(TX|FN)\s*(\d+)((?:\.\d+)*)[\s:.\-–]*(.*)', re.IGNORECASE | re.DOTALL)
+
+
+class TaxonomyCode(NamedTuple):
+    """A parsed taxonomy label: 'TX' or 'FN', the level numbers and the name ('' if none)."""
+    system: str
+    path: tuple[int, ...]
+    name: str
+
+    @property
+    def code(self) -> str:
+        return f"{self.system}{self.path[0]:02d}" + ''.join(f".{part}" for part in self.path[1:])
+
+    @property
+    def label(self) -> str:
+        return f"{self.code}: {self.name}" if self.name else self.code
+
+
+@lru_cache(maxsize=65536)
+def _parse_text(text: str) -> Optional[TaxonomyCode]:
+    match = _LABEL.search(' '.join(text.split()))
+    if match is None:
+        return None
+    system, top, rest, name = match.groups()
+    path = (int(top), *(int(part) for part in rest.split('.')[1:]))
+    return TaxonomyCode(system.upper(), path, name.strip())
+
+
+def parse_taxonomy(value: object) -> Optional[TaxonomyCode]:
+    """
+    Parse a taxonomy cell such as 'TX03.1.1: Photovoltaic Electrical Power'.
+    Separators (':', '-', whitespace, non-breaking spaces) and case are tolerated; each
+    distinct string is parsed once. Cells without a TX/FN code, bare numbers included,
+    give None.
+    """
+    return _parse_text(value) if isinstance(value, str) else None
+
+
+def normalize_labels(labels: pd.Series, unknown: str = UNKNOWN_LABEL) -> pd.Series:
+    """
+    Labels rewritten as 'CODE: Name'. Text without a code keeps its (whitespace-collapsed)
+    text; missing values, empty strings and non-text cells become `unknown`.
+    """
+    codes, uniques = pd.factorize(labels)
+    normalized = []
+    for value in np.asarray(uniques, dtype=object):
+        parsed = parse_taxonomy(value)
+        text = ' '.join(value.split()) if isinstance(value, str) else ''
+        normalized.append(parsed.label if parsed else text or unknown)
+    normalized.append(unknown)  # The -1 code factorize gives missing values
+    return pd.Series(np.array(normalized, dtype=object)[codes], index=labels.index, name=labels.name)
+
+
+class TaxonomyTree:
+    """TX/FN codes as a tree with preorder integer node ids; node 0 is the root above every system."""
+
+    def __init__(self, codes: Iterable[TaxonomyCode]):
+        """
+        Build the tree from parsed labels. Missing ancestors are added (TX03.1.1 implies
+        TX03.1 and TX03); a node's name is the first non-empty name given for its code.
+        """
+        names: dict[tuple[str, tuple[int, ...]], str] = {}
+        for parsed in codes:
+            for depth in range(1, len(parsed.path) + 1):
+                key = (parsed.system, parsed.path[:depth])
+                if not names.get(key):
+                    names[key] = parsed.name if depth == len(parsed.path) else names.get(key, '')
+        keys = sorted(names)  # Sorting (system, path) tuples puts every node right after its parent
+        self.keys = [('', ())] + keys
+        self.names = [''] + [names[key] for key in keys]
+        self.codes = [''] + [TaxonomyCode(system, path, '').code for system, path in keys]
+        self._ids = {code: node for node, code in enumerate(self.codes)}
+
+        count = len(self.keys)
+        self.depth = np.array([len(path) for _, path in self.keys], dtype=np.int16)
+        self.max_depth = int(self.depth.max()) if count else 0
+        self.parent = np.full(count, -1, dtype=np.int32)
+        self.ancestors = np.full((count, self.max_depth + 1), -1, dtype=np.int32)  # [node, depth] -> ancestor
+        self.ancestors[0, 0] = 0
+        self.subtree_end = np.arange(1, count + 1, dtype=np.int32)  # Descendants of n are n+1 .. subtree_end[n]-1
+        key_ids = {key: node for node, key in enumerate(self.keys)}
+        for node in range(1, count):
+            system, path = self.keys[node]
+            parent = key_ids[(system, path[:-1])] if len(path) > 1 else 0
+            self.parent[node] = parent
+            self.ancestors[node] = self.ancestors[parent]
+            self.ancestors[node, len(path)] = node
+        for node in range(count - 1, 0, -1):  # Children come after their parent, so one backward pass suffices
+            parent = self.parent[node]
+            self.subtree_end[parent] = max(self.subtree_end[parent], self.subtree_end[node])
+
+    @classmethod
+    def from_labels(cls, labels: Iterable[object]) -> 'TaxonomyTree':
+        """Tree of every code found in the labels; each distinct label is parsed once."""
+        unique = pd.unique(pd.Series(list(labels), dtype=object).dropna())
+        return cls(parsed for parsed in map(parse_taxonomy, unique) if parsed is not None)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: tuple[str, ...] = TX_COLUMNS + FN_COLUMNS) -> 'TaxonomyTree':
+        """Tree of every code in the given category columns of a master (or slim) frame."""
+        present = [df[col] for col in columns if col in df.columns]
+        return cls.from_labels(pd.concat(present, ignore_index=True) if present else [])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def node_id(self, code: str) -> int:
+        """Node id of a code such as 'TX03.1' (the label's name, if any, is ignored)."""
+        parsed = parse_taxonomy(code)
+        if parsed is None or parsed.code not in self._ids:
+            raise KeyError(f"Taxonomy code '{code}' is not in the tree.")
+        return self._ids[parsed.code]
+
+    def ancestor(self, nodes, depth: int) -> np.ndarray | int:
+        """Ancestor of each node at the given depth (1 = TX03), the node itself at its own depth, -1 above it."""
+        nodes = np.asarray(nodes)
+        if depth > self.max_depth:
+            result = np.full(nodes.shape, -1, dtype=np.int32)
+        else:
+            result = np.where(nodes >= 0, self.ancestors[np.maximum(nodes, 0), depth], -1)
+        return int(result) if result.ndim == 0 else result
+
+    def descendants(self, node: int) -> np.ndarray:
+        """Ids of every node below `node`, in preorder."""
+        return np.arange(node + 1, self.subtree_end[node], dtype=np.int32)
+
+    def is_ancestor(self, node: int, others) -> np.ndarray | bool:
+        """Whether `node` is one of the others' ancestors or the node itself; vectorized over `others`."""
+        others = np.asarray(others)
+        result = (others >= node) & (others < self.subtree_end[node])
+        return bool(result) if result.ndim == 0 else result
+
+    def label(self, node: int) -> str:
+        code, name = self.codes[node], self.names[node]
+        return f"{code}: {name}" if name else code
+
+    def node_ids(self, labels: pd.Series) -> np.ndarray:
+        """Node id of each label; -1 where it has no code or its code is not in the tree."""
+        codes, uniques = pd.factorize(labels)
+        ids = [self._ids.get(parsed.code, -1) if (parsed := parse_taxonomy(value)) else -1
+               for value in np.asarray(uniques, dtype=object)]
+        return np.array(ids + [-1], dtype=np.int32)[codes]
+
+
+def attach_node_ids(df: pd.DataFrame, tree: TaxonomyTree, columns: tuple[str, ...] = TX_COLUMNS,
+                    column: str = 'TX Node') -> pd.DataFrame:
+    """
+    Add a column with each row's node id, from the most specific of `columns` with a known code.
+    Args:
+        df (pd.DataFrame): A master or slim frame.
+        tree (TaxonomyTree): The tree, e.g. TaxonomyTree.from_frame(df).
+        columns (tuple[str, ...]): Category columns, most specific first (TX_COLUMNS or FN_COLUMNS).
+        column (str): Name of the added column.
+    Returns:
+        pd.DataFrame: The frame with the node id column (-1 for rows without a code).
+    """
+    ids = np.full(len(df), -1, dtype=np.int32)
+    for col in reversed(columns):  # Least specific first, so more specific columns overwrite
+        if col in df.columns:
+            found = tree.node_ids(df[col])
+            ids = np.where(found >= 0, found, ids)
+    df[column] = ids
+    return df
+
+
+def rollup(tree: TaxonomyTree, nodes: np.ndarray, level: int, values: Optional[dict[str, object]] = None,
+           system: Optional[str] = 'TX') -> pd.DataFrame:
+    """
+    Count rows and average values per taxonomy node at one level, in a single vectorized pass.
+    Args:
+        tree (TaxonomyTree): The taxonomy tree.
+        nodes (np.ndarray): Node id of each row (-1 for rows without a code).
+        level (int): Depth to roll up to: 1 for 'TX03', 2 for 'TX03.1', 3 for 'TX03.1.1'.
+        values (Optional[dict[str, object]]): Column name -> per-row numbers to average; missing
+            values (NaN) are left out of the mean.
+        system (Optional[str]): Only report nodes of this system ('TX' or 'FN'); None for both.
+    Returns:
+        pd.DataFrame: One row per node at that level ('Code', 'Name', 'Count' and 'Mean <column>'),
+            in code order, followed by an UNKNOWN_LABEL row for rows without a node at that level.
+    """
+    level_nodes = np.flatnonzero(tree.depth == level)
+    if system is not None:
+        level_nodes = np.array([node for node in level_nodes if tree.keys[node][0] == system], dtype=np.int64)
+    targets = tree.ancestor(np.asarray(nodes, dtype=np.int32), level)
+    # Rows without a node at this level (or of another system) go to the extra, unknown bucket
+    bucket = np.where(np.isin(targets, level_nodes), targets, len(tree))
+    counts = np.bincount(bucket, minlength=len(tree) + 1)
+    rows = np.append(level_nodes, len(tree))
+    result = pd.DataFrame({
+        'Code': [tree.codes[node] for node in level_nodes] + [UNKNOWN_LABEL],
+        'Name': [tree.names[node] for node in level_nodes] + [''],
+        'Count': counts[rows],
+    })
+    for name, column in (values or {}).items():
+        numbers = pd.to_numeric(pd.Series(np.asarray(column, dtype=object)), errors='coerce').to_numpy(dtype=float)
+        present = ~np.isnan(numbers)
+        sums = np.bincount(bucket[present], weights=numbers[present], minlength=len(tree) + 1)
+        totals = np.bincount(bucket[present], minlength=len(tree) + 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[f'Mean {name}'] = np.where(totals[rows] > 0, sums[rows] / np.maximum(totals[rows], 1), np.nan)
+    return result
+
+
+def appendix_rollup(slim_df: pd.DataFrame, level: int, tree: Optional[TaxonomyTree] = None) -> pd.DataFrame:
+    """
+    Roll the slim appendix data up to one TX level: counts and mean TRL and relevance.
+    The fill_* steps write 0 for a missing TRL or relevance, so zeros are left out of the means.
+    Args:
+        slim_df (pd.DataFrame): Output of build_slim_dataframe (or anything with a 'Level 3 Taxonomy' column).
+        level (int): 1, 2 or 3.
+        tree (Optional[TaxonomyTree]): Tree to use; defaults to one built from the slim data.
+    Returns:
+        pd.DataFrame: See rollup.
+    """
+    labels = slim_df[APPENDIX_COLUMN] if APPENDIX_COLUMN in slim_df.columns else slim_df[TX_COLUMNS[0]]
+    tree = TaxonomyTree.from_labels(labels) if tree is None else tree
+    values = {
+        col: pd.to_numeric(slim_df[col], errors='coerce').replace(0, np.nan)
+        for col in ('TRL', 'Relevance (1-5)') if col in slim_df.columns
+    }
+    return rollup(tree, tree.node_ids(labels), level, values)
+
+
+if __name__ == "__main__":
+    from output_writers import read_frame
+
+    parser = ArgumentParser(description="Roll the slim appendix data up to one level of the TX taxonomy.")
+    parser.add_argument('--input', type=str, default='./data/slim_data.json',
+                        help='Slim or standardized data (.json, .ndjson[.gz|.zst], .parquet or .xlsx).')
+    parser.add_argument('--level', type=int, choices=(1, 2, 3), default=1, help='Taxonomy level to roll up to.')
+    parser.add_argument('--output', type=str, default=None, help='Write the rollup to this .csv or .xlsx file.')
+    args = parser.parse_args()
+
+    result = appendix_rollup(read_frame(args.input), args.level)
+    if args.output:
+        if os.path.splitext(args.output)[1].lower() == '.xlsx':
+            result.to_excel(args.output, index=False)
+        else:
+            result.to_csv(args.output, index=False)
+        print(f"Rollup saved to '{args.output}'.")
+    else:
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(result.to_string(index=False))
@@ -0,0 +1,101 @@
+"""
+Shared fixtures that build small synthetic INVENTORY.xlsx and FILTERED.xlsx
+workbooks, so tests that don't need the real snapshot in data/ can run anywhere.
+"""
+import os
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+
+MASTER_COLUMNS = [
+    "Technology Name", "Tech Producer", "Description", "Existing Technology",
+    "Level One Category", "Level Two Category", "Level Three Category", "TRL",
+    "Level One Functional Category", "Level Two Functional Category",
+]
+FILTERED_COLUMNS = [
+    "Row no.", "Organization", "Technology", "Category", "TRL",
+    "Description", "Relevance (1-5)", "Notes", "Link",
+]
+MASTER_ROWS = 40
+
+
+def master_row(i: int) -> list:
+    """Deterministic master row content for data row i (spreadsheet row i + 2)."""
+    producers = [
+        "MicroLink Devices, Inc. (Industry)",
+        "University of South Florida-Main Campus (Academia)",
+        "Ames Research Center (NASA Center)",
+        "NEADL (Near Earth Asset Discovery Labs)",
+    ]
+    level_three = [
+        "TX03.1.1: Photovoltaic Electrical Power",
+        "TX08.1.2: Electronics",
+        "TX07.1.2\xa0Resource Acquisition, Isolation, and Preparation",
+        9,
+    ]
+    return [
+        f"Technology {i}",
+        producers[i % 4],
+        f"Description of technology {i} for solar power and sensors",
+        "Yes",
+        "TX03: Aerospace Power and Energy Storage" if i % 2 else None,
+        "TX03.1: Power Generation and Energy Conversion" if i % 2 else None,
+        level_three[i % 4],
+        (i % 10) if i % 3 else None,
+        "FN04: Manufacturing" if i % 5 == 0 else None,
+        None,
+    ]
+
+
+def write_master(path: str, rows: int = MASTER_ROWS) -> None:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Inventory"
+    ws.append(MASTER_COLUMNS)
+    for i in range(rows):
+        ws.append(master_row(i))
+    wb.save(path)
+
+
+def write_filtered(path: str, sheets: dict) -> None:
+    """
+    Write a FILTERED workbook. `sheets` maps sheet name -> list of
+    (row_no, relevance, notes, link) tuples. The header sits on the fourth row.
+    """
+    wb = Workbook()
+    wb.remove(wb.active)
+    for name, rows in sheets.items():
+        ws = wb.create_sheet(name)
+        ws.append([f"{name} selections"])
+        ws.append([])
+        ws.append([])
+        ws.append(FILTERED_COLUMNS)
+        for row_no, relevance, notes, link in rows:
+            ws.append([row_no, "Org", "Tech", "Cat", 5, "Desc", relevance, notes, link])
+    gaps = wb.create_sheet("Technology Gaps")
+    gaps.append(["Free-form gap notes"])
+    wb.save(path)
+
+
+DEFAULT_SHEETS = {
+    "Power": [(2, 5, "Solar", "link-a"), (7, 3, None, "link-b"), (11, 4, "Arrays", None)],
+    "Sensors": [(5, 2, "Spin", None), (20, 1, None, None), (31, 5, "Metrics", "link-c")],
+}
+
+
+@pytest.fixture
+def workbooks(tmp_path):
+    """Synthetic data directory with INVENTORY.xlsx and FILTERED.xlsx."""
+    data_dir = str(tmp_path)
+    write_master(os.path.join(data_dir, "INVENTORY.xlsx"))
+    write_filtered(os.path.join(data_dir, "FILTERED.xlsx"), DEFAULT_SHEETS)
+    return data_dir
+
+
+@pytest.fixture
+def master_frame(workbooks):
+    """The synthetic master inventory as pandas reads it."""
+    df = pd.read_excel(os.path.join(workbooks, "INVENTORY.xlsx"), sheet_name="Inventory")
+    df.columns = df.columns.str.strip()
+    return df
@@ -0,0 +1,104 @@
+"""
+This module tests the cached report cube in the appendix_report module.
+
+The purpose is to ensure:
+- Reports served from the cube match groupbys over the slim data, whether it is read whole or in batches.
+- Taxonomy levels are derived from 'Level 3 Taxonomy', and means leave out the 0 fill values.
+- The cube is cached per input file and rebuilt when the file changes; tables export to CSV and Excel.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import appendix_report
+from appendix_report import REPORTS, ReportSpec, build_cube, build_reports, export_reports, load_cube, report
+from output_writers import iter_batches, write_frame
+import numpy as np
+import pandas as pd
+import pytest
+
+
+SLIM = pd.DataFrame({
+    'Technology Name': [f'Tech {i}' for i in range(8)],
+    'Tech Producer': ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H'],
+    'Producer Type': ['Academia', 'Industry', 'Academia', 'Government', 'Academia', 'Industry', 'Unknown', 'Academia'],
+    'Category': ['x'] * 8,
+    'Level 3 Taxonomy': ['TX03.1.1: PV', 'TX03.1.1: PV', 'TX03.2.1: Cells', 'TX08.1.2: Electronics',
+                         'TX03.1.1: PV', 'Unknown', 'TX08.1.2: Electronics', 'TX03.1.1: PV'],
+    'TRL': [4, 6, 0, 9, 4, 2, 5, 0],
+    'Relevance (1-5)': [5, 3, 0, 4, 5, 1, 2, 3],
+    'Notes': [None] * 8,
+})
+
+
+def test_cube_matches_groupby():
+    cube = build_cube(SLIM)
+    assert cube['Count'].sum() == len(SLIM)
+    assert len(cube) == 7  # Rows 0 and 4 share every dimension
+    batched = build_cube(iter_batches(SLIM, 3))
+    pd.testing.assert_frame_equal(batched, cube)
+
+    table = report(cube, 'producer_trl_taxonomy')
+    expected = SLIM.groupby(['Producer Type', 'TRL', 'Level 3 Taxonomy']).size().rename('Count').reset_index()
+    pd.testing.assert_frame_equal(table, expected)
+    assert report(cube, 'relevance')['Count'].tolist() == [1, 1, 1, 2, 1, 2]
+
+
+def test_pivot_and_means():
+    cube = build_cube(SLIM)
+    pivot = report(cube, 'relevance_by_producer_type').set_index('Producer Type')
+    assert pivot.loc['Academia'].tolist() == [1, 0, 0, 1, 0, 2, 4]
+    assert list(pivot.columns)[-1] == 'Total' and pivot['Total'].sum() == len(SLIM)
+
+    producers = report(cube, 'producer_type').set_index('Producer Type')
+    assert producers.loc['Academia', 'Count'] == 4
+    assert producers.loc['Academia', 'Mean TRL'] == 4.0  # The two 0s are missing values
+    assert producers.loc['Academia', 'Mean Relevance (1-5)'] == pytest.approx(13 / 3)
+
+    level_1 = report(cube, 'taxonomy_level_1')
+    assert level_1['TX Level 1'].tolist() == ['TX03', 'TX08', 'Unknown']
+    assert level_1['Count'].tolist() == [5, 2, 1]
+    assert np.isclose(level_1['Mean TRL'].iloc[1], 7.0)
+    custom = report(cube, ReportSpec(('TX Level 2',), columns='Producer Type'))
+    assert custom['TX Level 2'].tolist() == ['TX03.1', 'TX03.2', 'TX08.1', 'Unknown']
+
+    with pytest.raises(ValueError):
+        report(cube, 'no_such_report')
+    with pytest.raises(ValueError):
+        report(cube, ReportSpec(('Producer Type',), means=('Category',)))
+
+
+def test_cube_cache(tmp_path, monkeypatch):
+    path = str(tmp_path / 'slim.ndjson')
+    cache_dir = str(tmp_path / 'cache')
+    write_frame(SLIM, path, 'ndjson')
+    cube = load_cube(path, cache_dir)
+
+    def fail(frames):
+        raise AssertionError("the cube should come from the cache")
+    monkeypatch.setattr(appendix_report, 'build_cube', fail)
+    pd.testing.assert_frame_equal(load_cube(path, cache_dir), cube)
+    monkeypatch.undo()
+
+    write_frame(SLIM.iloc[:4], path, 'ndjson')
+    assert load_cube(path, cache_dir)['Count'].sum() == 4
+
+
+def test_standardized_input(workbooks, tmp_path):
+    from pipeline import PipelineOptions, run_pipeline
+    artifacts = run_pipeline(options=PipelineOptions(data_dir=workbooks, filtered_path='FILTERED.xlsx',
+                                                     inventory_path='INVENTORY.xlsx', use_cache=False))
+    from_standardized = build_cube(artifacts['standardized'].copy())
+    pd.testing.assert_frame_equal(from_standardized, build_cube(artifacts['appendix']))
+
+
+def test_export(tmp_path):
+    tables = build_reports(build_cube(SLIM))
+    assert list(tables) == list(REPORTS)
+    paths = export_reports(tables, str(tmp_path / 'reports'), 'csv')
+    assert len(paths) == len(REPORTS)
+    pd.testing.assert_frame_equal(pd.read_csv(str(tmp_path / 'reports' / 'relevance.csv')), tables['relevance'])
+    [workbook] = export_reports(tables, str(tmp_path / 'reports'), 'excel')
+    assert workbook.endswith('reports.xlsx')
+    sheets = pd.read_excel(workbook, sheet_name=None)
+    assert list(sheets) == [name[:31] for name in REPORTS]
+    pd.testing.assert_frame_equal(sheets['producer_type'], tables['producer_type'], check_dtype=False)
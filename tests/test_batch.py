@@ -0,0 +1,110 @@
+"""
+This module tests batch mode in the batch module.
+
+The purpose is to ensure:
+- Directories and glob patterns expand to the filtered workbooks, without lock files or the master.
+- Each workbook's output matches processing it on its own, serially and across forked workers.
+- The merged output carries a 'source workbook' column, and a broken workbook does not stop the batch.
+- Same-named workbooks in different directories get distinct outputs; inputs sharing an output are rejected.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from batch import BatchOptions, PROVENANCE_COLUMN, find_filtered_workbooks, run_batch, source_names
+from inventory_processor import (
+    capture_master_content, capture_rows_and_metadata, standardize_data, rename_output_columns
+)
+from output_writers import read_frame
+from conftest import DEFAULT_SHEETS, write_filtered
+import pandas as pd
+import pytest
+
+
+TEAM_SHEETS = {"Comms": [(3, 4, "Relay", None), (9, 2, None, "link-d")]}
+
+
+@pytest.fixture
+def teams(workbooks):
+    """Data directory with the master and two filtered workbooks under teams/."""
+    teams_dir = os.path.join(workbooks, 'teams')
+    os.makedirs(teams_dir)
+    write_filtered(os.path.join(teams_dir, 'power.xlsx'), DEFAULT_SHEETS)
+    write_filtered(os.path.join(teams_dir, 'comms.xlsx'), TEAM_SHEETS)
+    open(os.path.join(teams_dir, '~$power.xlsx'), 'w').close()
+    return workbooks
+
+
+def expected_output(data_dir: str, filtered_file: str) -> pd.DataFrame:
+    master = capture_master_content("INVENTORY.xlsx", data_dir, use_cache=False)
+    metadata, rows = capture_rows_and_metadata(os.path.dirname(filtered_file), os.path.basename(filtered_file),
+                                               as_frame=True)
+    return rename_output_columns(standardize_data(master, metadata, rows))
+
+
+def read_frame_roundtrip(df: pd.DataFrame, tmp_path) -> pd.DataFrame:
+    path = str(tmp_path / 'expected.json')
+    df.to_json(path, orient='records', indent=4)
+    return read_frame(path)
+
+
+def test_find_filtered_workbooks(teams):
+    teams_dir = os.path.join(teams, 'teams')
+    assert [os.path.basename(p) for p in find_filtered_workbooks([teams_dir])] == ['comms.xlsx', 'power.xlsx']
+    assert find_filtered_workbooks([os.path.join(teams_dir, 'p*.xlsx')]) == [os.path.join(teams_dir, 'power.xlsx')]
+    found = find_filtered_workbooks([teams], exclude=(os.path.join(teams, 'INVENTORY.xlsx'),))
+    assert [os.path.basename(p) for p in found] == ['FILTERED.xlsx']
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_outputs_match_single_runs(teams, tmp_path, workers):
+    files = find_filtered_workbooks([os.path.join(teams, 'teams')])
+    options = BatchOptions(str(tmp_path / 'out'))
+    results = run_batch(files, options, data_dir=teams, cache_dir=str(tmp_path / 'cache'), workers=workers)
+    assert [r.error for r in results] == [None, None]
+    for result in results:
+        assert os.path.basename(result.output_file) == \
+            os.path.basename(result.filtered_file).replace('.xlsx', '_standardized.json')
+        expected = expected_output(teams, result.filtered_file)
+        assert result.rows == len(expected)
+        pd.testing.assert_frame_equal(read_frame(result.output_file), read_frame_roundtrip(expected, tmp_path))
+
+
+def test_merged_output_and_failures(teams, tmp_path):
+    teams_dir = os.path.join(teams, 'teams')
+    with open(os.path.join(teams_dir, 'broken.xlsx'), 'w') as f:
+        f.write('not a workbook')
+    files = find_filtered_workbooks([teams_dir])
+    options = BatchOptions(str(tmp_path / 'out'), output_type='ndjson')
+    results = run_batch(files, options, data_dir=teams, cache_dir=str(tmp_path / 'cache'),
+                        workers=2, merged_name='merged')
+    errors = {os.path.basename(r.filtered_file): r.error for r in results}
+    assert errors['broken.xlsx'] is not None
+    assert errors['comms.xlsx'] is None and errors['power.xlsx'] is None
+
+    merged = read_frame(str(tmp_path / 'out' / 'merged.ndjson'))
+    assert merged[PROVENANCE_COLUMN].value_counts().to_dict() == {'power.xlsx': 6, 'comms.xlsx': 2}
+    assert all(r.frame is None for r in results)
+
+
+def test_same_names_in_different_directories(workbooks, tmp_path):
+    for team, sheets in (('teamA', DEFAULT_SHEETS), ('teamB', TEAM_SHEETS)):
+        os.makedirs(os.path.join(workbooks, team))
+        write_filtered(os.path.join(workbooks, team, 'FILTERED.xlsx'), sheets)
+    files = [os.path.join(workbooks, 'teamA', 'FILTERED.xlsx'), os.path.join(workbooks, 'teamB', 'FILTERED.xlsx')]
+    assert source_names(files) == ['teamA/FILTERED.xlsx', 'teamB/FILTERED.xlsx']
+    assert source_names(files[:1]) == ['FILTERED.xlsx']
+
+    out = tmp_path / 'out'
+    results = run_batch(files, BatchOptions(str(out), output_type='ndjson'), data_dir=workbooks,
+                        cache_dir=str(tmp_path / 'cache'), merged_name='merged')
+    assert [r.output_file for r in results] == [str(out / 'teamA' / 'FILTERED_standardized.ndjson'),
+                                                str(out / 'teamB' / 'FILTERED_standardized.ndjson')]
+    assert [len(read_frame(r.output_file)) for r in results] == [6, 2]
+    merged = read_frame(str(out / 'merged.ndjson'))
+    assert merged[PROVENANCE_COLUMN].value_counts().to_dict() == {'teamA/FILTERED.xlsx': 6, 'teamB/FILTERED.xlsx': 2}
+
+    duplicated = [files[0], os.path.join(workbooks, 'teamA', '..', 'teamA', 'FILTERED.xlsx')]
+    with pytest.raises(ValueError, match='would both be written'):
+        run_batch(duplicated, BatchOptions(str(tmp_path / 'dup')), data_dir=workbooks,
+                  cache_dir=str(tmp_path / 'cache'))
+    assert not os.path.exists(tmp_path / 'dup')
@@ -0,0 +1,65 @@
+"""
+This module tests the columnar mode of capture_filtered_data and its duplicate policies.
+
+The purpose is to ensure:
+- All sheets are combined into one frame with a 'source sheet' column.
+- Row numbers listed on several sheets are resolved by the chosen policy and reported together.
+- The dict mode and capture_rows_and_metadata agree with the frame.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inventory_processor import capture_filtered_data, capture_rows_and_metadata
+from conftest import write_filtered
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def duplicated_workbook(tmp_path):
+    write_filtered(str(tmp_path / 'FILTERED.xlsx'), {
+        "Power": [(2, 3, "power", None), (7, 1, None, None)],
+        "Sensors": [(2, 5, "sensors", None), (9, 2, None, None)],
+        "Comms": [(7, 4, "comms", None), (2, 1, "comms", None)],
+    })
+    return str(tmp_path)
+
+
+def test_frame_mode(workbooks):
+    frame = capture_filtered_data(workbooks, 'FILTERED.xlsx', as_frame=True)
+    assert list(frame['Row no.']) == [2, 7, 11, 5, 20, 31]
+    assert list(frame['source sheet']) == ['Power'] * 3 + ['Sensors'] * 3
+    assert 'Technology Gaps' not in set(frame['source sheet'])
+
+
+@pytest.mark.parametrize('policy, notes', [
+    ('first', ['power', None, None]),
+    ('last', ['comms', 'comms', None]),
+    ('relevance', ['sensors', 'comms', None]),
+])
+def test_duplicate_policies(duplicated_workbook, policy, notes):
+    with pytest.warns(UserWarning, match="2 row number"):
+        frame = capture_filtered_data(duplicated_workbook, 'FILTERED.xlsx', as_frame=True, duplicate_policy=policy)
+    assert list(frame['Row no.']) == [2, 7, 9]
+    assert [None if pd.isna(n) else n for n in frame['Notes']] == notes
+
+
+def test_duplicate_error_reports_all(duplicated_workbook):
+    with pytest.raises(ValueError, match=r"2 in \['Power', 'Sensors', 'Comms'\]; 7 in \['Power', 'Comms'\]"):
+        capture_filtered_data(duplicated_workbook, 'FILTERED.xlsx', duplicate_policy='error')
+
+
+def test_metadata_from_frame(workbooks):
+    as_dict = capture_filtered_data(workbooks, 'FILTERED.xlsx')
+    metadata, rows_to_use = capture_rows_and_metadata(workbooks, 'FILTERED.xlsx')
+    assert rows_to_use == list(as_dict.keys())
+    assert metadata[31] == {'Relevance (1-5)': 5, 'Notes': 'Metrics', 'Link': 'link-c'}
+    frame, _ = capture_rows_and_metadata(workbooks, 'FILTERED.xlsx', as_frame=True)
+    assert list(frame.columns) == ['Relevance (1-5)', 'Notes', 'Link']
+    assert frame.loc[2, 'Notes'] == 'Solar'
+
+
+def test_parallel_matches_serial(workbooks):
+    serial = capture_filtered_data(workbooks, 'FILTERED.xlsx', as_frame=True)
+    parallel = capture_filtered_data(workbooks, 'FILTERED.xlsx', as_frame=True, workers=2)
+    pd.testing.assert_frame_equal(parallel, serial)
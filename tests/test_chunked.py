@@ -0,0 +1,93 @@
+"""
+This module tests the out-of-core mode in the chunked module.
+
+The purpose is to ensure:
+- iter_master_chunks yields batches of the requested size with absolute row numbers.
+- The chunked output is identical to the in-memory pipeline's, whatever the chunk size, slim or standardized.
+- master_column_dtypes gives the dtypes pandas infers from the whole sheet.
+- Reading stops after the highest filtered row, and an empty selection still writes a header.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from chunked import run_chunked
+from inventory_processor import capture_master_content, iter_master_chunks, master_column_dtypes
+from output_writers import read_frame
+from pipeline import PipelineOptions, run_pipeline
+from conftest import write_filtered
+import pandas as pd
+import pytest
+
+
+def test_chunks_have_absolute_row_numbers(workbooks, master_frame):
+    chunks = list(iter_master_chunks('INVENTORY.xlsx', workbooks, chunk_size=15))
+    assert [len(chunk) for chunk in chunks] == [15, 15, 10]
+    assert chunks[1].index[0] == 17 and chunks[-1].index[-1] == 41
+    combined = pd.concat(chunks)
+    assert combined['Technology Name'].tolist() == master_frame['Technology Name'].tolist()
+
+    selected = list(iter_master_chunks('INVENTORY.xlsx', workbooks, chunk_size=10, rows_to_use=[30, 3, 12]))
+    assert [chunk.index.tolist() for chunk in selected] == [[3], [12], [30]]
+    with pytest.raises(ValueError):
+        next(iter_master_chunks('INVENTORY.xlsx', workbooks, chunk_size=0))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1000])
+def test_matches_in_memory(workbooks, tmp_path, chunk_size):
+    expected = str(tmp_path / 'expected.json')
+    run_pipeline(options=PipelineOptions(data_dir=workbooks, filtered_path='FILTERED.xlsx',
+                                         inventory_path='INVENTORY.xlsx', use_cache=False),
+                 write={'appendix': expected})
+    output = str(tmp_path / 'chunked.json')
+    rows = run_chunked(output, 'json', workbooks, 'FILTERED.xlsx', 'INVENTORY.xlsx', chunk_size=chunk_size)
+    assert rows == 6
+    with open(expected, 'rb') as a, open(output, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_master_column_dtypes(workbooks, tmp_path, master_frame):
+    cache_dir = str(tmp_path / 'cache')
+    dtypes = master_column_dtypes('INVENTORY.xlsx', workbooks, cache_dir=cache_dir)
+    assert dtypes == list(master_frame.dtypes)
+    assert master_column_dtypes('INVENTORY.xlsx', workbooks, cache_dir=cache_dir) == dtypes
+    chunks = list(iter_master_chunks('INVENTORY.xlsx', workbooks, chunk_size=3, dtypes=dtypes))
+    assert all(list(chunk.dtypes) == dtypes for chunk in chunks)
+    assert chunks[0]['Level Three Category'].tolist()[:3] == master_frame['Level Three Category'].tolist()[:3]
+
+
+@pytest.mark.parametrize('output_format', ['json', 'parquet'])
+@pytest.mark.parametrize('chunk_size', [1, 3, 7])
+def test_standardized_matches_in_memory(workbooks, tmp_path, chunk_size, output_format):
+    if output_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    extension = '.json' if output_format == 'json' else '.parquet'
+    expected = str(tmp_path / f'expected{extension}')
+    run_pipeline(stages=['capture', 'standardize'],
+                 options=PipelineOptions(data_dir=workbooks, filtered_path='FILTERED.xlsx',
+                                         inventory_path='INVENTORY.xlsx', use_cache=False),
+                 write={'standardized': expected})
+    output = str(tmp_path / f'chunked{extension}')
+    run_chunked(output, output_format, workbooks, 'FILTERED.xlsx', 'INVENTORY.xlsx', chunk_size=chunk_size,
+                slim=False, cache_dir=str(tmp_path / 'cache'))
+    if output_format == 'json':
+        with open(expected, 'rb') as a, open(output, 'rb') as b:
+            assert a.read() == b.read()
+    else:
+        pd.testing.assert_frame_equal(read_frame(output), read_frame(expected))
+
+
+def test_standardized_output(workbooks, tmp_path):
+    output = str(tmp_path / 'standardized.ndjson')
+    run_chunked(output, 'ndjson', workbooks, 'FILTERED.xlsx', 'INVENTORY.xlsx', chunk_size=5, slim=False,
+                cache_dir=str(tmp_path / 'cache'))
+    result = read_frame(output)
+    master = capture_master_content('INVENTORY.xlsx', workbooks, use_cache=False)
+    assert result['Technology Name'].tolist() == master['Technology Name'].iloc[[0, 3, 5, 9, 18, 29]].tolist()
+    assert result['Relevance (1-5)'].tolist() == [5, 2, 3, 4, 1, 5]
+
+
+def test_empty_selection(workbooks, tmp_path):
+    write_filtered(os.path.join(workbooks, 'EMPTY.xlsx'), {'Power': [(500, 5, None, None)]})
+    output = str(tmp_path / 'empty.json')
+    assert run_chunked(output, 'json', workbooks, 'EMPTY.xlsx', 'INVENTORY.xlsx', chunk_size=10) == 0
+    assert read_frame(output).empty
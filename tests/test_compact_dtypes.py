@@ -0,0 +1,58 @@
+"""
+This module tests the compact dtype layer in the compact_dtypes module.
+
+The purpose is to ensure:
+- Low-cardinality text becomes categorical, TRL becomes Int8 and the values stay the same.
+- Columns that cannot be converted losslessly are left alone.
+- capture_master_content(compact=True) feeds the rest of the pipeline with unchanged results.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from compact_dtypes import compact_frame, memory_report, format_memory_report
+from inventory_processor import capture_master_content, standardize_data
+from scrape_standard_for_appendix import build_slim_dataframe
+import numpy as np
+import pandas as pd
+
+
+def as_values(series: pd.Series) -> list:
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def test_dtypes_and_values(master_frame):
+    master = pd.concat([master_frame] * 5, ignore_index=True)
+    compact = compact_frame(master)
+    assert isinstance(compact['Tech Producer'].dtype, pd.CategoricalDtype)
+    assert isinstance(compact['Level Three Category'].dtype, pd.CategoricalDtype)
+    assert compact['TRL'].dtype == 'Int8'
+    for col in master.columns:
+        assert as_values(compact[col]) == as_values(master[col]), col
+    # The bare int in Level Three Category survives as an int
+    assert 9 in compact['Level Three Category'].tolist()
+
+
+def test_lossy_columns_are_kept():
+    df = pd.DataFrame({'TRL': [1.5, 2.0, np.nan, 4.0], 'Relevance (1-5)': ['high', 2, 3, 4]})
+    compact = compact_frame(df)
+    assert compact['TRL'].dtype == np.float64
+    assert compact['Relevance (1-5)'].tolist() == ['high', 2, 3, 4]
+
+
+def test_memory_report(master_frame):
+    master = pd.concat([master_frame] * 5, ignore_index=True)
+    report = memory_report(master, compact_frame(master))
+    assert list(report.index) == list(master.columns) + ['Total']
+    assert report.loc['Total', 'MB after'] < report.loc['Total', 'MB before']
+    assert 'Tech Producer' in format_memory_report(report)
+
+
+def test_compact_master_gives_same_slim_output(workbooks, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    plain = capture_master_content("INVENTORY.xlsx", workbooks, cache_dir=cache_dir)
+    compact = capture_master_content("INVENTORY.xlsx", workbooks, cache_dir=cache_dir, compact=True)
+    metadata = {row: {'Relevance (1-5)': 3, 'Notes': 'n', 'Link': None} for row in (2, 5, 9)}
+    rows = [2, 5, 9, 17, 30]
+    expected = build_slim_dataframe(standardize_data(plain, metadata, rows))
+    result = build_slim_dataframe(standardize_data(compact, metadata, rows))
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
@@ -0,0 +1,63 @@
+"""
+This module tests the incremental re-processing mode in the incremental module.
+
+The purpose is to ensure:
+- Only sheets whose content changed are re-parsed.
+- The patched output is identical to a full run after rows are added, removed and edited.
+- A changed master inventory triggers a full rebuild.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from incremental import run_incremental
+from inventory_processor import capture_rows_and_metadata, capture_master_content, standardize_data
+from inventory_cache import sheet_fingerprints
+from conftest import write_filtered, write_master, DEFAULT_SHEETS
+
+
+def full_run(data_dir):
+    metadata, rows_to_use = capture_rows_and_metadata(data_dir, 'FILTERED.xlsx', as_frame=True)
+    master = capture_master_content('INVENTORY.xlsx', data_dir, use_cache=False)
+    return standardize_data(master, metadata, rows_to_use)
+
+
+def run(data_dir, cache_dir):
+    return run_incremental(data_dir, 'FILTERED.xlsx', 'INVENTORY.xlsx', cache_dir=cache_dir)
+
+
+def test_sheet_fingerprints_are_per_sheet(workbooks):
+    before = sheet_fingerprints(os.path.join(workbooks, 'FILTERED.xlsx'))
+    sheets = dict(DEFAULT_SHEETS, Sensors=[(5, 2, "Spin (edited)", None)])
+    write_filtered(os.path.join(workbooks, 'FILTERED.xlsx'), sheets)
+    after = sheet_fingerprints(os.path.join(workbooks, 'FILTERED.xlsx'))
+    assert before['Power'] == after['Power']
+    assert before['Sensors'] != after['Sensors']
+
+
+def test_incremental_patch_matches_full_run(workbooks, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    first, report = run(workbooks, cache_dir)
+    assert report.full_rebuild
+    assert first.to_json(orient='records') == full_run(workbooks).to_json(orient='records')
+
+    sheets = dict(DEFAULT_SHEETS, Sensors=[(5, 4, "Spin (edited)", None), (12, 3, "new", "link-d")])
+    write_filtered(os.path.join(workbooks, 'FILTERED.xlsx'), sheets)
+    patched, report = run(workbooks, cache_dir)
+    assert report.reparsed_sheets == ['Sensors'] and report.reused_sheets == ['Power']
+    assert not report.full_rebuild
+    assert report.added_rows == [12]
+    assert report.removed_rows == [20, 31]
+    assert report.updated_rows == [5]
+    assert patched.to_json(orient='records') == full_run(workbooks).to_json(orient='records')
+
+    _, report = run(workbooks, cache_dir)
+    assert report.reparsed_sheets == [] and not (report.added_rows or report.removed_rows or report.updated_rows)
+
+
+def test_master_change_rebuilds(workbooks, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    run(workbooks, cache_dir)
+    write_master(os.path.join(workbooks, 'INVENTORY.xlsx'), rows=25)
+    rebuilt, report = run(workbooks, cache_dir)
+    assert report.full_rebuild and report.rebuild_reason == 'master inventory changed'
+    assert rebuilt.to_json(orient='records') == full_run(workbooks).to_json(orient='records')
@@ -0,0 +1,69 @@
+"""
+This module tests the parsed-sheet cache used by capture_master_content.
+
+The purpose is to ensure:
+- A cached snapshot round-trips the parsed frame exactly, including mixed-type columns.
+- The snapshot (and any file_fingerprint) is invalidated when the workbook changes, but survives a bare touch.
+- Disabling the cache leaves the cache directory untouched.
+- By default the cache lives in '.cache' inside the data directory.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inventory_processor import capture_master_content
+from inventory_cache import default_cache_dir, file_fingerprint, fingerprint_matches, load_cached_frame
+from conftest import write_master
+import pandas as pd
+
+
+def test_cache_round_trip(workbooks, master_frame, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    first = capture_master_content('INVENTORY.xlsx', workbooks, cache_dir=cache_dir)
+    assert os.listdir(cache_dir), "A snapshot should have been written"
+    second = capture_master_content('INVENTORY.xlsx', workbooks, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(first, master_frame)
+    pd.testing.assert_frame_equal(second, master_frame)
+    assert second.loc[3, 'Level Three Category'] == 9
+
+
+def test_cache_invalidated_on_change(workbooks, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    inventory = os.path.join(workbooks, 'INVENTORY.xlsx')
+    capture_master_content('INVENTORY.xlsx', workbooks, cache_dir=cache_dir)
+
+    # Touching the file keeps the snapshot valid
+    stat = os.stat(inventory)
+    os.utime(inventory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load_cached_frame(inventory, cache_dir, key='Inventory') is not None
+
+    write_master(inventory, rows=12)
+    assert load_cached_frame(inventory, cache_dir, key='Inventory') is None
+    assert len(capture_master_content('INVENTORY.xlsx', workbooks, cache_dir=cache_dir)) == 12
+
+
+def test_cache_disabled(workbooks, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    capture_master_content('INVENTORY.xlsx', workbooks, cache_dir=cache_dir, use_cache=False)
+    assert not os.path.exists(cache_dir)
+
+
+def test_default_cache_dir(workbooks):
+    capture_master_content('INVENTORY.xlsx', workbooks)
+    cache_dir = default_cache_dir(workbooks)
+    assert cache_dir == os.path.join(workbooks, '.cache')
+    assert os.listdir(cache_dir), "The snapshot should be in the data directory's cache"
+    inventory = os.path.join(workbooks, 'INVENTORY.xlsx')
+    assert load_cached_frame(inventory, key='Inventory') is not None
+
+
+def test_fingerprint_matches(workbooks):
+    inventory = os.path.join(workbooks, 'INVENTORY.xlsx')
+    fingerprint = file_fingerprint(inventory)
+    assert fingerprint_matches(inventory, fingerprint)
+    stat = os.stat(inventory)
+    os.utime(inventory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert fingerprint_matches(inventory, fingerprint)
+    write_master(inventory, rows=12)
+    assert not fingerprint_matches(inventory, fingerprint)
+    assert not fingerprint_matches(inventory, None)
+    assert not fingerprint_matches(os.path.join(workbooks, 'missing.xlsx'), fingerprint)
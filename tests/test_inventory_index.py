@@ -0,0 +1,77 @@
+"""
+This module tests the row-number index in the inventory_index module.
+
+The purpose is to ensure:
+- Row numbers map to the right frame positions, for full and selectively read masters.
+- Validation reports invalid, out-of-range and missing row numbers together.
+- The index is saved next to the data and only re-used while the workbook is unchanged.
+- standardize_data gives the same result with and without an index.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inventory_index import InventoryIndex, capture_master_with_index, index_path
+from inventory_processor import capture_selected_master_rows, standardize_data
+from conftest import write_master
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def test_positions(master_frame):
+    index = InventoryIndex.from_frame(master_frame)
+    assert (index.first_row, index.last_row) == (2, 41)
+    assert index.position(2) == 0
+    assert index.position(41) == 39
+    with pytest.raises(KeyError):
+        index.position(42)
+    assert index.positions_of([5, 1, 41, 'x', 7.0]).tolist() == [3, -1, 39, -1, 5]
+    assert index.contains([2, 100]).tolist() == [True, False]
+
+
+def test_get_rows(master_frame):
+    index = InventoryIndex.from_frame(master_frame)
+    rows = index.get_rows(master_frame, [9, 4])
+    assert rows.index.tolist() == [9, 4]
+    assert rows['Technology Name'].tolist() == ['Technology 7', 'Technology 2']
+    assert index.get_rows(master_frame, [4, 500], missing='skip').index.tolist() == [4]
+    with pytest.raises(ValueError, match="out of range"):
+        index.get_rows(master_frame, [4, 500])
+
+
+def test_selective_frame(workbooks):
+    master = capture_selected_master_rows([30, 3, 12], "INVENTORY.xlsx", workbooks)
+    index = InventoryIndex.from_frame(master)
+    report = index.validate([3, 12, 5, 0, 'abc', 30, 99])
+    assert report.invalid == ['abc']
+    assert report.out_of_range == [0, 99]
+    assert report.missing == [5]
+    assert not report.ok
+    summary = report.summary()
+    assert "out of range: 0, 99" in summary and "not in the inventory: 5" in summary
+    assert index.get_rows(master, [12, 30])['Technology Name'].tolist() == ['Technology 10', 'Technology 28']
+
+
+def test_saved_next_to_cache(workbooks, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    master, index = capture_master_with_index("INVENTORY.xlsx", workbooks, cache_dir=cache_dir)
+    inventory = os.path.join(workbooks, "INVENTORY.xlsx")
+    path = index_path(inventory, cache_dir)
+    assert os.path.exists(path)
+    loaded = InventoryIndex.load(path, inventory)
+    assert np.array_equal(loaded.row_numbers, index.row_numbers)
+
+    write_master(inventory, rows=45)
+    assert InventoryIndex.load(path, inventory) is None
+    master, index = capture_master_with_index("INVENTORY.xlsx", workbooks, cache_dir=cache_dir)
+    assert len(index) == len(master) == 45
+
+
+def test_standardize_with_index(master_frame):
+    index = InventoryIndex.from_frame(master_frame)
+    metadata = {9: {'Relevance (1-5)': 2, 'Notes': 'b', 'Link': None}, 4: {'Relevance (1-5)': 5, 'Notes': 'a', 'Link': 'x'}}
+    rows = [9, 4, 30, 999]
+    pd.testing.assert_frame_equal(
+        standardize_data(master_frame, metadata, rows, index=index),
+        standardize_data(master_frame, metadata, rows),
+    )
@@ -0,0 +1,109 @@
+"""
+This module tests the full-text search index in the inventory_search module.
+
+The purpose is to ensure:
+- Results are ranked by BM25 over names and descriptions and carry real "Row no." values.
+- The taxonomy, TRL and producer type filters narrow the results; codes are read as taxonomy.parse_taxonomy reads them.
+- The saved index is re-used while the workbook is unchanged and updated incrementally when it changes.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inventory_search import SearchIndex, load_search_index, search_index_path, tokenize
+from conftest import write_master
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def small_master() -> pd.DataFrame:
+    return pd.DataFrame({
+        'Technology Name': ['Solar Array', 'Cryogenic Pump', 'Radiation Sensor', 'Thin Film Solar Cell'],
+        'Tech Producer': ['SunWorks LLC', 'Ames Research Center', 'State University', None],
+        'Description': ['Deployable solar array for smallsats', 'Pump for cryogenic propellant transfer',
+                        'Radiation hardened sensor for solar particle events', np.nan],
+        'Level One Category': ['TX03: Power', 'TX14: Thermal', 'TX08: Sensors', 'TX03: Power'],
+        'Level Two Category': ['TX03.1: Generation', None, 'TX08.1: Remote Sensing', 'TX03.1: Generation'],
+        'Level Three Category': ['TX03.1.1: Photovoltaic', None, 9, 'TX03.1.1\xa0Photovoltaic'],
+        'TRL': [6, 4, np.nan, 3],
+        'Level One Functional Category': [None, 'FN04: Manufacturing', None, None],
+    })
+
+
+def test_tokenize():
+    assert tokenize("Radiation-hardened ASICs for the TX08 sensors") == ['radiation', 'hardened', 'asics', 'tx08', 'sensors']
+    assert tokenize(np.nan) == [] and tokenize(None) == []
+
+
+def test_ranking_and_row_numbers():
+    index = SearchIndex.build(small_master())
+    results = index.search('solar')
+    # The name counts double, so both "Solar" names outrank the description-only match
+    assert results['Row no.'].tolist()[:2] == [2, 5]
+    assert results['Row no.'].tolist()[2] == 4
+    assert results['Score'].is_monotonic_decreasing
+    assert index.row_numbers_for('cryogenic propellant') == [3]
+    assert index.search('nothing matches this').empty
+
+
+def test_filters():
+    index = SearchIndex.build(small_master())
+    assert index.row_numbers_for('solar', taxonomy='TX03') == [2, 5]
+    assert index.row_numbers_for('', taxonomy='tx03.1.1') == [2, 5]
+    assert index.row_numbers_for('', taxonomy='TX08.1') == [4]
+    assert index.row_numbers_for('', taxonomy='FN04') == [3]
+    assert index.row_numbers_for('solar', trl_min=4) == [2]
+    assert index.row_numbers_for('', trl_max=4) == [3, 5]
+    assert index.row_numbers_for('', producer_types=['Academia', 'Government']) == [3, 4]
+
+
+def test_taxonomy_spellings():
+    master = pd.DataFrame({
+        'Technology Name': ['A', 'B', 'C', 'D'],
+        'Description': ['', '', '', ''],
+        'Level One Category': ['TX03: Power', 'TX3: Power', 'TX 03 - Power', 'TX13: Ground'],
+        'Level Two Category': [None, 'tx3.2 Storage', None, None],
+    })
+    index = SearchIndex.build(master)
+    assert index.row_numbers_for('', taxonomy='TX03') == [2, 3, 4]
+    assert index.row_numbers_for('', taxonomy='TX3') == [2, 3, 4]
+    assert index.row_numbers_for('', taxonomy='TX03.2: Storage') == [3]
+    assert index.search('', taxonomy='TX03')['Taxonomy'].tolist() == ['TX03', 'TX03.2', 'TX03']
+    with pytest.raises(ValueError):
+        index.filter_mask(taxonomy='Power')
+    with pytest.raises(ValueError):
+        index.filter_mask(taxonomy='TX03.1.1.1')
+
+
+def test_selective_frame_row_numbers():
+    master = small_master()
+    master.index = pd.Index([10, 20, 30, 40], name='Row no.')
+    assert SearchIndex.build(master).row_numbers_for('solar') == [10, 40, 30]
+
+
+def test_incremental_update_matches_rebuild():
+    master = small_master()
+    previous = SearchIndex.build(master)
+    changed = pd.concat([master.iloc[[3, 0]], master.iloc[[2]]], ignore_index=True)
+    changed.loc[2, 'Description'] = 'Cryogenic radiation shield'
+    updated = SearchIndex.build(changed, previous=previous)
+    rebuilt = SearchIndex.build(changed)
+    assert sorted(updated.vocab.tolist()) == sorted(rebuilt.vocab.tolist())
+    for query in ['solar', 'cryogenic', 'radiation shield', 'pump']:
+        pd.testing.assert_frame_equal(updated.search(query), rebuilt.search(query))
+
+
+def test_saved_and_refreshed(workbooks, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    index = load_search_index("INVENTORY.xlsx", workbooks, cache_dir=cache_dir)
+    inventory = os.path.join(workbooks, "INVENTORY.xlsx")
+    assert os.path.exists(search_index_path(inventory, cache_dir))
+    assert index.row_numbers_for('technology 7')[0] == 9
+
+    again = load_search_index("INVENTORY.xlsx", workbooks, cache_dir=cache_dir)
+    assert np.array_equal(again.row_numbers, index.row_numbers)
+
+    write_master(inventory, rows=45)
+    updated = load_search_index("INVENTORY.xlsx", workbooks, cache_dir=cache_dir)
+    assert len(updated) == 45
+    assert updated.row_numbers_for('technology 44')[0] == 46
@@ -0,0 +1,116 @@
+"""
+This module tests the batch-wise writers and readers in output_writers.
+
+The purpose is to ensure:
+- The 'json' format is byte-identical to DataFrame.to_json(orient='records', indent=4), whatever the batch size.
+- NDJSON (plain and gzip), Parquet and streaming Excel outputs read back to the same rows.
+- Files are read back lazily in batches of the requested size.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from output_writers import FrameWriter, output_path, write_frame, read_frame, iter_frame_batches
+from scrape_standard_for_appendix import get_dataframe_from_json
+import pandas as pd
+import pytest
+
+
+def sample_frame(rows: int = 23) -> pd.DataFrame:
+    return pd.DataFrame({
+        'Technology Name': [f"Technology {i}" for i in range(rows)],
+        'Level Three Category': ["TX08.1.2: Electronics" if i % 4 else None for i in range(rows)],
+        'TRL': [float(i % 10) if i % 3 else float('nan') for i in range(rows)],
+        'Relevance (1-5)': [i % 5 + 1 for i in range(rows)],
+    })
+
+
+def assert_same_rows(actual: pd.DataFrame, expected: pd.DataFrame):
+    assert list(actual.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(
+        actual.astype(object).where(actual.notna(), None).reset_index(drop=True),
+        expected.astype(object).where(expected.notna(), None).reset_index(drop=True),
+        check_dtype=False,
+    )
+
+
+@pytest.mark.parametrize('batch_size', [1, 5, 23, 1000])
+def test_json_is_byte_identical(tmp_path, batch_size):
+    df = sample_frame()
+    path = str(tmp_path / 'out.json')
+    assert write_frame(df, path, 'json', batch_size) == len(df)
+    with open(path, 'r', encoding='utf-8') as handle:
+        assert handle.read() == df.to_json(orient='records', indent=4)
+
+
+def test_empty_json_matches_to_json(tmp_path):
+    df = sample_frame().iloc[:0]
+    path = str(tmp_path / 'out.json')
+    write_frame(df, path, 'json')
+    with open(path, 'r', encoding='utf-8') as handle:
+        assert handle.read() == df.to_json(orient='records', indent=4)
+
+
+@pytest.mark.parametrize('output_format', ['json', 'ndjson', 'ndjson-gzip', 'parquet', 'excel', 'excel-stream'])
+def test_round_trip(tmp_path, output_format):
+    if output_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    df = sample_frame()
+    path = output_path(str(tmp_path / 'out'), output_format)
+    write_frame(df, path, output_format, batch_size=4)
+    assert_same_rows(read_frame(path), df)
+    assert_same_rows(get_dataframe_from_json(path), df)
+
+
+def test_zstd_round_trip(tmp_path):
+    pytest.importorskip('zstandard')
+    df = sample_frame()
+    path = output_path(str(tmp_path / 'out'), 'ndjson-zstd')
+    write_frame(df, path, 'ndjson-zstd', batch_size=4)
+    assert_same_rows(read_frame(path), df)
+
+
+@pytest.mark.parametrize('output_format', ['ndjson-gzip', 'parquet', 'excel-stream'])
+def test_lazy_batches(tmp_path, output_format):
+    if output_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    df = sample_frame()
+    path = output_path(str(tmp_path / 'out'), output_format)
+    write_frame(df, path, output_format)
+    batches = get_dataframe_from_json(path, batch_size=10)
+    sizes = [len(batch) for batch in batches]
+    assert sizes == [10, 10, 3]
+
+
+@pytest.mark.parametrize('output_format', ['ndjson', 'parquet', 'excel', 'excel-stream'])
+@pytest.mark.parametrize('batch_size', [1, 7, 23, 100])
+def test_iter_frame_batches_round_trip(tmp_path, output_format, batch_size):
+    if output_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    df = sample_frame()
+    path = output_path(str(tmp_path / 'out'), output_format)
+    write_frame(df, path, output_format, batch_size=4)
+    batches = list(iter_frame_batches(path, batch_size))
+    assert [len(batch) for batch in batches[:-1]] == [batch_size] * (len(batches) - 1)
+    assert 0 < len(batches[-1]) <= batch_size
+    assert all(batch.index.tolist() == list(range(len(batch))) for batch in batches)
+    assert_same_rows(pd.concat(batches, ignore_index=True), df)
+
+
+def test_frames_are_appended_in_order(tmp_path):
+    df = sample_frame()
+    path = str(tmp_path / 'out.ndjson')
+    write_frame((df.iloc[:8], df.iloc[8:8], df.iloc[8:]), path, 'ndjson', batch_size=3)
+    assert_same_rows(read_frame(path), df)
+
+
+def test_mismatched_columns_raise(tmp_path):
+    df = sample_frame()
+    with pytest.raises(ValueError, match="same columns"):
+        with FrameWriter(str(tmp_path / 'out.ndjson'), 'ndjson') as writer:
+            writer.write(df)
+            writer.write(df.drop(columns=['TRL']))
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match="Unknown output format"):
+        output_path('out', 'csv')
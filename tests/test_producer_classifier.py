@@ -0,0 +1,62 @@
+"""
+This module tests the compiled producer classifier in scrape_standard_for_appendix.
+
+The purpose is to ensure:
+- fill_producer_type gives the same result as the is_academia/is_government/is_industry checks.
+- Match priority stays Academia, then Government, then Industry.
+- Keyword tables can be loaded from a JSON config file.
+"""
+import sys
+import os
+import json
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scrape_standard_for_appendix import (
+    fill_producer_type, load_producer_keywords, is_academia, is_government, is_industry
+)
+import pandas as pd
+import pytest
+
+
+PRODUCERS = [
+    "MicroLink Devices, Inc. (Industry)",
+    "University of South Florida-Main Campus (Academia)",
+    "Ames Research Center (NASA Center)",
+    "NEADL (Near Earth Asset Discovery Labs)",
+    "Southwest Research Institute (SwRI)",
+    "NASA Institute for Advanced Concepts",
+    "Airbus Defence and Space GmbH, an ESA contractor LLC",
+    "",
+]
+
+
+def legacy_type(producer: str) -> str:
+    return ('Academia' if is_academia(producer) else
+            'Government' if is_government(producer) else
+            'Industry' if is_industry(producer) else
+            'Unknown')
+
+
+def test_matches_keyword_checks():
+    df = pd.DataFrame({'Tech Producer': PRODUCERS * 3})
+    result = fill_producer_type(df)
+    assert list(result['Producer Type']) == [legacy_type(p) for p in PRODUCERS * 3]
+    assert list(result['Producer Type'][:6]) == [
+        'Industry', 'Academia', 'Government', 'Unknown', 'Academia', 'Academia'
+    ]
+
+
+def test_missing_producer_is_unknown():
+    df = pd.DataFrame({'Tech Producer': ["NASA", None]})
+    assert list(fill_producer_type(df)['Producer Type']) == ['Government', 'Unknown']
+
+
+def test_keywords_from_config(tmp_path):
+    path = tmp_path / 'keywords.json'
+    path.write_text(json.dumps({"Industry": ["Inc."], "Government": ["NASA"]}))
+    keywords = load_producer_keywords(str(path))
+    df = pd.DataFrame({'Tech Producer': ["NASA Spinoff Inc.", "NASA", "University"]})
+    assert list(fill_producer_type(df, keywords)['Producer Type']) == ['Industry', 'Government', 'Unknown']
+
+    path.write_text(json.dumps({"Industry": "Inc."}))
+    with pytest.raises(ValueError):
+        load_producer_keywords(str(path))
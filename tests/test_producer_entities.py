@@ -0,0 +1,92 @@
+"""
+This module tests producer entity resolution in the producer_entities module.
+
+The purpose is to ensure:
+- Type suffixes, legal forms, case and punctuation do not split one producer into several.
+- Variants sharing two distinctive words, or most of their letters, are merged; names sharing
+  a single distinctive word ("Ames Laboratory" and "Ames Research Center"), or differing in one
+  ("University of North Florida" and "University of South Florida"), are not.
+- Resolutions are cached per set of names, and fill_producer_type gives every variant one type.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from producer_entities import entities_path, load_producer_entities, producer_key, resolve_producers
+from scrape_standard_for_appendix import fill_producer_type
+import pandas as pd
+import pytest
+
+
+PRODUCERS = pd.Series([
+    "Ames Research Center (NASA Center)", "NASA Ames", "NASA Ames", "Langley Research Center (NASA Center)",
+    "MicroLink Devices, Inc. (Industry)", "MicroLink Devices", "University of South Florida-Main Campus (Academia)",
+    "University of South Florida", "Florida State University", "Lockheed-Martin", "Lockheed Martin Corporation",
+    "Ames Laboratory", None,
+])
+
+
+def test_producer_key():
+    assert producer_key("MicroLink Devices, Inc. (Industry)") == producer_key("microlink  devices") == "microlink devices"
+    assert producer_key("Lockheed-Martin") == producer_key("Lockheed Martin Corporation")
+    assert producer_key(None) == ''
+    assert producer_key("NASA Ames") == producer_key("Ames Research Center (NASA Center)") == "nasa ames"
+    assert producer_key("Goddard Space Flight Center") == producer_key("NASA Goddard")
+    assert producer_key("Ames Laboratory") == "ames laboratory"
+
+
+def test_resolve():
+    entities = resolve_producers(PRODUCERS)
+    canonical = entities.canonical
+    assert canonical["Ames Research Center (NASA Center)"] == canonical["NASA Ames"] == "NASA Ames"
+    assert canonical["Ames Laboratory"] == "Ames Laboratory"
+    assert canonical["Langley Research Center (NASA Center)"] == "Langley Research Center (NASA Center)"
+    assert canonical["MicroLink Devices, Inc. (Industry)"] == canonical["MicroLink Devices"]
+    assert canonical["University of South Florida-Main Campus (Academia)"] == "University of South Florida"
+    assert canonical["Florida State University"] == "Florida State University"
+    assert canonical["Lockheed Martin Corporation"] == canonical["Lockheed-Martin"]
+    assert len(entities.groups()) == 4
+    names = entities.canonical_names(pd.Series(["NASA Ames", "Unseen Org"]))
+    assert names.tolist() == ["NASA Ames", "Unseen Org"]
+
+
+@pytest.mark.parametrize('a, b', [
+    ("University of South Florida", "University of North Florida"),
+    ("University of Florida", "University of Central Florida"),
+    ("University of Texas at Austin", "University of Texas"),
+    ("University of Texas at Dallas", "University of Texas"),
+])
+def test_distinctive_words_keep_organizations_apart(a, b):
+    canonical = resolve_producers(pd.Series([a, b, b])).canonical
+    assert canonical[a] == a and canonical[b] == b
+
+
+def test_typos_and_split_words_merge():
+    canonical = resolve_producers(pd.Series(["Lockheed Martin", "Lockheed Martin", "Lockheed Martn",
+                                             "MicroLink Devices", "MicroLink Devices", "Micro Link Devices"])).canonical
+    assert canonical["Lockheed Martn"] == "Lockheed Martin"
+    assert canonical["Micro Link Devices"] == "MicroLink Devices"
+
+
+def test_oversized_blocks_are_skipped():
+    producers = pd.Series([f"University {i}" for i in range(30)])
+    entities = resolve_producers(producers, max_block_size=10)
+    assert len(set(entities.canonical.values())) == 30
+
+
+def test_cache(tmp_path):
+    cache_dir = str(tmp_path)
+    entities = load_producer_entities(PRODUCERS, cache_dir)
+    path = entities_path(PRODUCERS, cache_dir)
+    assert os.path.exists(path)
+    assert load_producer_entities(PRODUCERS, cache_dir).canonical == entities.canonical
+    assert entities_path(PRODUCERS.iloc[:-2], cache_dir) != path
+
+
+def test_fill_producer_type_unifies_variants():
+    df = pd.DataFrame({'Tech Producer': ["Ames Research Center (NASA Center)", "Ames Research Center",
+                                         "MicroLink Devices", "MicroLink Devices, Inc. (Industry)", "Nobody"]})
+    plain = fill_producer_type(df.copy())['Producer Type'].tolist()
+    assert plain == ['Government', 'Government', 'Unknown', 'Industry', 'Unknown']
+    entities = resolve_producers(df['Tech Producer'])
+    unified = fill_producer_type(df.copy(), entities=entities)['Producer Type'].tolist()
+    assert unified == ['Government', 'Government', 'Industry', 'Industry', 'Unknown']
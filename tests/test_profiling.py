@@ -0,0 +1,50 @@
+"""
+This module tests the per-stage instrumentation in the profiling module.
+
+The purpose is to ensure:
+- Decorated stages are recorded, nested stages with their depth, only while profiling is enabled.
+- Row counts, timings and the JSON trace are filled in.
+"""
+import sys
+import os
+import json
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from profiling import enable_profiling, disable_profiling, profiled_stage, stage
+import pandas as pd
+
+
+@profiled_stage()
+def inner(df):
+    return df.head(2)
+
+
+@profiled_stage('outer stage')
+def outer(df):
+    with stage('inline', rows_in=len(df)) as record:
+        record.rows_out = len(df)
+    return inner(df)
+
+
+def test_disabled_records_nothing():
+    profiler = enable_profiling()
+    disable_profiling()
+    outer(pd.DataFrame({'a': range(5)}))
+    assert profiler.records == []
+
+
+def test_records_nested_stages(tmp_path):
+    profiler = enable_profiling(cprofile_dir=str(tmp_path / 'prof'))
+    try:
+        outer(pd.DataFrame({'a': range(5)}))
+    finally:
+        disable_profiling()
+    stages = [(r.stage, r.depth, r.rows_in, r.rows_out) for r in profiler.records]
+    assert stages == [('outer stage', 0, 5, 2), ('inline', 1, 5, 5), ('inner', 1, 5, 2)]
+    assert all(r.wall_s >= 0 and r.traced_peak_delta_mb is not None for r in profiler.records)
+    assert os.path.exists(profiler.records[0].cprofile_path)
+    assert 'outer stage' in profiler.summary_table()
+
+    profiler.save(str(tmp_path / 'trace.json'))
+    with open(tmp_path / 'trace.json') as handle:
+        trace = json.load(handle)
+    assert [s['stage'] for s in trace['stages']] == ['outer stage', 'inline', 'inner']
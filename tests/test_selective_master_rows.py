@@ -0,0 +1,42 @@
+"""
+This module tests capture_selected_master_rows from the inventory_processor module.
+
+The purpose is to ensure:
+- Only the requested rows are captured, keyed by their real spreadsheet row number.
+- The captured values match what capture_master_content reads for the same rows.
+- standardize_data gives the same result from the selective frame as from the full one.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inventory_processor import (
+    capture_selected_master_rows, capture_rows_and_metadata, standardize_data, HEADER_ROW_OFFSET
+)
+import pandas as pd
+
+
+def test_selected_rows_match_master(workbooks, master_frame):
+    rows = [41, 2, 17, 9]
+    selected = capture_selected_master_rows(rows, 'INVENTORY.xlsx', workbooks)
+    assert selected.index.name == 'Row no.'
+    assert list(selected.index) == sorted(rows)
+    for row_no in rows:
+        expected = master_frame.loc[row_no - HEADER_ROW_OFFSET]
+        for col, value in selected.loc[row_no].items():
+            if pd.isna(expected[col]):
+                assert pd.isna(value), f"Row {row_no} - {col} expected to be NA, got {value}"
+            else:
+                assert value == expected[col], f"Row {row_no} - {col} mismatch"
+
+
+def test_rows_past_the_end_are_ignored(workbooks):
+    selected = capture_selected_master_rows([3, 500], 'INVENTORY.xlsx', workbooks)
+    assert list(selected.index) == [3]
+
+
+def test_standardize_from_selection(workbooks, master_frame):
+    metadata, rows_to_use = capture_rows_and_metadata(workbooks, 'FILTERED.xlsx')
+    selected = capture_selected_master_rows(rows_to_use, 'INVENTORY.xlsx', workbooks)
+    from_full = standardize_data(master_frame, metadata, rows_to_use)
+    from_selection = standardize_data(selected, metadata, rows_to_use)
+    pd.testing.assert_frame_equal(from_selection, from_full, check_dtype=False)
@@ -0,0 +1,126 @@
+"""
+This module tests the snapshot diff and row-number remapping in the snapshot_diff module.
+
+The purpose is to ensure:
+- Rows are matched by normalized key across versions, and added, removed, moved and changed rows are reported.
+- Filtered frames, standardize_data inputs and FILTERED workbooks are remapped onto the new master.
+- Filtered rows missing from the new master raise, are dropped or are kept, as asked.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from snapshot_diff import diff_snapshots, remap_filtered_frame, remap_filtered_workbook, remap_inputs, row_fingerprints
+from inventory_processor import capture_filtered_data, capture_master_content, capture_rows_and_metadata, standardize_data
+from conftest import MASTER_COLUMNS, master_row
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+
+def write_rows(path: str, rows: list[list]) -> None:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Inventory"
+    ws.append(MASTER_COLUMNS)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+@pytest.fixture
+def versions(workbooks):
+    """
+    OLD_INVENTORY.xlsx is the synthetic master; INVENTORY.xlsx is re-exported with two rows
+    inserted at the top, Technology 3 removed, Technology 10 edited and Technology 20 re-cased.
+    """
+    old_rows = [master_row(i) for i in range(40)]
+    new_rows = [list(r) for r in old_rows if r[0] != "Technology 3"]
+    new_rows = [["New Technology A", "Acme (Industry)"] + [None] * 8,
+                ["New Technology B", "Acme (Industry)"] + [None] * 8] + new_rows
+    edited = next(r for r in new_rows if r[0] == "Technology 10")
+    edited[2] = "A rewritten description"
+    recased = next(r for r in new_rows if r[0] == "Technology 20")
+    recased[0] = " technology\xa020 "
+    write_rows(os.path.join(workbooks, "OLD_INVENTORY.xlsx"), old_rows)
+    write_rows(os.path.join(workbooks, "INVENTORY.xlsx"), new_rows)
+    old = capture_master_content("OLD_INVENTORY.xlsx", workbooks, use_cache=False)
+    new = capture_master_content("INVENTORY.xlsx", workbooks, use_cache=False)
+    return workbooks, old, new
+
+
+def test_fingerprints_normalize(master_frame):
+    frame = master_frame.head(2).copy()
+    spaced = frame.copy()
+    spaced['Technology Name'] = ["  TECHNOLOGY\xa00 ", "Technology  1"]
+    columns = ['Technology Name', 'Tech Producer']
+    assert (row_fingerprints(frame, columns, ignore_case=True) == row_fingerprints(spaced, columns, ignore_case=True)).all()
+    assert (row_fingerprints(frame, columns) != row_fingerprints(spaced, columns))[0]
+    floats = pd.DataFrame({'TRL': [5.0, None]})
+    ints = pd.DataFrame({'TRL': pd.array([5, None], dtype='Int64')})
+    assert (row_fingerprints(floats) == row_fingerprints(ints)).all()
+
+
+def test_diff(versions):
+    _, old, new = versions
+    diff = diff_snapshots(old, new)
+    # Old data row i sits on row i + 2; after the two inserts and the removal, rows after it move.
+    assert diff.added.tolist() == [2, 3]
+    assert diff.removed.tolist() == [5]
+    assert diff.remap[2] == 4 and diff.remap[4] == 6
+    assert diff.remap[6] == 7 and diff.remap[41] == 42
+    assert len(diff.remap) == 39
+    assert diff.changed['old'].tolist() == [12, 22]
+    assert diff.moved == 39
+    assert not diff.identical
+    assert diff_snapshots(old, old).identical
+    assert "39 rows matched" in diff.summary()
+
+
+def test_duplicate_keys_pair_in_order():
+    old = pd.DataFrame({'Technology Name': ['A', 'B', 'A'], 'Tech Producer': ['X', 'Y', 'X'], 'Notes': [1, 2, 3]})
+    new = old.iloc[[1, 0, 2]].reset_index(drop=True)
+    diff = diff_snapshots(old, new)
+    assert diff.remap.to_dict() == {2: 3, 3: 2, 4: 4}
+    assert diff.changed.empty
+
+
+def test_remap_filtered_frame(versions):
+    workbooks, old, new = versions
+    diff = diff_snapshots(old, new)
+    filtered = capture_filtered_data(workbooks, "FILTERED.xlsx", as_frame=True)
+    with pytest.raises(ValueError, match="not in the new inventory: 5"):
+        remap_filtered_frame(filtered, diff)
+    with pytest.warns(UserWarning):
+        dropped = remap_filtered_frame(filtered, diff, unmapped='drop')
+    assert dropped['Row no.'].tolist() == [4, 8, 12, 21, 32]
+    with pytest.warns(UserWarning):
+        kept = remap_filtered_frame(filtered, diff, unmapped='keep')
+    assert kept['Row no.'].tolist() == [4, 8, 12, 5, 21, 32]
+
+
+def test_remap_inputs_matches_new_master(versions):
+    workbooks, old, new = versions
+    metadata, rows_to_use = capture_rows_and_metadata(workbooks, "FILTERED.xlsx", as_frame=True)
+    with pytest.warns(UserWarning):
+        remapped, new_rows, diff = remap_inputs(metadata, rows_to_use, new, "OLD_INVENTORY.xlsx", workbooks,
+                                                use_cache=False, unmapped='drop')
+    assert len(new_rows) == len(rows_to_use) - 1
+    standardized = standardize_data(new, remapped, new_rows)
+    expected = standardize_data(old, metadata.drop(index=5), [r for r in rows_to_use if r != 5])
+    assert standardized['Technology Name'].tolist() == expected['Technology Name'].tolist()
+    assert standardized['Notes'].tolist() == expected['Notes'].tolist()
+
+
+def test_remap_filtered_workbook(versions, tmp_path):
+    workbooks, old, new = versions
+    diff = diff_snapshots(old, new)
+    filtered = os.path.join(workbooks, "FILTERED.xlsx")
+    with pytest.raises(ValueError):
+        remap_filtered_workbook(filtered, diff)
+    output = str(tmp_path / "FILTERED_remapped.xlsx")
+    with pytest.warns(UserWarning):
+        updated = remap_filtered_workbook(filtered, diff, output, unmapped='drop')
+    assert updated == 6
+    remapped = capture_filtered_data(str(tmp_path), "FILTERED_remapped.xlsx", as_frame=True)
+    assert remapped['Row no.'].tolist() == [4, 8, 12, 21, 32]
+    assert remapped['Notes'].iloc[0] == "Solar" and pd.isna(remapped['Notes'].iloc[1])
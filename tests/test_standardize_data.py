@@ -0,0 +1,43 @@
+"""
+This module tests the columnar standardize_data join from the inventory_processor module.
+
+The purpose is to ensure:
+- Rows come out in master order with master columns first and metadata columns appended.
+- Metadata columns that also exist in the master overwrite them only for rows with metadata.
+- A metadata frame indexed by row number gives the same result as a metadata dict.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inventory_processor import standardize_data
+import pandas as pd
+
+
+def test_columns_and_order(master_frame):
+    metadata = {
+        9: {'Relevance (1-5)': 2, 'Notes': 'b', 'Link': None},
+        4: {'Relevance (1-5)': 5, 'Notes': 'a', 'Link': 'x'},
+    }
+    result = standardize_data(master_frame, metadata, [9, 4, 30])
+    assert list(result.columns) == list(master_frame.columns) + ['Relevance (1-5)', 'Notes', 'Link']
+    assert list(result['Technology Name']) == ['Technology 2', 'Technology 7', 'Technology 28']
+    assert list(result['Notes'][:2]) == ['a', 'b']
+    assert pd.isna(result.loc[2, 'Relevance (1-5)'])
+
+
+def test_metadata_overrides_master_columns(master_frame):
+    result = standardize_data(master_frame, {3: {'TRL': 7}}, [3, 4])
+    assert list(result['TRL']) == [7, master_frame.loc[2, 'TRL']]
+
+
+def test_metadata_frame_matches_dict(master_frame):
+    metadata = {5: {'Relevance (1-5)': 1, 'Notes': 'n', 'Link': 'l'}}
+    as_frame = pd.DataFrame.from_dict(metadata, orient='index')
+    pd.testing.assert_frame_equal(
+        standardize_data(master_frame, as_frame, [5]),
+        standardize_data(master_frame, metadata, [5]),
+    )
+
+
+def test_no_rows_selected(master_frame):
+    assert standardize_data(master_frame, {}, [10_000]).empty
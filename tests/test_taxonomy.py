@@ -0,0 +1,82 @@
+"""
+This module tests the taxonomy tree in the taxonomy module.
+
+The purpose is to ensure:
+- Labels with inconsistent separators, case and non-breaking spaces parse to the same code; bare ints do not.
+- Node ids are preorder, so ancestor and descendant lookups agree with the codes.
+- Rows get the node of their most specific category, and rollups count and average per level.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from taxonomy import TaxonomyTree, attach_node_ids, appendix_rollup, normalize_labels, parse_taxonomy, rollup
+from scrape_standard_for_appendix import build_slim_dataframe
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def test_parse():
+    parsed = parse_taxonomy("TX07.1.2\xa0Resource  Acquisition")
+    assert (parsed.code, parsed.name) == ("TX07.1.2", "Resource Acquisition")
+    assert parse_taxonomy("tx7.1.2 - Resource Acquisition").code == "TX07.1.2"
+    assert parse_taxonomy("FN04: Manufacturing").label == "FN04: Manufacturing"
+    assert parse_taxonomy(9) is None and parse_taxonomy("Other") is None and parse_taxonomy(None) is None
+
+
+def test_normalize_labels():
+    labels = pd.Series(["TX03.1.1:Photovoltaic", "TX07.1.2\xa0Resource", 9, "", None, "Other  notes"])
+    assert normalize_labels(labels).tolist() == [
+        "TX03.1.1: Photovoltaic", "TX07.1.2: Resource", "Unknown", "Unknown", "Unknown", "Other notes"
+    ]
+
+
+def test_tree_lookups():
+    tree = TaxonomyTree.from_labels(["TX03.1.1: PV", "TX03.2: Storage", "TX10.1: Autonomy", "FN04: Manufacturing", 9])
+    assert tree.codes == ['', 'FN04', 'TX03', 'TX03.1', 'TX03.1.1', 'TX03.2', 'TX10', 'TX10.1']
+    assert tree.names[tree.node_id('TX03.1.1')] == 'PV' and tree.names[tree.node_id('TX03')] == ''
+    tx03 = tree.node_id('TX03')
+    assert [tree.codes[node] for node in tree.descendants(tx03)] == ['TX03.1', 'TX03.1.1', 'TX03.2']
+    assert tree.ancestor(tree.node_id('TX03.1.1'), 1) == tx03
+    assert tree.ancestor(tree.node_id('TX03.1.1'), 2) == tree.node_id('TX03.1')
+    assert tree.ancestor(tx03, 2) == -1
+    assert tree.is_ancestor(tx03, [tree.node_id('TX03.2'), tree.node_id('TX10.1'), tx03]).tolist() == [True, False, True]
+    with pytest.raises(KeyError):
+        tree.node_id('TX99')
+
+
+def test_attach_node_ids(master_frame):
+    tree = TaxonomyTree.from_frame(master_frame)
+    df = attach_node_ids(master_frame.copy(), tree)
+    codes = [tree.codes[node] if node >= 0 else None for node in df['TX Node']]
+    # Level Three holds TX03.1.1, TX08.1.2, TX07.1.2 and the bare int 9, which falls back to Level Two on odd rows
+    assert codes[:4] == ['TX03.1.1', 'TX08.1.2', 'TX07.1.2', 'TX03.1']
+    assert codes[4] == 'TX03.1.1'
+    df = attach_node_ids(df, tree, ('Level Two Functional Category', 'Level One Functional Category'), 'FN Node')
+    assert (df['FN Node'] >= 0).tolist() == [i % 5 == 0 for i in range(len(df))]
+
+
+def test_rollup():
+    tree = TaxonomyTree.from_labels(["TX03.1.1: PV", "TX03.2.1: Cells", "TX08.1.2: Electronics", "FN04: Manufacturing"])
+    nodes = tree.node_ids(pd.Series(["TX03.1.1: PV", "TX03.2.1: Cells", "TX08.1.2: Electronics", 9, "FN04: Manufacturing"]))
+    result = rollup(tree, nodes, 1, {'TRL': [4, 6, np.nan, 9, 1]})
+    assert result['Code'].tolist() == ['TX03', 'TX08', 'Unknown']
+    assert result['Count'].tolist() == [2, 1, 2]
+    assert result['Mean TRL'].tolist()[:1] == [5.0] and np.isnan(result['Mean TRL'][1])
+    assert rollup(tree, nodes, 2, system=None)['Code'].tolist() == ['TX03.1', 'TX03.2', 'TX08.1', 'Unknown']
+
+
+def test_appendix_rollup(master_frame):
+    standardized = master_frame.assign(**{'Relevance (1-5)': 3, 'Notes': None})
+    slim = build_slim_dataframe(standardized)
+    assert slim['Level 3 Taxonomy'].tolist()[:4] == [
+        'TX03.1.1: Photovoltaic Electrical Power', 'TX08.1.2: Electronics',
+        'TX07.1.2: Resource Acquisition, Isolation, and Preparation', 'Unknown'
+    ]
+    result = appendix_rollup(slim, 1).set_index('Code')
+    assert result.loc['TX03', 'Count'] == 10 and result.loc['Unknown', 'Count'] == 10
+    assert result['Count'].sum() == len(slim)
+    assert (result['Mean Relevance (1-5)'].dropna() == 3).all()
+    # TRL 0 is the fill value for a missing TRL and stays out of the mean
+    expected = pd.to_numeric(slim['TRL'])[slim['Level 3 Taxonomy'].str.startswith('TX03')].replace(0, np.nan).mean()
+    assert result.loc['TX03', 'Mean TRL'] == pytest.approx(expected)
@@ -0,0 +1,71 @@
+"""
+This module tests the header validation in the validate module.
+
+The purpose is to ensure:
+- The header region is read the same way pandas reads it, shared and inline strings included.
+- Valid workbooks pass; misplaced headers, missing 'Row no.' and missing columns are all reported together.
+- Missing or unreadable files are reported instead of raising.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from validate import detect_header_row, read_header_regions, validate_workbooks
+from conftest import MASTER_COLUMNS, write_filtered, master_row
+from openpyxl import Workbook
+
+
+def test_read_header_regions(workbooks):
+    regions = read_header_regions(os.path.join(workbooks, 'FILTERED.xlsx'), max_rows=6)
+    assert list(regions) == ['Power', 'Sensors', 'Technology Gaps']
+    power = regions['Power']
+    assert power[0] == ['Power selections'] and power[1] == []
+    assert power[3][:3] == ['Row no.', 'Organization', 'Technology']
+    assert power[4][:2] == [2, 'Org'] and power[4][6] == 5
+    assert detect_header_row(power, ['Row no.'], required='Row no.') == 3
+
+
+def test_valid_workbooks(workbooks):
+    report = validate_workbooks(workbooks, 'FILTERED.xlsx', 'INVENTORY.xlsx')
+    assert report.ok, report.summary()
+    assert report.problems == []
+    assert report.sheets_checked == 3
+
+
+def test_every_problem_reported(workbooks):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Shifted'
+    ws.append(['Title'])
+    ws.append(['Row no.', 'Organization', 'Relevance (1-5)'])
+    ws.append([4, 'Org', 3])
+    no_rows = wb.create_sheet('No row numbers')
+    no_rows.append(['Organization', 'Notes'])
+    wb.save(os.path.join(workbooks, 'BAD_FILTERED.xlsx'))
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Inventory'
+    ws.append([None])
+    ws.append([col for col in MASTER_COLUMNS if col != 'TRL'])
+    ws.append(master_row(0)[:-1])
+    wb.save(os.path.join(workbooks, 'BAD_INVENTORY.xlsx'))
+
+    report = validate_workbooks(workbooks, 'BAD_FILTERED.xlsx', 'BAD_INVENTORY.xlsx')
+    assert not report.ok
+    messages = [str(problem) for problem in report.problems]
+    assert any('[Shifted]' in m and 'header is on row 2' in m for m in messages)
+    assert any('[Shifted]' in m and "'Notes', 'Link'" in m and m.startswith('WARNING') for m in messages)
+    assert any('[No row numbers]' in m and "no 'Row no.'" in m for m in messages)
+    assert any('[Inventory]' in m and 'must be the first row' in m for m in messages)
+    assert any('[Inventory]' in m and "'TRL'" in m and m.startswith('ERROR') for m in messages)
+    assert len(messages) == 5
+
+
+def test_missing_files(workbooks):
+    with open(os.path.join(workbooks, 'broken.xlsx'), 'w') as handle:
+        handle.write('not a zip')
+    write_filtered(os.path.join(workbooks, 'NO_MASTER_SHEET.xlsx'), {'Power': []})
+    report = validate_workbooks(workbooks, 'broken.xlsx', 'missing.xlsx')
+    assert [problem.file for problem in report.problems] == ['broken.xlsx', 'missing.xlsx']
+    report = validate_workbooks(workbooks, None, 'NO_MASTER_SHEET.xlsx')
+    assert "no 'Inventory' sheet" in report.summary()
@@ -0,0 +1,111 @@
+"""
+This module tests the resident watch mode in the watch module.
+
+The purpose is to ensure:
+- The watcher's outputs match a one-shot pipeline run.
+- A saved FILTERED.xlsx is picked up only after the debounce interval, and a partially written file is skipped.
+- A changed INVENTORY.xlsx makes the watcher reload the master.
+- Sheets with identical content keep their own sheet names across polls.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from watch import InventoryWatcher
+from pipeline import PipelineOptions, run_pipeline
+from conftest import DEFAULT_SHEETS, write_filtered, write_master
+from openpyxl import load_workbook
+import pandas as pd
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_watcher(data_dir: str, tmp_path, clock: FakeClock) -> InventoryWatcher:
+    options = PipelineOptions(data_dir=data_dir, filtered_path="FILTERED.xlsx", inventory_path="INVENTORY.xlsx",
+                              cache_dir=str(tmp_path / 'cache'))
+    write = {'appendix': str(tmp_path / 'out' / 'slim.json')}
+    return InventoryWatcher(options, write, debounce=1.0, log=lambda message: None, clock=clock)
+
+
+def touch_later(path: str, step: int):
+    """Make sure the rewritten file's mtime differs even on coarse-grained filesystems."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + step * 1_000_000_000))
+
+
+def test_outputs_match_pipeline(workbooks, tmp_path):
+    watcher = make_watcher(workbooks, tmp_path, FakeClock())
+    watcher.start()
+    expected = run_pipeline(options=watcher.options)
+    pd.testing.assert_frame_equal(watcher.artifacts['appendix'], expected['appendix'])
+    pd.testing.assert_frame_equal(watcher.artifacts['standardized'], expected['standardized'])
+    assert os.path.exists(tmp_path / 'out' / 'slim.json')
+
+
+def test_filtered_change_is_debounced(workbooks, tmp_path):
+    clock = FakeClock()
+    watcher = make_watcher(workbooks, tmp_path, clock)
+    watcher.start()
+    assert not watcher.poll()
+
+    filtered = os.path.join(workbooks, "FILTERED.xlsx")
+    sheets = dict(DEFAULT_SHEETS, Power=DEFAULT_SHEETS["Power"] + [(15, 5, "Added", None)])
+    write_filtered(filtered, sheets)
+    touch_later(filtered, 1)
+    assert not watcher.poll()  # Change seen, not settled yet
+    clock.now = 0.5
+    assert not watcher.poll()
+    clock.now = 1.5
+    assert watcher.poll()
+    assert 'Technology 13' in watcher.artifacts['standardized']['Technology Name'].tolist()
+    assert not watcher.poll()  # Nothing new
+
+
+def test_partial_write_is_skipped(workbooks, tmp_path):
+    clock = FakeClock()
+    watcher = make_watcher(workbooks, tmp_path, clock)
+    watcher.start()
+    filtered = os.path.join(workbooks, "FILTERED.xlsx")
+    with open(filtered, 'r+b') as handle:
+        handle.truncate(100)
+    watcher.poll()
+    clock.now = 5.0
+    assert not watcher.poll()
+
+
+def test_master_change_reloads(workbooks, tmp_path):
+    clock = FakeClock()
+    watcher = make_watcher(workbooks, tmp_path, clock)
+    watcher.start()
+    assert len(watcher.master) == 40
+
+    inventory = os.path.join(workbooks, "INVENTORY.xlsx")
+    write_master(inventory, rows=50)
+    touch_later(inventory, 1)
+    watcher.poll()
+    clock.now = 2.0
+    assert watcher.poll()
+    assert len(watcher.master) == 50
+    assert watcher.master.index.name == 'Row no.'
+
+
+def test_identical_sheets_keep_their_names(workbooks, tmp_path):
+    filtered = os.path.join(workbooks, "FILTERED.xlsx")
+    write_filtered(filtered, {"Copy A": DEFAULT_SHEETS["Power"], "Copy B": DEFAULT_SHEETS["Power"]})
+    wb = load_workbook(filtered)
+    for name in ("Copy A", "Copy B"):
+        wb[name]["A1"] = "Selections"  # Same cells, so the same fingerprint
+    wb.save(filtered)
+    watcher = make_watcher(workbooks, tmp_path, FakeClock())
+    watcher.options.duplicate_policy = 'error'
+    for _ in range(2):  # Parsed, then served from the sheet cache
+        with pytest.raises(ValueError) as error:
+            watcher.capture_metadata()
+        assert "Copy A" in str(error.value) and "Copy B" in str(error.value)
+    assert len(watcher._sheets) == 2
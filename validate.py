@@ -0,0 +1,285 @@
+"""
+Fast header and schema validation of FILTERED.xlsx and INVENTORY.xlsx.
+
+capture_filtered_data only notices a sheet without 'Row no.', or with its header
+on another row than FILTERED_HEADER_INDEX, after parsing that sheet with pandas,
+and a master without an expected column fails much later. validate_workbooks
+checks both workbooks up front and reports every problem at once:
+
+- each workbook is opened as the zip archive it is, and only the first
+  HEADER_SCAN_ROWS rows of each sheet are streamed from the worksheet XML; the
+  rest of the sheet is never read. Shared strings are streamed too, and only up
+  to the highest one a header refers to. (openpyxl's read-only mode would load
+  the whole shared string table first, which dominates on large workbooks.);
+- the header row of each sheet is detected: the first row holding 'Row no.' in a
+  filtered sheet, the row with most MASTER_COLUMNS in the master;
+- a filtered sheet must have 'Row no.' on row FILTERED_HEADER_INDEX + 1, and should
+  have the METADATA_COLUMNS; the master's 'Inventory' sheet must have every
+  MASTER_COLUMNS column in its first row.
+
+Usage:
+    python validate.py --data-dir ./data [--filtered-name FILTERED.xlsx] [--inventory-name INVENTORY.xlsx]
+
+The exit status is 1 when an error is found, so the command can run as a pre-save hook.
+"""
+from argparse import ArgumentParser
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from xml.etree import ElementTree
+import os
+import re
+import time
+import zipfile
+
+from inventory_cache import workbook_parts
+from inventory_processor import (
+    DATA_DIR, FILTERED_PATH, INVENTORY_PATH, FILTERED_HEADER_INDEX, SHEETS_TO_SKIP, METADATA_COLUMNS, MASTER_COLUMNS
+)
+
+
+HEADER_SCAN_ROWS = 20  # Rows read from the top of each sheet to find its header
+MASTER_SHEET = 'Inventory'
+_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_CELL_REF = re.compile(r'([A-Z]+)(\d+)')
+
+
+@dataclass
+class Problem:
+    """One finding of validate_workbooks."""
+    file: str
+    sheet: Optional[str]
+    severity: str  # 'error' (processing will fail or be wrong) or 'warning'
+    message: str
+
+    def __str__(self) -> str:
+        where = f"{self.file} [{self.sheet}]" if self.sheet else self.file
+        return f"{self.severity.upper()}: {where}: {self.message}"
+
+
+@dataclass
+class ValidationReport:
+    """Every problem found in the two workbooks."""
+    problems: list[Problem] = field(default_factory=list)
+    sheets_checked: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not any(problem.severity == 'error' for problem in self.problems)
+
+    def add(self, file: str, sheet: Optional[str], severity: str, message: str) -> None:
+        self.problems.append(Problem(os.path.basename(file), sheet, severity, message))
+
+    def summary(self) -> str:
+        """Human-readable list of the problems, or a single line when there are none."""
+        errors = sum(problem.severity == 'error' for problem in self.problems)
+        head = (f"{self.sheets_checked} sheets checked in {self.seconds * 1000:.0f} ms: "
+                f"{errors} error(s), {len(self.problems) - errors} warning(s).")
+        return "\n".join([head] + [f"- {problem}" for problem in self.problems])
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def _stream_top_rows(archive: zipfile.ZipFile, part: str, max_rows: int) -> list[list[Any]]:
+    """
+    The first max_rows rows of a worksheet as lists of cell values; shared strings are
+    returned as ('s', index) placeholders. Parsing stops at the first row past max_rows.
+    """
+    rows: list[list[Any]] = [[] for _ in range(max_rows)]
+    row_no = 0
+    with archive.open(part) as handle:
+        for event, elem in ElementTree.iterparse(handle, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == _NS + 'row':
+                    row_no = int(elem.get('r') or row_no + 1)
+                    if row_no > max_rows:
+                        break
+                continue
+            if elem.tag != _NS + 'c':
+                if elem.tag == _NS + 'row':
+                    elem.clear()
+                continue
+            match = _CELL_REF.match(elem.get('r', ''))
+            cells = rows[row_no - 1]
+            column = _column_index(match.group(1)) if match else len(cells)
+            kind = elem.get('t')
+            if kind == 'inlineStr':
+                value = ''.join(node.text or '' for node in elem.iter(_NS + 't'))
+            else:
+                raw = elem.findtext(_NS + 'v')
+                if raw is None:
+                    value = None
+                elif kind == 's':
+                    value = ('s', int(raw))
+                elif kind in ('str', 'e'):
+                    value = raw
+                elif kind == 'b':
+                    value = raw == '1'
+                else:
+                    number = float(raw)
+                    value = int(number) if number.is_integer() else number
+            cells.extend([None] * (column + 1 - len(cells)))
+            cells[column] = value
+    return rows
+
+
+def _stream_shared_strings(archive: zipfile.ZipFile, part: str, needed: set[int]) -> dict[int, str]:
+    """The shared strings with the given indexes, reading the table only up to the highest one."""
+    strings: dict[int, str] = {}
+    if not needed or part not in archive.namelist():
+        return strings
+    last = max(needed)
+    index = 0
+    with archive.open(part) as handle:
+        for event, elem in ElementTree.iterparse(handle, events=('end',)):
+            if elem.tag != _NS + 'si':
+                continue
+            if index in needed:
+                strings[index] = ''.join(node.text or '' for node in elem.iter(_NS + 't'))
+            elem.clear()
+            index += 1
+            if index > last:
+                break
+    return strings
+
+
+def read_header_regions(path: str, max_rows: int = HEADER_SCAN_ROWS,
+                        sheets: Optional[set[str]] = None) -> dict[str, list[list[Any]]]:
+    """
+    Read the first rows of every sheet of an .xlsx workbook without parsing the rest.
+    Args:
+        path (str): Path to the workbook.
+        max_rows (int): Rows to read from the top of each sheet.
+        sheets (Optional[set[str]]): Only read these sheets; all by default.
+    Returns:
+        dict[str, list[list[Any]]]: Sheet name -> max_rows lists of cell values, in sheet order.
+    """
+    with zipfile.ZipFile(path) as archive:
+        sheet_parts, shared_strings_part = workbook_parts(archive)
+        regions = {name: _stream_top_rows(archive, part, max_rows)
+                   for name, part in sheet_parts.items() if sheets is None or name in sheets}
+        needed = {value[1] for rows in regions.values() for cells in rows for value in cells if isinstance(value, tuple)}
+        strings = _stream_shared_strings(archive, shared_strings_part, needed)
+    return {
+        name: [[strings.get(value[1]) if isinstance(value, tuple) else value for value in cells] for cells in rows]
+        for name, rows in regions.items()
+    }
+
+
+def _header_names(cells: list[Any]) -> list[str]:
+    return [str(value).strip() for value in cells if value is not None and str(value).strip()]
+
+
+def detect_header_row(rows: list[list[Any]], expected: list[str], required: Optional[str] = None) -> Optional[int]:
+    """
+    0-based index of the header row: the first row containing `required` if given, otherwise
+    the row with the most `expected` names (the first on ties). None if no row qualifies.
+    """
+    best, best_score = None, 0
+    for i, cells in enumerate(rows):
+        names = set(_header_names(cells))
+        if required is not None:
+            if required in names:
+                return i
+            continue
+        score = len(names.intersection(expected))
+        if score > best_score:
+            best, best_score = i, score
+    return best
+
+
+def _check_columns(report: ValidationReport, file: str, sheet: str, names: list[str],
+                   expected: list[str], severity: str, consequence: str) -> None:
+    missing = [col for col in expected if col not in names]
+    if missing:
+        report.add(file, sheet, severity, f"missing column(s) {', '.join(repr(col) for col in missing)}; {consequence}.")
+    duplicated = sorted({name for name in names if names.count(name) > 1})
+    if duplicated:
+        report.add(file, sheet, 'warning', f"duplicate column name(s) {', '.join(repr(col) for col in duplicated)}.")
+
+
+def validate_filtered(path: str, report: ValidationReport) -> None:
+    """Check every sheet of a filtered workbook (except SHEETS_TO_SKIP) and add its problems to the report."""
+    regions = read_header_regions(path)
+    checked = [name for name in regions if name not in SHEETS_TO_SKIP]
+    if not checked:
+        report.add(path, None, 'error', "no sheets to process (every sheet is in SHEETS_TO_SKIP).")
+    for sheet in checked:
+        report.sheets_checked += 1
+        rows = regions[sheet]
+        header = detect_header_row(rows, ['Row no.'], required='Row no.')
+        if header is None:
+            report.add(path, sheet, 'error', f"no 'Row no.' column header in the first {HEADER_SCAN_ROWS} rows.")
+            continue
+        if header != FILTERED_HEADER_INDEX:
+            report.add(path, sheet, 'error',
+                       f"header is on row {header + 1}, but the processor reads it from row {FILTERED_HEADER_INDEX + 1} "
+                       f"(FILTERED_HEADER_INDEX = {FILTERED_HEADER_INDEX}).")
+        _check_columns(report, path, sheet, _header_names(rows[header]), METADATA_COLUMNS, 'warning',
+                       'they will be empty in the output')
+
+
+def validate_master(path: str, report: ValidationReport, sheet_name: str = MASTER_SHEET) -> None:
+    """Check the master inventory's sheet and add its problems to the report."""
+    regions = read_header_regions(path, sheets={sheet_name})
+    if sheet_name not in regions:
+        report.add(path, None, 'error', f"no '{sheet_name}' sheet.")
+        return
+    report.sheets_checked += 1
+    rows = regions[sheet_name]
+    header = detect_header_row(rows, MASTER_COLUMNS)
+    if header is None:
+        report.add(path, sheet_name, 'error',
+                   f"none of the expected columns found in the first {HEADER_SCAN_ROWS} rows.")
+        return
+    if header != 0:
+        report.add(path, sheet_name, 'error', f"header is on row {header + 1}; it must be the first row.")
+    _check_columns(report, path, sheet_name, _header_names(rows[header]), MASTER_COLUMNS, 'error',
+                   'the standardized and slim outputs need them')
+
+
+def validate_workbooks(data_dir: str = DATA_DIR, filtered_path: Optional[str] = FILTERED_PATH,
+                       inventory_path: Optional[str] = INVENTORY_PATH) -> ValidationReport:
+    """
+    Check the headers of the filtered workbook and the master inventory.
+    Args:
+        data_dir (str): Directory where the data files are stored.
+        filtered_path (Optional[str]): Filtered workbook, relative to data_dir; None to skip it.
+        inventory_path (Optional[str]): Master inventory, relative to data_dir; None to skip it.
+    Returns:
+        ValidationReport: Every problem found; `ok` is False if any is an error.
+    """
+    started = time.perf_counter()
+    report = ValidationReport()
+    for name, check in ((filtered_path, validate_filtered), (inventory_path, validate_master)):
+        if name is None:
+            continue
+        path = os.path.join(data_dir, name)
+        if not os.path.exists(path):
+            report.add(path, None, 'error', "file not found.")
+            continue
+        try:
+            check(path, report)
+        except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as error:
+            report.add(path, None, 'error', f"not a readable .xlsx workbook ({error}).")
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Check the headers of the filtered workbook and the master inventory.")
+    parser.add_argument('--data-dir', type=str, default=DATA_DIR, help='Directory where the data files are stored.')
+    parser.add_argument('--filtered-name', type=str, default=FILTERED_PATH, help='Name of the filtered data file.')
+    parser.add_argument('--inventory-name', type=str, default=INVENTORY_PATH, help='Name of the master inventory file.')
+    parser.add_argument('--skip-inventory', action='store_true', help='Only check the filtered workbook.')
+    args = parser.parse_args()
+
+    result = validate_workbooks(args.data_dir, args.filtered_name, None if args.skip_inventory else args.inventory_name)
+    print(result.summary())
+    if not result.ok:
+        raise SystemExit(1)
@@ -0,0 +1,232 @@
+"""
+Resident watch mode: keep the master inventory loaded and regenerate the outputs
+whenever FILTERED.xlsx is saved.
+
+The master inventory changes a few times a year while FILTERED.xlsx changes many
+times a day, so a one-shot run spends most of its time importing pandas and parsing
+the Inventory sheet again. The watcher parses the master once, keeps it in memory
+indexed by its spreadsheet row numbers, and polls the modification time and size of
+both workbooks:
+
+- A change is only acted on once the file has stayed the same for the debounce
+  interval and is a complete .xlsx (zip) archive, so the partial writes Excel makes
+  while saving are skipped. Excel's `~$` lock files and temporary files are never
+  looked at, since only the two workbook paths are watched.
+- When FILTERED.xlsx settles, only the sheets whose fingerprint changed are parsed
+  again (see inventory_cache.sheet_fingerprints), then the standardize, slim and
+  fill stages of the pipeline run against the resident master.
+- When INVENTORY.xlsx settles, the master is reloaded first.
+
+Polling keeps the watcher dependency-free and works the same on network drives,
+where inotify events are unreliable.
+
+Usage:
+    python watch.py --data-dir ./data [--poll-interval 0.5] [--debounce 1.0]
+"""
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Callable, Optional
+import os
+import time
+import zipfile
+import pandas as pd
+
+from inventory_cache import sheet_fingerprints
+from inventory_processor import (
+    DATA_DIR, FILTERED_PATH, INVENTORY_PATH, STANDARDIZED_PATH, DUPLICATE_POLICIES, DUPLICATE_POLICY,
+    METADATA_COLUMNS, SHEETS_TO_SKIP, _read_filtered_sheet, capture_master_content, combine_filtered_frames,
+    master_row_numbers
+)
+from output_writers import OUTPUT_FORMATS, output_path
+from pipeline import PipelineOptions, run_pipeline
+from scrape_standard_for_appendix import SLIM_PATH, load_producer_keywords
+
+
+POLL_INTERVAL = 0.5  # Seconds between checks of the two workbooks
+DEBOUNCE = 1.0  # Seconds a workbook must stay unchanged before it is read
+
+
+@dataclass
+class _WatchedFile:
+    """Last seen (mtime_ns, size) of a workbook and whether a change is waiting to be handled."""
+    path: str
+    signature: Optional[tuple[int, int]] = None
+    changed_at: float = 0.0
+    pending: bool = False
+
+
+def _signature(path: str) -> Optional[tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class InventoryWatcher:
+    """
+    Keeps the parsed master inventory in memory and regenerates the outputs when
+    the workbooks change. Call poll() periodically, or run() to loop until interrupted.
+    """
+
+    def __init__(self, options: PipelineOptions, write: dict[str, str], debounce: float = DEBOUNCE,
+                 log: Callable[[str], None] = print, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            options (PipelineOptions): Workbook paths and capture settings.
+            write (dict[str, str]): Pipeline artifact -> output path, e.g.
+                {'standardized': ..., 'appendix': ...}; see pipeline.run_pipeline.
+            debounce (float): Seconds a changed workbook must stay unchanged before it is read.
+            log (Callable[[str], None]): Where progress messages go.
+            clock (Callable[[], float]): Monotonic clock, in seconds.
+        """
+        self.options = options
+        self.write = write
+        self.debounce = debounce
+        self.log = log
+        self.clock = clock
+        self.master: Optional[pd.DataFrame] = None
+        self.artifacts: dict[str, pd.DataFrame] = {}
+        self._sheets: dict[tuple[str, str], pd.DataFrame] = {}  # (sheet, fingerprint) -> parsed rows
+        self._inventory = _WatchedFile(os.path.join(options.data_dir, options.inventory_path))
+        self._filtered = _WatchedFile(os.path.join(options.data_dir, options.filtered_path))
+
+    def load_master(self) -> None:
+        """Parse (or load from the snapshot cache) the master, indexed by 'Row no.'."""
+        master = capture_master_content(
+            self.options.inventory_path, self.options.data_dir,
+            cache_dir=self.options.cache_dir, use_cache=self.options.use_cache,
+            compact=self.options.compact, report_memory=self.options.compact
+        )
+        # standardize_data then selects rows on the index directly
+        self.master = master.set_axis(pd.Index(master_row_numbers(master), name='Row no.'), axis=0)
+
+    def capture_metadata(self) -> pd.DataFrame:
+        """Metadata of the filtered workbook, re-parsing only the sheets that changed."""
+        fingerprints = {
+            sheet: digest for sheet, digest in sheet_fingerprints(self._filtered.path).items()
+            if sheet not in SHEETS_TO_SKIP
+        }
+        changed = [sheet for sheet, digest in fingerprints.items() if (sheet, digest) not in self._sheets]
+        parsed = {}
+        if changed:
+            with pd.ExcelFile(self._filtered.path) as xls:
+                parsed = {sheet: _read_filtered_sheet(xls, sheet, self.options.filtered_path) for sheet in changed}
+        frames = []
+        sheets = {}
+        for sheet, digest in fingerprints.items():
+            frame = parsed[sheet] if sheet in changed else self._sheets[(sheet, digest)]
+            sheets[(sheet, digest)] = frame
+            frames.append(frame.assign(**{'source sheet': sheet}))
+        self._sheets = sheets
+        filtered = combine_filtered_frames(frames, self.options.duplicate_policy)
+        return filtered.set_index('Row no.').reindex(columns=METADATA_COLUMNS)
+
+    def regenerate(self) -> dict[str, pd.DataFrame]:
+        """Run standardize, slim and fill against the resident master and write the outputs."""
+        if self.master is None:
+            self.load_master()
+        self.artifacts = run_pipeline(
+            ['standardize', 'slim', 'fill'],
+            inputs={'metadata': self.capture_metadata(), 'master': self.master},
+            write=self.write, options=self.options
+        )
+        return self.artifacts
+
+    def _settled(self, watched: _WatchedFile, now: float) -> bool:
+        """Record a change of the file; True once a change has stayed put for the debounce interval."""
+        signature = _signature(watched.path)
+        if signature != watched.signature:
+            watched.signature, watched.changed_at, watched.pending = signature, now, True
+            return False
+        if not watched.pending or signature is None or now - watched.changed_at < self.debounce:
+            return False
+        # A save still in progress, or an interrupted one, is not a complete zip archive
+        return zipfile.is_zipfile(watched.path)
+
+    def start(self) -> None:
+        """Load the master, generate the outputs once and start tracking both workbooks."""
+        self._inventory.signature = _signature(self._inventory.path)
+        self._filtered.signature = _signature(self._filtered.path)
+        started = self.clock()
+        self.load_master()
+        self.regenerate()
+        self.log(f"Loaded {len(self.master):,} master rows and generated the outputs "
+                 f"in {(self.clock() - started) * 1000:.0f} ms; watching {self.options.data_dir}.")
+
+    def poll(self) -> bool:
+        """
+        Check both workbooks once and regenerate if one of them settled after a change.
+        Returns:
+            bool: Whether the outputs were regenerated.
+        """
+        now = self.clock()
+        master_changed = self._settled(self._inventory, now)
+        filtered_changed = self._settled(self._filtered, now)
+        if not (master_changed or filtered_changed):
+            return False
+        started = self.clock()
+        try:
+            if master_changed:
+                self.load_master()
+                self.log(f"Reloaded {len(self.master):,} master rows from {self._inventory.path}.")
+            self.regenerate()
+        except Exception as error:  # Keep watching: the next save gets another chance
+            self.log(f"Could not regenerate the outputs: {error}")
+            return False
+        finally:
+            # A failed read is not retried until the file changes again
+            self._inventory.pending &= not master_changed
+            self._filtered.pending &= not filtered_changed
+        rows = len(self.artifacts.get('standardized', ()))
+        self.log(f"Regenerated {rows:,} rows in {(self.clock() - started) * 1000:.0f} ms.")
+        return True
+
+    def run(self, poll_interval: float = POLL_INTERVAL) -> None:
+        """Start, then poll until interrupted (Ctrl+C)."""
+        self.start()
+        try:
+            while True:
+                time.sleep(poll_interval)
+                self.poll()
+        except KeyboardInterrupt:
+            self.log("Stopped watching.")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Keep the master inventory loaded and regenerate outputs when FILTERED.xlsx is saved.")
+    parser.add_argument('--data-dir', type=str, default=DATA_DIR, help='Directory where the data files are stored.')
+    parser.add_argument('--inventory-name', type=str, default=INVENTORY_PATH, help='Name of the master inventory file.')
+    parser.add_argument('--filtered-name', type=str, default=FILTERED_PATH, help='Name of the filtered data file.')
+    parser.add_argument('--standardized-name', type=str, default=STANDARDIZED_PATH,
+                        help='Name of the standardized data file, inside the data directory.')
+    parser.add_argument('--output-type', type=str, choices=list(OUTPUT_FORMATS), default='json',
+                        help='Output format for standardized data.')
+    parser.add_argument('--slim-output', type=str, default=SLIM_PATH, help='Path (without extension) for the slim data.')
+    parser.add_argument('--save-type', type=str, choices=list(OUTPUT_FORMATS), default='json',
+                        help='Output format for the slim data.')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for the parsed master inventory cache (default: <data-dir>/.cache).')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-parse the master inventory instead of using the cache.')
+    parser.add_argument('--compact', action='store_true',
+                        help='Keep the master inventory with compact dtypes and print a per-column memory report.')
+    parser.add_argument('--duplicate-policy', type=str, choices=DUPLICATE_POLICIES, default=DUPLICATE_POLICY,
+                        help='Which entry to keep when a Row no. appears on more than one filtered sheet.')
+    parser.add_argument('--producer-keywords', type=str, default=None,
+                        help='JSON file mapping producer types to keywords, in match priority order.')
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL, help='Seconds between checks of the workbooks.')
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE,
+                        help='Seconds a changed workbook must stay unchanged before it is read.')
+    args = parser.parse_args()
+
+    options = PipelineOptions(
+        data_dir=args.data_dir, filtered_path=args.filtered_name, inventory_path=args.inventory_name,
+        duplicate_policy=args.duplicate_policy, cache_dir=args.cache_dir, use_cache=not args.no_cache,
+        compact=args.compact,
+        producer_keywords=load_producer_keywords(args.producer_keywords) if args.producer_keywords else None,
+    )
+    write = {
+        'standardized': os.path.join(args.data_dir, output_path(args.standardized_name, args.output_type)),
+        'appendix': output_path(args.slim_output, args.save_type),
+    }
+    InventoryWatcher(options, write, debounce=args.debounce).run(args.poll_interval)